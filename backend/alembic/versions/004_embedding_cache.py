@@ -0,0 +1,51 @@
+"""embedding cache keyed by content hash
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import BYTEA
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("text_hash", BYTEA, primary_key=True),
+        sa.Column("model", sa.Text, primary_key=True),
+        sa.Column("dimensions", sa.Integer, primary_key=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    # Unconstrained vector: entries for different dimensions share the table
+    op.execute("ALTER TABLE embedding_cache ADD COLUMN embedding vector NOT NULL")
+
+    op.create_index(
+        "ix_embedding_cache_last_used",
+        "embedding_cache",
+        ["last_used_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_cache")
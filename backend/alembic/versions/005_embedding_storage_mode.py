@@ -0,0 +1,43 @@
+"""chunk embedding storage follows settings (dimensions, vector/halfvec)
+
+This migration used to convert chunks.embedding to the settings in effect
+when it was applied, which left no way to change them afterwards. The
+conversion is now an explicit, idempotent command that also re-embeds
+what it can't convert in place:
+
+    python -m app.pipeline.reembed --convert
+
+Upgrading does nothing. Downgrading refuses to run unless the column is
+back to the default vector(1536), instead of clearing every embedding.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    current = op.get_bind().execute(sa.text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = 'chunks'::regclass AND attname = 'embedding'"
+    )).scalar_one()
+    if current != "vector(1536)":
+        raise RuntimeError(
+            f"chunks.embedding is {current}: set CONNECTIVE_EMBEDDING_STORAGE=vector "
+            "and CONNECTIVE_EMBEDDING_DIMENSIONS=1536, run "
+            "`python -m app.pipeline.reembed --convert`, then downgrade"
+        )
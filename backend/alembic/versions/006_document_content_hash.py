@@ -0,0 +1,38 @@
+"""document content hash for change detection
+
+Adds documents.content_hash (sha256 of title and raw_content) and fills it
+for existing rows, so the first sync after upgrading only re-indexes
+documents that actually changed.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import BYTEA
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("content_hash", BYTEA, nullable=True))
+    # Same value as app.pipeline.indexer._content_hash
+    op.execute(
+        """
+        UPDATE documents
+        SET content_hash = sha256(convert_to(
+            coalesce(title, '') || E'\\n' || coalesce(raw_content, ''), 'UTF8'
+        ))
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "content_hash")
@@ -0,0 +1,25 @@
+"""connector sync progress marker
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("connectors", sa.Column("sync_progress", JSONB, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("connectors", "sync_progress")
@@ -0,0 +1,43 @@
+"""chunk metadata holds only chunk-level fields
+
+Document-level fields (title, url, author, provider, connector metadata)
+used to be copied into every chunk's metadata. They are now read from
+documents at query time, so existing chunk copies are dropped. Run
+``VACUUM FULL chunks`` (or pg_repack) afterwards to return the space.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE chunks SET metadata = NULL WHERE metadata IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        UPDATE chunks c
+        SET metadata = jsonb_build_object(
+                'title', d.title,
+                'url', d.url,
+                'author_name', d.author_name,
+                'author_email', d.author_email,
+                'provider', d.provider,
+                'content_type', d.content_type,
+                'source_created_at', d.source_created_at
+            ) || coalesce(d.metadata, '{}'::jsonb)
+        FROM documents d
+        WHERE d.id = c.document_id
+        """
+    )
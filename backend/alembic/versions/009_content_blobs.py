@@ -0,0 +1,68 @@
+"""compressed raw content store
+
+Adds content_blobs and documents.content_ref. Nothing moves until
+CONNECTIVE_CONTENT_STORE=db is set; existing rows can then be moved with
+``python -m app.pipeline.content_store``.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import BYTEA
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_blobs",
+        sa.Column("content_hash", BYTEA, primary_key=True),
+        sa.Column("data", BYTEA, nullable=False),
+        sa.Column("raw_size", sa.Integer, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    # zstd output doesn't compress further; skip TOAST's own compression
+    op.execute("ALTER TABLE content_blobs ALTER COLUMN data SET STORAGE EXTERNAL")
+
+    op.add_column(
+        "documents",
+        sa.Column(
+            "content_ref",
+            BYTEA,
+            sa.ForeignKey("content_blobs.content_hash"),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_documents_content_ref", "documents", ["content_ref"])
+
+
+def downgrade() -> None:
+    # Blobs are zstd frames, which Postgres can't decompress: move them back
+    # with `python -m app.pipeline.content_store --restore` first
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM documents WHERE content_ref IS NOT NULL) THEN
+                RAISE EXCEPTION 'documents still reference content_blobs; '
+                    'run python -m app.pipeline.content_store --restore first';
+            END IF;
+        END $$
+        """
+    )
+    op.drop_index("ix_documents_content_ref", table_name="documents")
+    op.drop_column("documents", "content_ref")
+    op.drop_table("content_blobs")
@@ -0,0 +1,50 @@
+"""chunk visibility array
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chunks",
+        sa.Column(
+            "visible_to",
+            ARRAY(UUID(as_uuid=True)),
+            nullable=False,
+            server_default=sa.text("'{}'"),
+        ),
+    )
+    # Rewrites every chunk row (and its index entries); on a large table,
+    # expect this to take a while
+    op.execute(
+        """
+        UPDATE chunks SET visible_to = access.users
+        FROM (
+            SELECT document_id, array_agg(user_id ORDER BY user_id) AS users
+            FROM document_access
+            GROUP BY document_id
+        ) AS access
+        WHERE chunks.document_id = access.document_id
+        """
+    )
+    op.create_index(
+        "chunks_visible_to_idx", "chunks", ["visible_to"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("chunks_visible_to_idx", table_name="chunks")
+    op.drop_column("chunks", "visible_to")
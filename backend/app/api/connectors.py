@@ -16,6 +16,7 @@ from app.models.document import Document
 from app.models.document_access import DocumentAccess
 from app.models.oauth_token import OAuthToken
 from app.models.user import User
+from app.pipeline import visibility
 from app.schemas.connector import (
     ConnectorConfigUpdate,
     ConnectorResponse,
@@ -322,9 +323,16 @@ async def disconnect(
                 Document.provider == provider,
             )
         )
-        await db.execute(
-            sa.delete(DocumentAccess).where(DocumentAccess.id.in_(access_subq))
-        )
+        revoked = (
+            await db.execute(
+                sa.delete(DocumentAccess)
+                .where(DocumentAccess.id.in_(access_subq))
+                .returning(DocumentAccess.document_id)
+            )
+        ).scalars().all()
+        # Chunks of documents other users still share stop listing this
+        # user, in this transaction so the revocation can't be lost
+        await visibility.revoke(db, user.id, revoked)
 
         # Delete orphan documents owned by this connector
         # (no remaining access entries → no user needs them)
@@ -346,6 +354,7 @@ async def disconnect(
         conn.config = None
         conn.last_synced_at = None
         conn.sync_cursor = None
+        conn.sync_progress = None
 
     await db.commit()
     return {"status": "disconnected"}
@@ -2,11 +2,14 @@ import asyncio
 import datetime
 import logging
 
+import sqlalchemy as sa
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.api.deps import get_current_user, get_db
+from app.config import settings
 from app.connectors import get_connector
 from app.database import get_session_ctx
 from app.models.connector import Connector
@@ -19,6 +22,33 @@ from app.services.encryption import decrypt_token, encrypt_token
 router = APIRouter()
 logger = logging.getLogger("uvicorn.error")
 
+# How far back a sync fetches, and the most a resumed sync reaches back
+FETCH_WINDOW = datetime.timedelta(days=90)
+
+
+async def _heartbeat(connector_id) -> None:
+    """Keep a running sync's progress marker fresh through the phases that
+    don't commit (token refresh, slow pages, stale cleanup, overlap
+    detection), so ``_sync_is_stale`` only catches dead syncs."""
+    interval = settings.ingest_stale_sync_minutes * 60 / 3
+    while True:
+        await asyncio.sleep(interval)
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        try:
+            async with get_session_ctx() as db:
+                await db.execute(
+                    sa.update(Connector)
+                    .where(Connector.id == connector_id, Connector.status == "syncing")
+                    .values(
+                        sync_progress=Connector.sync_progress.op("||")(
+                            sa.bindparam("updated_at", {"updated_at": now}, type_=JSONB)
+                        )
+                    )
+                )
+                await db.commit()
+        except Exception:
+            logger.exception(f"Sync heartbeat failed for connector {connector_id}")
+
 
 async def _run_ingestion(user_id: str, provider: str):
     """Background task to fetch and index documents from a connector."""
@@ -62,9 +92,44 @@ async def _run_ingestion(user_id: str, provider: str):
             logger.info(f"Skipping Google Drive sync for {user_id} — no folders configured")
             return
 
+        # Fetch window: last 90 days. A sync that didn't finish is resumed
+        # with its original window (but no more than 90 days back, however
+        # long ago it failed); the documents it committed are skipped as
+        # unchanged.
+        now = datetime.datetime.now(datetime.UTC)
+        previous = conn.sync_progress or {}
+        if previous:
+            since = max(
+                datetime.datetime.fromisoformat(previous["since"]), now - FETCH_WINDOW
+            )
+            logger.info(
+                f"Resuming interrupted sync for {provider}/{user_id} "
+                f"({previous['documents']} documents committed)"
+            )
+        else:
+            since = now - FETCH_WINDOW
+
         conn.status = "syncing"
+        conn.sync_progress = {
+            "since": since.isoformat(),
+            "started_at": previous.get("started_at", now.isoformat()),
+            "updated_at": now.isoformat(),
+            "documents": previous.get("documents", 0),
+            "chunks": previous.get("chunks", 0),
+        }
         await db.commit()
+        resumed = dict(conn.sync_progress)
 
+        def record_progress(progress: dict):
+            # Committed by index_documents along with the documents
+            conn.sync_progress = {
+                **resumed,
+                "updated_at": datetime.datetime.now(datetime.UTC).isoformat(),
+                "documents": resumed["documents"] + progress["documents"],
+                "chunks": resumed["chunks"] + progress["chunks"],
+            }
+
+        heartbeat = asyncio.create_task(_heartbeat(conn.id))
         try:
             access_token = decrypt_token(token.access_token)
             connector_impl = get_connector(provider)
@@ -84,14 +149,18 @@ async def _run_ingestion(user_id: str, provider: str):
                     token.expires_at = new_data["expires_at"]
                 await db.commit()
 
-            # Fetch documents (last 90 days)
-            since = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=90)
-            documents = await connector_impl.fetch_documents(
-                access_token=access_token,
-                config=conn.config or {},
-                since=since,
-                cursor=conn.sync_cursor,
-            )
+            # Fetch documents, indexing each page as it arrives
+            fetched_external_ids: set[str] = set()
+
+            async def pages():
+                async for page in connector_impl.iter_documents(
+                    access_token=access_token,
+                    config=conn.config or {},
+                    since=since,
+                    cursor=conn.sync_cursor,
+                ):
+                    fetched_external_ids.update(doc["external_id"] for doc in page)
+                    yield page
 
             # Index the documents
             new_docs = await index_documents(
@@ -99,12 +168,12 @@ async def _run_ingestion(user_id: str, provider: str):
                 user_id=uid,
                 connector_id=conn.id,
                 provider=provider,
-                documents=documents,
+                documents=pages(),
+                on_commit=record_progress,
             )
 
             # Clean up stale documents not returned by this fetch
             try:
-                fetched_external_ids = {doc["external_id"] for doc in documents}
                 await cleanup_stale_documents(
                     db=db,
                     user_id=uid,
@@ -139,11 +208,12 @@ async def _run_ingestion(user_id: str, provider: str):
             conn.status = "ready"
             conn.last_synced_at = datetime.datetime.now(datetime.UTC)
             conn.error_message = None
+            conn.sync_progress = None
             await db.commit()
 
             logger.info(
                 f"Ingestion complete for {provider}/{user_id}: "
-                f"{len(documents)} documents"
+                f"{len(fetched_external_ids)} documents"
             )
 
         except Exception as e:
@@ -166,6 +236,20 @@ async def _run_ingestion(user_id: str, provider: str):
                 logger.exception(
                     f"Failed to update error status for {provider}/{user_id}"
                 )
+        finally:
+            heartbeat.cancel()
+
+
+def _sync_is_stale(conn: Connector) -> bool:
+    """True if a "syncing" connector's progress marker stopped moving, e.g.
+    because the process running the sync died. A running sync sets the
+    marker together with the status and keeps it fresh (``_heartbeat``), so
+    a connector without one is stale too."""
+    updated_at = (conn.sync_progress or {}).get("updated_at")
+    if not updated_at:
+        return True
+    age = datetime.datetime.now(datetime.UTC) - datetime.datetime.fromisoformat(updated_at)
+    return age > datetime.timedelta(minutes=settings.ingest_stale_sync_minutes)
 
 
 @router.post("/{provider}/trigger")
@@ -186,7 +270,7 @@ async def trigger_ingest(
     if not conn or conn.status == "disconnected":
         raise HTTPException(status_code=400, detail="Connector not connected")
 
-    if conn.status == "syncing":
+    if conn.status == "syncing" and not _sync_is_stale(conn):
         raise HTTPException(status_code=409, detail="Sync already in progress")
 
     if provider == "github" and not (conn.config or {}).get("repos"):
@@ -230,4 +314,5 @@ async def ingest_status(
         status=conn.status,
         last_synced_at=conn.last_synced_at,
         error_message=conn.error_message,
+        progress=conn.sync_progress,
     )
@@ -16,10 +16,14 @@ from app.schemas.scan import (
 )
 from app.config import settings
 from app.services.openai_client import get_openai, with_backoff
+from app.services.tokenizer import truncate_tokens
 
 router = APIRouter()
 logger = logging.getLogger("uvicorn.error")
 
+# Token budget for the part of the scanned content used as the search query
+SCAN_QUERY_TOKENS = 256
+
 
 @router.post("", response_model=ScanResponse)
 async def scan(
@@ -28,7 +32,7 @@ async def scan(
     db: AsyncSession = Depends(get_db),
 ):
     # Use the content as the query for hybrid search
-    query = req.content[:1000]  # Truncate for embedding
+    query = truncate_tokens(req.content, SCAN_QUERY_TOKENS)  # Truncate for embedding
 
     chunks = await hybrid_search(
         db=db,
@@ -63,8 +63,14 @@ class Settings(BaseSettings):
 
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # empty = api.openai.com
     embedding_model: str = "text-embedding-3-small"
+    # text-embedding-3 models can return shortened vectors (e.g. 512 or 768);
+    # after changing this or embedding_storage run
+    # `python -m app.pipeline.reembed --convert`
     embedding_dimensions: int = 1536
+    # "vector" (float32, HNSW on a halfvec cast) or "halfvec" (float16 column)
+    embedding_storage: str = "vector"
     llm_model: str = "gpt-4o"
 
     # OAuth - Slack
@@ -88,6 +94,113 @@ class Settings(BaseSettings):
     overlap_llm_confirm_threshold: float = 0.6
     overlap_detection_enabled: bool = True
 
+    # Chunking — documents at least this long are tokenized in a process pool
+    # instead of on the event loop (0 workers disables the pool)
+    chunk_pool_workers: int = 2
+    chunk_pool_min_chars: int = 50_000
+    # Documents at least this long are chunked as a stream and embedded/stored
+    # in windows of chunk_stream_window chunks, bounding memory per document
+    chunk_stream_min_chars: int = 2_000_000
+    chunk_stream_window: int = 64
+    # Chunk writes of at least this many rows use binary COPY instead of ORM
+    # inserts
+    chunk_copy_min_rows: int = 500
+
+    # Ingestion pipeline — fetched pages flow through bounded queues
+    # (prepare -> chunk -> embed -> store); a full queue pauses the stage
+    # before it. Stored documents are committed every ingest_commit_documents
+    # documents or ingest_commit_chunks chunks, whichever comes first, so
+    # they become searchable (and survive a failure) while the sync runs
+    ingest_queue_size: int = 64
+    ingest_chunk_concurrency: int = 2
+    ingest_embed_concurrency: int = 4
+    ingest_store_batch_rows: int = 1000
+    ingest_commit_documents: int = 100
+    ingest_commit_chunks: int = 2000
+    # A sync whose progress marker hasn't moved for this long is considered
+    # dead (e.g. the process was killed) and can be triggered again
+    ingest_stale_sync_minutes: int = 30
+    # Documents a sync is indexing are claimed (documents.claimed_at) so that
+    # concurrent syncs of the same source embed them once; a claim older
+    # than this is assumed abandoned and can be taken over
+    ingest_claim_timeout_minutes: int = 30
+    # Raw content store — "" keeps documents.raw_content inline; "db" moves
+    # raw content of at least content_store_min_chars into content_blobs,
+    # zstd-compressed and keyed by hash (needs the content-store extra)
+    content_store: str = ""
+    content_store_min_chars: int = 4096
+    content_store_zstd_level: int = 3
+    content_store_sweep_interval_minutes: int = 60
+    # Stale-document cleanup deletes access entries (and orphaned documents)
+    # in batches of this size, committing after each
+    cleanup_batch_size: int = 1000
+
+    # Embedding cache — identical (normalized) texts are embedded once and
+    # reused across documents, users and syncs
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_age_days: int = 30
+    embedding_cache_max_rows: int = 1_000_000
+    embedding_cache_eviction_interval_minutes: int = 60
+
+    # Embedding requests — batches are packed up to a token budget (the API
+    # rejects requests over 300k tokens) and sent concurrently; concurrency
+    # halves on rate limits and recovers as requests succeed
+    embedding_batch_max_tokens: int = 100_000
+    embedding_batch_max_texts: int = 2048
+    embedding_max_concurrency: int = 4
+
+    # Embedding backend — "openai", or "local" for a sentence-transformers
+    # model run in a process pool (local-models extra). Switching backends
+    # changes the vector space: set embedding_dimensions to the model's size
+    # and run `python -m app.pipeline.reembed --convert --all`
+    embedding_backend: str = "openai"
+    local_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    local_embedding_runtime: str = "torch"  # or "onnx"
+    local_embedding_workers: int = 2
+    local_embedding_batch_size: int = 64
+
+    # Query embeddings — per-process TTL+LRU cache for chat/scan queries (0
+    # disables it); query_cache_shared also reads and writes the embedding
+    # cache table so every worker benefits
+    query_cache_size: int = 1024
+    query_cache_ttl_seconds: int = 3600
+    query_cache_shared: bool = True
+
+    # Retrieval — "single" runs hybrid search's vector and full-text legs and
+    # their rank fusion as one statement, loading content only for the
+    # results; "separate" runs the legs as two queries and fuses in Python;
+    # "concurrent" does the same with the legs on two pooled connections at
+    # once (embedding the query during the full-text leg), so a search holds
+    # up to three connections.
+    # hnsw_ef_search is set when connections are opened, so vector queries
+    # need no SET LOCAL round trip
+    hybrid_search_mode: str = "single"
+    hnsw_ef_search: int = 100
+
+    # Filtered ANN — HNSW drops chunks the user can't see after collecting
+    # its candidates, so users who see little of the corpus get few vector
+    # hits. Users who see at most ann_exact_max_chunks chunks get an exact
+    # scan, others a raised ef_search. hnsw_iterative_scan
+    # ("strict_order" or "relaxed_order", pgvector >= 0.8) makes the index
+    # scan keep going instead; it is set per connection like hnsw_ef_search
+    ann_exact_max_chunks: int = 10_000
+    hnsw_iterative_scan: str = ""
+
+    # Reranking — hybrid search's top fused results are reordered by "llm"
+    # (a llm_model chat completion per search), "cross_encoder" (a local
+    # sentence-transformers cross-encoder on a thread pool; optional
+    # dependency) or not at all ("none"). A reranker still running after
+    # rerank_budget_seconds (0 = no limit) is abandoned for the fused order.
+    # Cross-encoder scores are cached per (query, chunk), up to
+    # rerank_cache_size entries
+    reranker: str = "llm"
+    rerank_budget_seconds: float = 2.0
+    rerank_cache_size: int = 10_000
+    cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    cross_encoder_max_length: int = 256
+    cross_encoder_batch_size: int = 16
+    cross_encoder_workers: int = 2
+
 
 postgres_settings = PostgresSettings()
 settings = Settings()
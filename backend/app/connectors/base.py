@@ -1,5 +1,6 @@
 import datetime
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Any
 
 
@@ -27,6 +28,17 @@ class BaseConnector(ABC):
         ...
 
     @abstractmethod
+    def iter_documents(
+        self,
+        access_token: str,
+        config: dict,
+        since: datetime.datetime,
+        cursor: dict | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Fetch documents from the source, yielding them a page at a time so
+        indexing can start before the fetch is done."""
+        ...
+
     async def fetch_documents(
         self,
         access_token: str,
@@ -35,4 +47,7 @@ class BaseConnector(ABC):
         cursor: dict | None = None,
     ) -> list[dict[str, Any]]:
         """Fetch documents from the source. Returns list of document dicts."""
-        ...
+        documents = []
+        async for page in self.iter_documents(access_token, config, since, cursor):
+            documents.extend(page)
+        return documents
@@ -1,5 +1,6 @@
 import datetime
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 from urllib.parse import urlencode
 
@@ -62,14 +63,14 @@ class GitHubConnector(BaseConnector):
     async def refresh_access_token(self, refresh_token: str) -> dict[str, Any]:
         raise NotImplementedError("GitHub OAuth tokens don't expire")
 
-    async def fetch_documents(
+    async def iter_documents(
         self,
         access_token: str,
         config: dict,
         since: datetime.datetime,
         cursor: dict | None = None,
-    ) -> list[dict[str, Any]]:
-        documents = []
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        total = 0
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Accept": "application/vnd.github+json",
@@ -87,7 +88,7 @@ class GitHubConnector(BaseConnector):
             selected_repos = config.get("repos")
             if not selected_repos:
                 logger.info("No repos configured for GitHub — skipping sync")
-                return documents
+                return
 
             since_iso = since.strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -114,6 +115,7 @@ class GitHubConnector(BaseConnector):
                     if not issues:
                         break
 
+                    documents = []
                     for issue in issues:
                         # Skip pull requests in issues endpoint
                         if issue.get("pull_request"):
@@ -136,6 +138,8 @@ class GitHubConnector(BaseConnector):
                             "source_created_at": issue["created_at"],
                         })
 
+                    total += len(documents)
+                    yield documents
                     page += 1
 
                 # Fetch PRs
@@ -156,6 +160,7 @@ class GitHubConnector(BaseConnector):
                     if not prs:
                         break
 
+                    documents = []
                     for pr in prs:
                         updated = datetime.datetime.fromisoformat(
                             pr["updated_at"].replace("Z", "+00:00")
@@ -180,6 +185,8 @@ class GitHubConnector(BaseConnector):
                             "source_created_at": pr["created_at"],
                         })
 
+                    total += len(documents)
+                    yield documents
                     page += 1
 
                 # Fetch recent commits
@@ -190,6 +197,7 @@ class GitHubConnector(BaseConnector):
                 )
                 commits = resp.json()
 
+                documents = []
                 for commit in commits:
                     msg = commit["commit"]["message"]
                     author = commit["commit"]["author"]
@@ -205,5 +213,7 @@ class GitHubConnector(BaseConnector):
                         "source_created_at": author.get("date"),
                     })
 
-        logger.info(f"Fetched {len(documents)} items from GitHub")
-        return documents
+                total += len(documents)
+                yield documents
+
+        logger.info(f"Fetched {total} items from GitHub")
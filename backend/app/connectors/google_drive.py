@@ -1,5 +1,6 @@
 import datetime
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 from urllib.parse import urlencode
 
@@ -145,20 +146,20 @@ class GoogleDriveConnector(BaseConnector):
 
         return all_ids
 
-    async def fetch_documents(
+    async def iter_documents(
         self,
         access_token: str,
         config: dict,
         since: datetime.datetime,
         cursor: dict | None = None,
-    ) -> list[dict[str, Any]]:
+    ) -> AsyncIterator[list[dict[str, Any]]]:
         # If no folders configured, return empty (same as GitHub repos pattern)
         folders = config.get("folders")
         if not folders:
             logger.info("No folders configured for Google Drive — skipping sync")
-            return []
+            return
 
-        documents = []
+        total = 0
         headers = {"Authorization": f"Bearer {access_token}"}
 
         since_rfc = since.strftime("%Y-%m-%dT%H:%M:%S")
@@ -214,6 +215,7 @@ class GoogleDriveConnector(BaseConnector):
                     )
                     data = resp.json()
 
+                    documents = []
                     for file in data.get("files", []):
                         if file["mimeType"] not in supported_mimes:
                             continue
@@ -270,9 +272,12 @@ class GoogleDriveConnector(BaseConnector):
                             "source_created_at": file.get("createdTime"),
                         })
 
+                    if documents:
+                        total += len(documents)
+                        yield documents
+
                     page_token = data.get("nextPageToken")
                     if not page_token:
                         break
 
-        logger.info(f"Fetched {len(documents)} files from Google Drive")
-        return documents
+        logger.info(f"Fetched {total} files from Google Drive")
@@ -1,6 +1,7 @@
 import asyncio
 import datetime
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 from urllib.parse import urlencode
 
@@ -94,15 +95,15 @@ class SlackConnector(BaseConnector):
                 names[uid] = uid
         return names
 
-    async def fetch_documents(
+    async def iter_documents(
         self,
         access_token: str,
         config: dict,
         since: datetime.datetime,
         cursor: dict | None = None,
-    ) -> list[dict[str, Any]]:
-        documents = []
-        user_ids: set[str] = set()
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        total = 0
+        names: dict[str, str] = {}
         headers = {"Authorization": f"Bearer {access_token}"}
 
         async with httpx.AsyncClient() as client:
@@ -153,12 +154,12 @@ class SlackConnector(BaseConnector):
                         )
                         break
 
+                    documents = []
                     for msg in data.get("messages", []):
                         if msg.get("subtype"):
                             continue  # Skip system messages
 
                         uid = msg.get("user", "unknown")
-                        user_ids.add(uid)
                         ts = float(msg["ts"])
                         documents.append({
                             "external_id": f"slack:{channel['id']}:{msg['ts']}",
@@ -178,6 +179,20 @@ class SlackConnector(BaseConnector):
                             ).isoformat(),
                         })
 
+                    # Resolve user IDs to display names, once per user
+                    new_ids = {doc["author_name"] for doc in documents} - names.keys()
+                    if new_ids:
+                        names.update(
+                            await self._resolve_user_names(client, headers, new_ids)
+                        )
+                    for doc in documents:
+                        doc["author_name"] = names.get(
+                            doc["author_name"], doc["author_name"]
+                        )
+                    if documents:
+                        total += len(documents)
+                        yield documents
+
                     if not data.get("has_more"):
                         break
                     history_cursor = data.get("response_metadata", {}).get(
@@ -187,13 +202,4 @@ class SlackConnector(BaseConnector):
                 # Be nice to the Slack API
                 await asyncio.sleep(1)
 
-            # Resolve user IDs to display names
-            if user_ids:
-                names = await self._resolve_user_names(client, headers, user_ids)
-                for doc in documents:
-                    doc["author_name"] = names.get(
-                        doc["author_name"], doc["author_name"]
-                    )
-
-        logger.info(f"Fetched {len(documents)} messages from Slack")
-        return documents
+        logger.info(f"Fetched {total} messages from Slack")
@@ -4,12 +4,17 @@ from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.config import postgres_settings
+from app.config import postgres_settings, settings
+
+server_settings = {"hnsw.ef_search": str(settings.hnsw_ef_search)}
+if settings.hnsw_iterative_scan:
+    server_settings["hnsw.iterative_scan"] = settings.hnsw_iterative_scan
 
 engine = create_async_engine(
     postgres_settings.async_url,
     pool_size=20,
     max_overflow=20,
+    connect_args={"server_settings": server_settings},
 )
 
 AsyncSessionLocal: sessionmaker[AsyncSession] = sessionmaker(
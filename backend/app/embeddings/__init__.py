@@ -0,0 +1,28 @@
+from app.config import settings
+from app.embeddings.base import EmbeddingBackend
+
+_backend: EmbeddingBackend | None = None
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    """Process-wide backend chosen by ``settings.embedding_backend``."""
+    global _backend
+    if _backend is None:
+        if settings.embedding_backend == "openai":
+            from app.embeddings.openai_backend import OpenAIEmbeddingBackend
+
+            _backend = OpenAIEmbeddingBackend()
+        elif settings.embedding_backend == "local":
+            from app.embeddings.local_backend import LocalEmbeddingBackend
+
+            _backend = LocalEmbeddingBackend()
+        else:
+            raise ValueError(f"Unknown embedding backend: {settings.embedding_backend}")
+    return _backend
+
+
+def shutdown_embedding_backend() -> None:
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+
+class EmbeddingBackend(ABC):
+    """Base class for embedding providers.
+
+    ``model`` and ``dimensions`` identify the vector space: they key the
+    embedding and query caches, so two backends must never share a value.
+    """
+
+    model: str
+    dimensions: int
+
+    @abstractmethod
+    async def embed(
+        self, texts: list[str], token_counts: list[int] | None = None
+    ) -> list[list[float]]:
+        """Embed texts, returning vectors in input order. ``token_counts``
+        are optional hints for batching."""
+        ...
+
+    async def embed_query(self, query: str) -> list[float]:
+        """Embed a single search query."""
+        return (await self.embed([query]))[0]
+
+    def close(self) -> None:
+        """Release workers or connections held by the backend."""
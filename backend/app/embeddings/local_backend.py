@@ -0,0 +1,110 @@
+"""Local CPU embeddings with sentence-transformers, for offline use and bulk
+re-indexing without API rate limits.
+
+Optional dependency: the ``local-models`` extra
+(``pip install -e '.[local-models]'``, or ``local-models-onnx`` for
+``local_embedding_runtime = "onnx"``). The model is loaded once per worker
+process, and each worker encodes whole batches.
+"""
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.embeddings.base import EmbeddingBackend
+
+# Set in each worker process by _init_worker
+_model = None
+
+
+def _init_worker(model_name: str, runtime: str, dimensions: int, threads: int) -> None:
+    global _model
+    from sentence_transformers import SentenceTransformer
+
+    if runtime == "torch":
+        import torch
+
+        # Workers split the cores between them instead of each using all
+        torch.set_num_threads(threads)
+
+    _model = SentenceTransformer(
+        model_name, device="cpu", backend=runtime, truncate_dim=dimensions
+    )
+
+
+def _model_dimensions() -> int:
+    return _model.get_sentence_embedding_dimension()
+
+
+def _encode(texts: list[str], batch_size: int) -> list[list[float]]:
+    return _model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).tolist()
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """sentence-transformers model running in a process pool."""
+
+    def __init__(self):
+        if importlib.util.find_spec("sentence_transformers") is None:
+            raise RuntimeError(
+                "embedding_backend 'local' needs sentence-transformers: "
+                "pip install -e '.[local-models]'"
+            )
+        self.model = f"local:{settings.local_embedding_model}"
+        self.dimensions = settings.embedding_dimensions
+        self.batch_size = settings.local_embedding_batch_size
+        workers = max(1, settings.local_embedding_workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # Fork would copy the event loop and DB connections into workers
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                settings.local_embedding_model,
+                settings.local_embedding_runtime,
+                self.dimensions,
+                max(1, (os.cpu_count() or 1) // workers),
+            ),
+        )
+        self._checked = False
+
+    async def _check_dimensions(self) -> None:
+        """Fail loudly if the model can't produce the configured size, rather
+        than storing vectors the chunks column rejects."""
+        loop = asyncio.get_running_loop()
+        actual = await loop.run_in_executor(self._pool, _model_dimensions)
+        if actual != self.dimensions:
+            raise ValueError(
+                f"{settings.local_embedding_model} produces {actual}-d vectors "
+                f"but embedding_dimensions is {self.dimensions}"
+            )
+        self._checked = True
+
+    async def embed(
+        self, texts: list[str], token_counts: list[int] | None = None
+    ) -> list[list[float]]:
+        if not texts:
+            return []
+        if not self._checked:
+            await self._check_dimensions()
+
+        loop = asyncio.get_running_loop()
+        # A few model batches per task keeps every worker busy without
+        # pickling one huge list to a single process
+        step = self.batch_size * 4
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                self._pool, _encode, texts[i : i + step], self.batch_size
+            )
+            for i in range(0, len(texts), step)
+        ))
+        return [embedding for part in results for embedding in part]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
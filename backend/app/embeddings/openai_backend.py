@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from app.config import settings
+from app.embeddings.base import EmbeddingBackend
+from app.services.openai_client import AdaptiveLimiter, get_openai, with_backoff
+from app.services.tokenizer import count_tokens
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def pack_batches(token_counts: list[int]) -> list[range]:
+    """Split texts into consecutive batches under the per-request token and
+    input budgets. A single text over the token budget gets its own batch."""
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, n in enumerate(token_counts):
+        if i > start and (
+            batch_tokens + n > settings.embedding_batch_max_tokens
+            or i - start >= settings.embedding_batch_max_texts
+        ):
+            batches.append(range(start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += n
+    if start < len(token_counts):
+        batches.append(range(start, len(token_counts)))
+    return batches
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings API, several token-packed batches at a time."""
+
+    def __init__(self):
+        self.model = settings.embedding_model
+        self.dimensions = settings.embedding_dimensions
+        # Shared by every sync in the process, since rate limits are per API key
+        self.limiter = AdaptiveLimiter(settings.embedding_max_concurrency)
+
+    def _dimensions_kwargs(self) -> dict:
+        """``dimensions`` request parameter; only text-embedding-3 models take it."""
+        if self.model.startswith("text-embedding-3"):
+            return {"dimensions": self.dimensions}
+        return {}
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        async with self.limiter:
+            response = await with_backoff(
+                get_openai().embeddings.create,
+                input=texts,
+                model=self.model,
+                on_retry=self.limiter.on_retry,
+                **self._dimensions_kwargs(),
+            )
+        return [item.embedding for item in response.data]
+
+    async def embed(
+        self, texts: list[str], token_counts: list[int] | None = None
+    ) -> list[list[float]]:
+        if token_counts is None:
+            token_counts = [count_tokens(t) for t in texts]
+        batches = pack_batches(token_counts)
+        if len(batches) > 1:
+            logger.info(f"Embedding {len(texts)} texts in {len(batches)} batches")
+
+        # gather keeps results in batch order regardless of completion order
+        results = await asyncio.gather(
+            *(self._embed_batch(texts[b.start : b.stop]) for b in batches)
+        )
+        return [embedding for batch in results for embedding in batch]
+
+    async def embed_query(self, query: str) -> list[float]:
+        # Not behind the limiter: queries are latency-sensitive and tiny
+        # next to sync traffic
+        response = await with_backoff(
+            get_openai().embeddings.create,
+            input=[query],
+            model=self.model,
+            **self._dimensions_kwargs(),
+        )
+        return response.data[0].embedding
@@ -2,7 +2,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import select
 
@@ -15,9 +15,7 @@ SYNC_INTERVAL_MINUTES = 1
 
 async def _auto_sync_loop():
     """Periodically sync all connected connectors."""
-    import datetime
-
-    from app.api.ingest import _run_ingestion
+    from app.api.ingest import _run_ingestion, _sync_is_stale
     from app.database import get_session_ctx
     from app.models.connector import Connector
 
@@ -26,14 +24,16 @@ async def _auto_sync_loop():
         logger.info("Auto-sync: checking for connectors to sync")
         try:
             async with get_session_ctx() as db:
-                # Unstick connectors that have been "syncing" for over 5 minutes
-                cutoff = datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=5)
+                # Unstick connectors whose sync stopped updating its progress
+                # marker (see _sync_is_stale); live syncs keep it fresh
                 result = await db.execute(
                     select(Connector).where(
                         Connector.status == "syncing",
                     )
                 )
                 for stuck in result.scalars().all():
+                    if not _sync_is_stale(stuck):
+                        continue
                     logger.warning(
                         f"Auto-sync: resetting stuck connector "
                         f"{stuck.provider}/{stuck.user_id} to 'error'"
@@ -58,11 +58,53 @@ async def _auto_sync_loop():
             logger.exception("Auto-sync loop error")
 
 
+async def _embedding_cache_eviction_loop():
+    """Periodically evict stale and least recently used embedding cache rows."""
+    from app.pipeline.embedding_cache import evict
+
+    while True:
+        await asyncio.sleep(settings.embedding_cache_eviction_interval_minutes * 60)
+        try:
+            await evict()
+        except Exception:
+            logger.exception("Embedding cache eviction error")
+
+
+async def _content_store_sweep_loop():
+    """Periodically delete content blobs no document refers to."""
+    from app.pipeline.content_store import sweep
+
+    while True:
+        await asyncio.sleep(settings.content_store_sweep_interval_minutes * 60)
+        try:
+            await sweep()
+        except Exception:
+            logger.exception("Content store sweep error")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(_auto_sync_loop())
+    from app.embeddings import shutdown_embedding_backend
+    from app.pipeline.chunk_pool import shutdown_chunk_pool
+    from app.rerankers import shutdown_reranker
+    from app.services.tokenizer import warm_up
+
+    # Load BPE ranks before serving so the first sync or chat doesn't pay for it
+    await asyncio.to_thread(warm_up)
+
+    content_store.check()
+
+    tasks = [asyncio.create_task(_auto_sync_loop())]
+    if settings.embedding_cache_enabled:
+        tasks.append(asyncio.create_task(_embedding_cache_eviction_loop()))
+    if settings.content_store == "db":
+        tasks.append(asyncio.create_task(_content_store_sweep_loop()))
     yield
-    task.cancel()
+    for task in tasks:
+        task.cancel()
+    shutdown_chunk_pool()
+    shutdown_embedding_backend()
+    shutdown_reranker()
 
 
 app = FastAPI(title="Connective", version="0.1.0", lifespan=lifespan)
@@ -76,7 +118,12 @@ app.add_middleware(
 )
 
 # Import and include routers
+from app import rerankers  # noqa: E402
 from app.api import auth, connectors, chat, scan, ingest, notifications  # noqa: E402
+from app.api.deps import get_current_user  # noqa: E402
+from app.pipeline import (  # noqa: E402
+    content_store, embedding_cache, query_cache, retriever, stages, visibility,
+)
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(connectors.router, prefix="/api/connectors", tags=["connectors"])
@@ -89,3 +136,17 @@ app.include_router(notifications.router, prefix="/api/notifications", tags=["not
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+# Signed-in users only: cache and queue figures hint at other users' activity
+@app.get("/api/metrics", dependencies=[Depends(get_current_user)])
+async def metrics():
+    return {
+        "embedding_cache": embedding_cache.metrics(),
+        "query_cache": query_cache.metrics(),
+        "ingest_pipeline": stages.metrics(),
+        "content_store": content_store.metrics(),
+        "vector_search": retriever.metrics(),
+        "visibility": visibility.metrics(),
+        "reranker": rerankers.metrics(),
+    }
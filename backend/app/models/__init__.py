@@ -6,3 +6,5 @@ from app.models.document_access import DocumentAccess  # noqa: F401
 from app.models.chunk import Chunk  # noqa: F401
 from app.models.chat_message import ChatMessage  # noqa: F401
 from app.models.overlap_alert import OverlapAlert  # noqa: F401
+from app.models.embedding_cache import EmbeddingCache  # noqa: F401
+from app.models.content_blob import ContentBlob  # noqa: F401
@@ -2,10 +2,26 @@ import uuid
 from typing import List
 
 import sqlalchemy as sa
-from pgvector.sqlalchemy import Vector
-from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID, TSVECTOR
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PGUUID, TSVECTOR
 from sqlmodel import Column, Field, Index, SQLModel, text
 
+from app.config import settings
+
+
+def embedding_column_type():
+    """Column type for chunk embeddings under the configured storage mode."""
+    if settings.embedding_storage == "halfvec":
+        return HALFVEC(settings.embedding_dimensions)
+    return Vector(settings.embedding_dimensions)
+
+
+def embedding_index_expression() -> str:
+    """HNSW index expression; ``vector`` storage indexes a halfvec cast."""
+    if settings.embedding_storage == "halfvec":
+        return "embedding halfvec_cosine_ops"
+    return f"(embedding::halfvec({settings.embedding_dimensions})) halfvec_cosine_ops"
+
 
 class Chunk(SQLModel, table=True):
     __tablename__ = "chunks"
@@ -39,7 +55,7 @@ class Chunk(SQLModel, table=True):
     content: str = Field(sa_column=Column(sa.Text, nullable=False))
     token_count: int = Field(sa_column=Column(sa.Integer, nullable=False, default=0))
     embedding: List[float] | None = Field(
-        default=None, sa_column=Column(Vector(1536))
+        default=None, sa_column=Column(embedding_column_type())
     )
     fts: str | None = Field(
         default=None,
@@ -51,11 +67,18 @@ class Chunk(SQLModel, table=True):
     metadata_: dict | None = Field(
         default=None, sa_column=Column("metadata", JSONB)
     )
+    # Users with access to the document (see app.pipeline.visibility)
+    visible_to: List[uuid.UUID] = Field(
+        default_factory=list,
+        sa_column=Column(
+            ARRAY(PGUUID(as_uuid=True)), nullable=False, server_default=text("'{}'")
+        ),
+    )
 
     __table_args__ = (
         Index(
             "chunks_embedding_idx",
-            text("(embedding::halfvec(1536)) halfvec_cosine_ops"),
+            text(embedding_index_expression()),
             postgresql_using="hnsw",
         ),
         Index(
@@ -63,4 +86,9 @@ class Chunk(SQLModel, table=True):
             "fts",
             postgresql_using="gin",
         ),
+        Index(
+            "chunks_visible_to_idx",
+            "visible_to",
+            postgresql_using="gin",
+        ),
     )
@@ -34,6 +34,8 @@ class Connector(SQLModel, table=True):
         default=None, sa_column=Column(sa.DateTime(timezone=True))
     )
     sync_cursor: dict | None = Field(default=None, sa_column=Column(JSONB))
+    # Set while a sync runs and kept if it fails; see api/ingest.py
+    sync_progress: dict | None = Field(default=None, sa_column=Column(JSONB))
     error_message: str | None = Field(default=None, sa_column=Column(sa.Text))
     config: dict | None = Field(default=None, sa_column=Column(JSONB))
 
@@ -0,0 +1,21 @@
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import BYTEA
+from sqlmodel import Column, Field, SQLModel, text
+
+
+class ContentBlob(SQLModel, table=True):
+    """zstd-compressed raw document content, keyed by the content's sha256."""
+    __tablename__ = "content_blobs"
+
+    content_hash: bytes = Field(sa_column=Column(BYTEA, primary_key=True))
+    data: bytes = Field(sa_column=Column(BYTEA, nullable=False))
+    raw_size: int = Field(sa_column=Column(sa.Integer, nullable=False))
+    created_at: datetime.datetime = Field(
+        sa_column=Column(
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    )
@@ -2,7 +2,7 @@ import datetime
 import uuid
 
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
+from sqlalchemy.dialects.postgresql import BYTEA, JSONB, UUID as PGUUID
 from sqlmodel import Column, Field, SQLModel, text
 
 
@@ -41,6 +41,7 @@ class Document(SQLModel, table=True):
     author_name: str | None = Field(default=None, sa_column=Column(sa.Text))
     author_email: str | None = Field(default=None, sa_column=Column(sa.Text))
     content_type: str = Field(sa_column=Column(sa.Text, nullable=False))
+    # NULL when the content was moved to content_blobs (see content_ref)
     raw_content: str | None = Field(default=None, sa_column=Column(sa.Text))
     metadata_: dict | None = Field(
         default=None, sa_column=Column("metadata", JSONB)
@@ -48,6 +49,20 @@ class Document(SQLModel, table=True):
     source_created_at: datetime.datetime | None = Field(
         default=None, sa_column=Column(sa.DateTime(timezone=True))
     )
+    # sha256 of title and raw_content; a change triggers re-indexing
+    content_hash: bytes | None = Field(default=None, sa_column=Column(BYTEA))
+    # Set while a sync is indexing the document, cleared when its chunks are
+    # committed
+    claimed_at: datetime.datetime | None = Field(
+        default=None, sa_column=Column(sa.DateTime(timezone=True))
+    )
+    # Key of the compressed raw content in content_blobs, if offloaded
+    content_ref: bytes | None = Field(
+        default=None,
+        sa_column=Column(
+            BYTEA, sa.ForeignKey("content_blobs.content_hash"), index=True
+        ),
+    )
 
     __table_args__ = (
         sa.UniqueConstraint(
@@ -0,0 +1,35 @@
+import datetime
+from typing import List
+
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import BYTEA
+from sqlmodel import Column, Field, Index, SQLModel, text
+
+
+class EmbeddingCache(SQLModel, table=True):
+    """Embeddings keyed by content hash, shared across documents and users."""
+    __tablename__ = "embedding_cache"
+
+    text_hash: bytes = Field(sa_column=Column(BYTEA, primary_key=True))
+    model: str = Field(sa_column=Column(sa.Text, primary_key=True))
+    dimensions: int = Field(sa_column=Column(sa.Integer, primary_key=True))
+    embedding: List[float] = Field(sa_column=Column(Vector(), nullable=False))
+    created_at: datetime.datetime = Field(
+        sa_column=Column(
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    )
+    last_used_at: datetime.datetime = Field(
+        sa_column=Column(
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    )
+
+    __table_args__ = (
+        Index("ix_embedding_cache_last_used", "last_used_at"),
+    )
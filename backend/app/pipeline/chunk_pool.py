@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.pipeline.chunker import chunk_structured
+from app.services.tokenizer import warm_up
+
+logger = logging.getLogger("uvicorn.error")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _init_worker() -> None:
+    """Load the BPE ranks once per worker so tasks never pay for it."""
+    warm_up()
+
+
+def get_chunk_pool() -> ProcessPoolExecutor | None:
+    """Return the shared chunking pool, or None when it is disabled."""
+    global _pool
+    if settings.chunk_pool_workers <= 0:
+        return None
+    if _pool is None:
+        # spawn, not fork: forking a process that runs an event loop and
+        # a DB pool duplicates their sockets and locks into every worker.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.chunk_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        logger.info(f"Started chunking pool with {settings.chunk_pool_workers} workers")
+    return _pool
+
+
+def shutdown_chunk_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def chunk_document(text: str, content_type: str) -> list[dict]:
+    """Chunk one document, in the process pool if it is large.
+
+    Texts of at least ``settings.chunk_pool_min_chars`` go to the pool;
+    smaller ones are chunked inline, since pickling them would cost more
+    than tokenizing them.
+    """
+    pool = get_chunk_pool()
+    if pool is not None and len(text) >= settings.chunk_pool_min_chars:
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, chunk_structured, text, content_type
+        )
+    chunks = chunk_structured(text, content_type)
+    # Give other requests on this worker a turn between documents
+    await asyncio.sleep(0)
+    return chunks
@@ -1,5 +1,33 @@
+import re
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from itertools import accumulate, islice
+
 import tiktoken
 
+from app.services.tokenizer import get_encoding
+
+# UTF-8 continuation bytes (0b10xxxxxx); every other byte starts a character.
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+# Encoding name -> number of characters each token id starts
+_token_chars: dict[str, list[int]] = {}
+
+
+def _chars_per_token(enc: tiktoken.Encoding) -> list[int]:
+    """Characters each token starts (its UTF-8 lead bytes), by token id."""
+    table = _token_chars.get(enc.name)
+    if table is None:
+        table = []
+        for token in range(enc.n_vocab):
+            try:
+                token_bytes = enc.decode_single_token_bytes(token)
+            except KeyError:  # unassigned id
+                token_bytes = b""
+            table.append(len(token_bytes.translate(None, _CONTINUATION_BYTES)))
+        _token_chars[enc.name] = table
+    return table
+
 
 def chunk_text(
     text: str,
@@ -11,7 +39,7 @@ def chunk_text(
 
     Returns list of {content, token_count, chunk_index}.
     """
-    enc = tiktoken.get_encoding(model)
+    enc = get_encoding(model)
     tokens = enc.encode(text)
 
     if len(tokens) <= max_tokens:
@@ -39,3 +67,389 @@ def chunk_text(
             break
 
     return chunks
+
+
+def _token_windows(
+    n_tokens: int, max_tokens: int, overlap_tokens: int
+) -> list[tuple[int, int]]:
+    """Token index ranges of the overlapping windows used by chunk_text."""
+    windows = []
+    start = 0
+    while start < n_tokens:
+        windows.append((start, min(start + max_tokens, n_tokens)))
+        start += max_tokens - overlap_tokens
+    return windows
+
+
+def _boundary_char_offsets(
+    enc: tiktoken.Encoding, tokens: list[int], boundaries: list[int]
+) -> dict[int, tuple[int, bool]]:
+    """Map sorted token boundaries to (char_offset, splits_char).
+
+    Each token span between consecutive boundaries is decoded to bytes exactly
+    once and its UTF-8 lead bytes are counted, so no text is decoded twice and
+    no intermediate strings are built. ``splits_char`` is set when a boundary
+    falls inside a multi-byte character; the offset then points just past it.
+    """
+    offsets = {boundaries[0]: (0, False)}
+    char_pos = 0
+    for a, b in zip(boundaries, boundaries[1:]):
+        seg = enc.decode_bytes(tokens[a:b])
+        if seg and 0x80 <= seg[0] < 0xC0:
+            offsets[a] = (offsets[a][0], True)
+        char_pos += len(seg.translate(None, _CONTINUATION_BYTES))
+        offsets[b] = (char_pos, False)
+    return offsets
+
+
+def _fit_span(
+    enc: tiktoken.Encoding, text: str, start: int, end: int, max_tokens: int
+) -> tuple[int, int]:
+    """Re-count ``text[start:end]``; while it is over ``max_tokens``, pull
+    ``end`` back to the last whole character of its first ``max_tokens``
+    tokens. Returns (end, token_count)."""
+    while True:
+        tokens = enc.encode_ordinary(text[start:end])
+        if len(tokens) <= max_tokens:
+            return end, len(tokens)
+        head = enc.decode_bytes(tokens[:max_tokens]).decode("utf-8", errors="ignore")
+        end = start + len(head)
+
+
+def _window_spans(
+    enc: tiktoken.Encoding,
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> list[tuple[int, int, int]]:
+    """Token windows over ``text`` as (char_start, char_end, token_count)."""
+    tokens = enc.encode_ordinary(text)
+
+    if len(tokens) <= max_tokens:
+        return [(0, len(text), len(tokens))]
+
+    windows = _token_windows(len(tokens), max_tokens, overlap_tokens)
+    boundaries = sorted({b for window in windows for b in window})
+    offsets = _boundary_char_offsets(enc, tokens, boundaries)
+
+    spans = []
+    for start, end in windows:
+        char_start, splits_start = offsets[start]
+        char_end, splits_end = offsets[end]
+        if splits_start:
+            char_start -= 1
+        if splits_start or splits_end:
+            # The whole characters can take more tokens than the window held
+            char_end, token_count = _fit_span(enc, text, char_start, char_end, max_tokens)
+        else:
+            token_count = end - start
+        spans.append((char_start, char_end, token_count))
+    return spans
+
+
+def chunk_text_with_offsets(
+    text: str,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    model: str = "cl100k_base",
+) -> list[dict]:
+    """Token-window chunking that slices the source string instead of decoding.
+
+    Produces the same windows as chunk_text, but encodes once and cuts each
+    chunk straight out of ``text`` using character offsets. A window edge that
+    lands inside a multi-byte character is widened to include the whole
+    character rather than emitting U+FFFD; such windows are re-counted, and
+    cut back to whole characters within ``max_tokens`` if they grew past it.
+
+    Returns list of {content, token_count, chunk_index, char_start, char_end}.
+    """
+    enc = get_encoding(model)
+    return [
+        {
+            "content": text[char_start:char_end],
+            "token_count": token_count,
+            "chunk_index": chunk_index,
+            "char_start": char_start,
+            "char_end": char_end,
+        }
+        for chunk_index, (char_start, char_end, token_count) in enumerate(
+            _window_spans(enc, text, max_tokens, overlap_tokens)
+        )
+    ]
+
+
+# Structural boundaries, coarsest first. A match's end is where a new piece
+# starts, so zero-width patterns split before the line they look ahead to.
+_HEADING = re.compile(r"^(?=#{1,6}[ \t])", re.MULTILINE)
+_PARAGRAPH = re.compile(r"\n[ \t]*\n+")
+_LIST_ITEM = re.compile(r"^(?=[ \t]*(?:[-*+]|\d+[.)])[ \t])", re.MULTILINE)
+_LINE = re.compile(r"\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\s+")
+
+# Fenced code blocks are never cut at these levels, only at line level and below
+_BLOCK_SEPARATORS = (_HEADING, _PARAGRAPH, _LIST_ITEM)
+_FENCE = re.compile(
+    r"^[ \t]*(`{3,}|~{3,})[^\n]*\n.*?^[ \t]*\1[ \t]*$", re.MULTILINE | re.DOTALL
+)
+
+_MARKDOWN_SEPARATORS = (_HEADING, _PARAGRAPH, _LIST_ITEM, _LINE, _SENTENCE, _WORD)
+_PLAIN_SEPARATORS = (_PARAGRAPH, _LINE, _SENTENCE, _WORD)
+
+SEPARATORS_BY_CONTENT_TYPE = {
+    "issue": _MARKDOWN_SEPARATORS,
+    "pr": _MARKDOWN_SEPARATORS,
+    "file": _MARKDOWN_SEPARATORS,
+    "commit": _PLAIN_SEPARATORS,
+    "message": _PLAIN_SEPARATORS,
+}
+
+
+class _StructuredSplitter:
+    """Recursive splitter over character spans of a single text."""
+
+    def __init__(
+        self,
+        enc: tiktoken.Encoding,
+        text: str,
+        separators: tuple[re.Pattern, ...],
+        max_tokens: int,
+        overlap_tokens: int,
+    ):
+        self.enc = enc
+        self.text = text
+        self.separators = separators
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        # Fences don't overlap, so their starts and ends are both sorted
+        self.fences = [m.span() for m in _FENCE.finditer(text)]
+        self.fence_starts = [a for a, _ in self.fences]
+        # Character offset of each token of the text, which is encoded once
+        # as a whole instead of once per separator level
+        chars = _chars_per_token(enc)
+        self.token_starts = [0, *accumulate(map(chars.__getitem__, enc.encode_ordinary(text)))]
+
+    def count(self, start: int, end: int) -> int:
+        return len(self.enc.encode_ordinary(self.text[start:end]))
+
+    def estimate(self, start: int, end: int) -> int:
+        """Tokens of the whole text's encoding that start in [start, end).
+
+        Encoding the span on its own can split differently at its edges, so
+        this may be a token or so off at each edge. Estimates of adjacent
+        spans add up to the estimate of their union.
+        """
+        return bisect_left(self.token_starts, end) - bisect_left(self.token_starts, start)
+
+    def windows(self, start: int, end: int) -> list[tuple[int, int, int]]:
+        """Overlapping token windows over [start, end), each re-counted and
+        shrunk if widening it to whole characters took it over max_tokens."""
+        spans = []
+        for a, b, _ in _window_spans(
+            self.enc, self.text[start:end], self.max_tokens, self.overlap_tokens
+        ):
+            b, n = _fit_span(self.enc, self.text, start + a, start + b, self.max_tokens)
+            spans.append((start + a, b, n))
+        return spans
+
+    def _in_fence(self, pos: int) -> bool:
+        i = bisect_left(self.fence_starts, pos) - 1
+        return i >= 0 and pos < self.fences[i][1]
+
+    def _cuts(self, sep: re.Pattern, start: int, end: int) -> list[int]:
+        cuts = []
+        for m in sep.finditer(self.text, start, end):
+            pos = m.end()
+            if not start < pos < end or (cuts and cuts[-1] == pos):
+                continue
+            if sep in _BLOCK_SEPARATORS and self._in_fence(pos):
+                continue
+            cuts.append(pos)
+        return cuts
+
+    def pieces(
+        self, start: int, end: int, level: int = 0, cut_level: int = 0
+    ) -> list[tuple[int, int, int, int]]:
+        """Split [start, end) into pieces of at most max_tokens.
+
+        Returns (start, end, token_count, cut_level) tuples, where cut_level is
+        the index of the separator that divided a piece from its predecessor
+        (lower means a stronger boundary). Token counts are estimates, except
+        for token windows.
+        """
+        n = self.estimate(start, end)
+        if n <= self.max_tokens:
+            return [(start, end, n, cut_level)]
+
+        for depth in range(level, len(self.separators)):
+            cuts = self._cuts(self.separators[depth], start, end)
+            if cuts:
+                break
+        else:
+            n = self.count(start, end)
+            if n <= self.max_tokens:
+                return [(start, end, n, cut_level)]
+            # No boundary left to respect: fall back to token windows
+            return [
+                (a, b, count, len(self.separators))
+                for a, b, count in self.windows(start, end)
+            ]
+
+        out = []
+        bounds = [start, *cuts, end]
+        for i, (a, b) in enumerate(zip(bounds, bounds[1:])):
+            out.extend(self.pieces(a, b, depth + 1, cut_level if i == 0 else depth))
+        return out
+
+    def merge(self, pieces: list[tuple[int, int, int, int]]) -> list[tuple[int, int]]:
+        """Greedily pack consecutive pieces into groups of at most max_tokens,
+        returned as [first, last) ranges of piece indexes.
+
+        A chunk that is already half full is closed early at the strongest
+        boundary (a heading, or a paragraph for plain text).
+        """
+        groups = []
+        first = cur_tokens = 0
+        for i, (_, _, n, cut_level) in enumerate(pieces):
+            fits = cur_tokens + n <= self.max_tokens
+            strong_break = cut_level == 0 and cur_tokens * 2 >= self.max_tokens
+            if i > first and fits and not strong_break:
+                cur_tokens += n
+                continue
+            if i > first:
+                groups.append((first, i))
+            first, cur_tokens = i, n
+        if pieces:
+            groups.append((first, len(pieces)))
+        return groups
+
+    def spans(
+        self, pieces: list[tuple[int, int, int, int]], exact: bool = False
+    ) -> list[tuple[int, int, int]]:
+        """Merged pieces as (start, end, token_count) with surrounding
+        whitespace stripped, each encoded once to count it exactly.
+
+        A group over max_tokens is packed again from exactly counted pieces
+        (``exact``), and only falls back to token windows if it still is.
+        """
+        out = []
+        for first, last in self.merge(pieces):
+            start, end = pieces[first][0], pieces[last - 1][1]
+            content = self.text[start:end]
+            stripped = content.strip()
+            if not stripped:
+                continue
+            start += len(content) - len(content.lstrip())
+            end = start + len(stripped)
+            token_count = len(self.enc.encode_ordinary(stripped))
+            if token_count <= self.max_tokens:
+                out.append((start, end, token_count))
+            elif not exact and last - first > 1:
+                out.extend(self.spans(
+                    [(a, b, self.count(a, b), level) for a, b, _, level in pieces[first:last]],
+                    exact=True,
+                ))
+            else:
+                # Merged pieces can tokenize longer than the sum of their parts
+                out.extend(self.windows(start, end))
+        return out
+
+
+def chunk_structured(
+    text: str,
+    content_type: str,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    model: str = "cl100k_base",
+) -> list[dict]:
+    """Recursive splitting on headings, paragraphs, code fences and list items.
+
+    Separators are picked by ``content_type`` (see SEPARATORS_BY_CONTENT_TYPE);
+    pieces are packed greedily up to ``max_tokens`` and only fall back to
+    overlapping token windows when no structural boundary is left. Every chunk
+    is re-counted exactly, so the ``max_tokens`` ceiling always holds.
+
+    Returns list of {content, token_count, chunk_index, char_start, char_end}.
+    """
+    enc = get_encoding(model)
+    separators = SEPARATORS_BY_CONTENT_TYPE.get(content_type, _PLAIN_SEPARATORS)
+    splitter = _StructuredSplitter(enc, text, separators, max_tokens, overlap_tokens)
+
+    spans = splitter.spans(splitter.pieces(0, len(text)))
+    if not spans:
+        return [{
+            "content": text,
+            "token_count": len(enc.encode_ordinary(text)),
+            "chunk_index": 0,
+            "char_start": 0,
+            "char_end": len(text),
+        }]
+
+    return [
+        {
+            "content": text[char_start:char_end],
+            "token_count": token_count,
+            "chunk_index": chunk_index,
+            "char_start": char_start,
+            "char_end": char_end,
+        }
+        for chunk_index, (char_start, char_end, token_count) in enumerate(spans)
+    ]
+
+
+def iter_chunks(
+    pieces: Iterable[str],
+    content_type: str,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    model: str = "cl100k_base",
+    buffer_chars: int = 200_000,
+) -> Iterator[dict]:
+    """Streaming chunk_structured over a sequence of text pieces.
+
+    Pieces (PDF pages, fixed-size slices of a huge export, ...) are buffered
+    until ``buffer_chars`` is reached; the buffer is chunked and every chunk
+    but the last is yielded, since the last one may continue in the next
+    piece. Memory is bounded by the buffer, not by the document, and offsets
+    and chunk indexes are relative to the whole stream.
+    """
+    buffer = ""
+    base = 0  # stream offset of buffer[0]
+    chunk_index = 0
+
+    def _emit(chunks: list[dict]) -> Iterator[dict]:
+        nonlocal chunk_index
+        for chunk in chunks:
+            yield {
+                **chunk,
+                "chunk_index": chunk_index,
+                "char_start": base + chunk["char_start"],
+                "char_end": base + chunk["char_end"],
+            }
+            chunk_index += 1
+
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) < buffer_chars:
+            continue
+        chunks = chunk_structured(buffer, content_type, max_tokens, overlap_tokens, model)
+        if len(chunks) < 2:
+            continue
+        yield from _emit(chunks[:-1])
+        carry = chunks[-1]["char_start"]
+        buffer = buffer[carry:]
+        base += carry
+
+    if buffer.strip():
+        yield from _emit(chunk_structured(buffer, content_type, max_tokens, overlap_tokens, model))
+
+
+def iter_text_pieces(text: str, piece_chars: int = 100_000) -> Iterator[str]:
+    """Slice a large string into pieces for iter_chunks without copying it whole."""
+    for start in range(0, len(text), piece_chars):
+        yield text[start : start + piece_chars]
+
+
+def next_window(chunks: Iterator[dict], size: int) -> list[dict]:
+    """Pull up to ``size`` chunks from a chunk stream (empty when exhausted)."""
+    return list(islice(chunks, size))
@@ -0,0 +1,260 @@
+"""Optional out-of-line store for raw document content.
+
+With ``content_store = "db"``, raw content of at least
+``content_store_min_chars`` characters is zstd-compressed into
+``content_blobs``, keyed by its sha256, and ``documents.raw_content`` is
+left NULL. Identical contents are stored once. Reads are lazy: only code
+that needs the full text (overlap detection previews) calls ``read``.
+
+Existing inline content is moved with
+``python -m app.pipeline.content_store`` (``--restore`` moves it back).
+
+Optional dependency: the ``content-store`` extra (``pip install -e '.[content-store]'``).
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlmodel import select
+
+from app.config import settings
+from app.database import get_session_ctx
+from app.models.content_blob import ContentBlob
+from app.models.document import Document
+
+logger = logging.getLogger("uvicorn.error")
+
+# Batches with more raw content than this are compressed in a worker thread
+THREAD_MIN_BYTES = 1_000_000
+# Blobs deleted per sweep transaction
+SWEEP_BATCH_SIZE = 1000
+
+stats = {
+    "stored": 0,
+    "raw_bytes": 0,
+    "compressed_bytes": 0,
+    "reads": 0,
+    "missing": 0,
+    "swept": 0,
+}
+
+
+def enabled() -> bool:
+    return settings.content_store == "db"
+
+
+def check() -> None:
+    """Fail at startup rather than in the middle of a sync if the store is
+    enabled without its dependency."""
+    if enabled() and importlib.util.find_spec("zstandard") is None:
+        raise RuntimeError(
+            "content_store 'db' needs zstandard: pip install -e '.[content-store]'"
+        )
+
+
+def metrics() -> dict:
+    raw = stats["raw_bytes"]
+    return {**stats, "ratio": stats["compressed_bytes"] / raw if raw else 0.0}
+
+
+def _compress(data: bytes) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=settings.content_store_zstd_level).compress(data)
+
+
+def _decompress(data: bytes) -> str:
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompress(data).decode()
+
+
+async def offload(db: AsyncSession, docs: list[Document]) -> None:
+    """Move large raw content of unsaved (or about to be updated) documents
+    into content_blobs, setting content_ref and clearing raw_content.
+    Blobs are inserted on ``db``, so they commit with the documents.
+
+    Blobs that already exist are row-locked by the no-op update until then,
+    so ``sweep`` can't delete one that has just been referenced again."""
+    if not enabled():
+        return
+    raw: dict[bytes, bytes] = {}
+    for doc in docs:
+        if not doc.raw_content or len(doc.raw_content) < settings.content_store_min_chars:
+            continue
+        data = doc.raw_content.encode()
+        key = hashlib.sha256(data).digest()
+        raw[key] = data
+        doc.content_ref = key
+        doc.raw_content = None
+    if not raw:
+        return
+
+    def compress_all() -> dict[bytes, tuple[bytes, int]]:
+        return {key: (_compress(data), len(data)) for key, data in raw.items()}
+
+    if sum(map(len, raw.values())) >= THREAD_MIN_BYTES:
+        blobs = await asyncio.to_thread(compress_all)
+    else:
+        blobs = compress_all()
+
+    stmt = pg_insert(ContentBlob).values([
+        {"content_hash": key, "data": data, "raw_size": raw_size}
+        for key, (data, raw_size) in blobs.items()
+    ])
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["content_hash"],
+            set_={"content_hash": stmt.excluded.content_hash},
+        )
+    )
+    stats["stored"] += len(blobs)
+    stats["raw_bytes"] += sum(raw_size for _, raw_size in blobs.values())
+    stats["compressed_bytes"] += sum(len(data) for data, _ in blobs.values())
+
+
+async def read(db: AsyncSession, document_id: uuid.UUID) -> str | None:
+    """A document's raw content, from its row or its blob, in one query.
+    Callers load Document with raw_content deferred and read it here only
+    when they need it."""
+    row = (
+        await db.execute(
+            select(Document.raw_content, Document.content_ref, ContentBlob.data)
+            .outerjoin(ContentBlob, ContentBlob.content_hash == Document.content_ref)
+            .where(Document.id == document_id)
+        )
+    ).one_or_none()
+    if row is None or row.content_ref is None:
+        return row.raw_content if row else None
+    stats["reads"] += 1
+    if row.data is None:
+        stats["missing"] += 1
+        logger.warning(f"Content blob missing for document {document_id}")
+        return None
+    return await asyncio.to_thread(_decompress, row.data)
+
+
+async def sweep(batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """Delete blobs no document refers to anymore (documents deleted or
+    re-synced with new content), ``batch_size`` per transaction. Blobs a
+    running sync has locked in ``offload`` are skipped until the next
+    sweep. Returns the number of blobs removed."""
+    orphans = (
+        select(ContentBlob.content_hash)
+        .where(~sa.exists().where(Document.content_ref == ContentBlob.content_hash))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("orphans")
+    )
+    removed = 0
+    while True:
+        async with get_session_ctx() as db:
+            try:
+                result = await db.execute(
+                    sa.delete(ContentBlob).where(
+                        ContentBlob.content_hash.in_(select(orphans.c.content_hash))
+                    )
+                )
+                await db.commit()
+            except sa.exc.IntegrityError:
+                # A blob was referenced again by a sync that committed while
+                # this batch was being selected; the next sweep retries
+                logger.warning("Content store sweep: blob referenced again, stopping")
+                break
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    stats["swept"] += removed
+    logger.info(f"Content store sweep: removed {removed} blobs")
+    return removed
+
+
+async def offload_existing(batch_size: int = 200) -> int:
+    """Move inline raw content of existing documents into the store, in id
+    order, ``batch_size`` documents per transaction. Returns the count."""
+    if not enabled():
+        raise RuntimeError('set CONNECTIVE_CONTENT_STORE="db" first')
+    check()
+    done = 0
+    last_id = uuid.UUID(int=0)
+
+    while True:
+        async with get_session_ctx() as db:
+            docs = (
+                await db.execute(
+                    select(Document)
+                    .options(load_only(Document.id, Document.raw_content, Document.content_ref))
+                    .where(
+                        Document.id > last_id,
+                        sa.func.length(Document.raw_content)
+                        >= settings.content_store_min_chars,
+                    )
+                    .order_by(Document.id)
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+            if not docs:
+                break
+
+            await offload(db, list(docs))
+            await db.commit()
+
+        done += len(docs)
+        last_id = docs[-1].id
+        logger.info(f"Offloaded {done} documents")
+
+    return done
+
+
+async def restore_inline(batch_size: int = 200) -> int:
+    """Put offloaded content back into documents.raw_content (before
+    disabling the store or downgrading migration 009). Returns the count."""
+    done = 0
+    while True:
+        async with get_session_ctx() as db:
+            rows = (
+                await db.execute(
+                    select(Document.id, ContentBlob.data)
+                    .join(ContentBlob, ContentBlob.content_hash == Document.content_ref)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            await db.execute(
+                sa.update(Document),
+                [
+                    {"id": row.id, "raw_content": _decompress(row.data), "content_ref": None}
+                    for row in rows
+                ],
+            )
+            await db.commit()
+        done += len(rows)
+        logger.info(f"Restored {done} documents")
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move raw content into or out of the content store")
+    parser.add_argument("--restore", action="store_true", help="move content back inline")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.restore:
+        count = asyncio.run(restore_inline(args.batch_size))
+        print(f"Restored {count} documents")
+    else:
+        count = asyncio.run(offload_existing(args.batch_size))
+        print(f"Offloaded {count} documents")
+
+
+if __name__ == "__main__":
+    main()
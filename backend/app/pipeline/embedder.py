@@ -1,40 +1,65 @@
 import logging
 
 from app.config import settings
-from app.services.openai_client import get_openai, with_backoff
+from app.embeddings import get_embedding_backend
+from app.pipeline import embedding_cache, query_cache
 
 logger = logging.getLogger("uvicorn.error")
 
-BATCH_SIZE = 100
 
+async def _embed_uncached(
+    texts: list[str], token_counts: list[int] | None = None
+) -> list[list[float]]:
+    """Embed texts with the configured backend."""
+    return await get_embedding_backend().embed(texts, token_counts)
 
-async def embed_texts(texts: list[str]) -> list[list[float]]:
-    """Embed a list of texts using OpenAI, batching at 100 per request."""
-    client = get_openai()
-    all_embeddings = []
 
-    for i in range(0, len(texts), BATCH_SIZE):
-        batch = texts[i : i + BATCH_SIZE]
-        logger.info(f"Embedding batch {i // BATCH_SIZE + 1} ({len(batch)} texts)")
+async def embed_texts(
+    texts: list[str], token_counts: list[int] | None = None
+) -> list[list[float]]:
+    """Embed a list of texts, reusing cached vectors for identical content.
 
-        response = await with_backoff(
-            client.embeddings.create,
-            input=batch,
-            model=settings.embedding_model,
-        )
+    Texts are keyed by the hash of their normalized form, so repeated chunks
+    within the call and across syncs are embedded once. Cache errors are
+    logged and treated as misses. ``token_counts``, when the caller already
+    has them (chunks do), saves re-tokenizing for batch packing.
+    """
+    if not settings.embedding_cache_enabled or not texts:
+        return await _embed_uncached(texts, token_counts)
 
-        batch_embeddings = [item.embedding for item in response.data]
-        all_embeddings.extend(batch_embeddings)
+    hashes = [embedding_cache.text_hash(t) for t in texts]
+    try:
+        vectors = await embedding_cache.lookup(list(set(hashes)))
+    except Exception:
+        logger.exception("Embedding cache lookup failed")
+        embedding_cache.stats["errors"] += 1
+        vectors = {}
 
-    return all_embeddings
+    missing: dict[bytes, int] = {}
+    for i, h in enumerate(hashes):
+        if h not in vectors:
+            missing.setdefault(h, i)
+
+    embedding_cache.stats["hits"] += len(texts) - len(missing)
+    embedding_cache.stats["misses"] += len(missing)
+
+    if missing:
+        fresh = dict(zip(missing, await _embed_uncached(
+            [texts[i] for i in missing.values()],
+            [token_counts[i] for i in missing.values()] if token_counts else None,
+        )))
+        try:
+            await embedding_cache.store(fresh)
+        except Exception:
+            logger.exception("Embedding cache store failed")
+            embedding_cache.stats["errors"] += 1
+        vectors.update(fresh)
+
+    return [vectors[h] for h in hashes]
 
 
 async def embed_query(query: str) -> list[float]:
-    """Embed a single query string."""
-    client = get_openai()
-    response = await with_backoff(
-        client.embeddings.create,
-        input=[query],
-        model=settings.embedding_model,
+    """Embed a single query string, served from the query cache when possible."""
+    return await query_cache.get_or_embed(
+        query, get_embedding_backend().embed_query
     )
-    return response.data[0].embedding
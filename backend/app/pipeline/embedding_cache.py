@@ -0,0 +1,146 @@
+import datetime
+import hashlib
+import logging
+import unicodedata
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, BYTEA, insert as pg_insert
+from sqlmodel import select
+
+from app.config import settings
+from app.database import get_session_ctx
+from app.embeddings import get_embedding_backend
+from app.models.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger("uvicorn.error")
+
+# Rows per INSERT, well under asyncpg's 32767 bind parameter limit
+STORE_BATCH_SIZE = 1000
+
+# Hits refresh last_used_at at most this often, so reads don't turn into a
+# write per cached chunk
+TOUCH_INTERVAL = datetime.timedelta(hours=6)
+
+stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "errors": 0}
+
+
+def normalize(text: str) -> str:
+    """Canonical form used for cache keys: NFC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(normalize(text).encode()).digest()
+
+
+def metrics() -> dict:
+    lookups = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
+
+
+def _key_filter(hashes: list[bytes]):
+    backend = get_embedding_backend()
+    return (
+        EmbeddingCache.model == backend.model,
+        EmbeddingCache.dimensions == backend.dimensions,
+        EmbeddingCache.text_hash == sa.any_(
+            sa.bindparam("text_hashes", hashes, type_=ARRAY(BYTEA))
+        ),
+    )
+
+
+async def lookup(hashes: list[bytes]) -> dict[bytes, list[float]]:
+    """Fetch cached embeddings for the given hashes in one query."""
+    if not hashes:
+        return {}
+
+    async with get_session_ctx() as db:
+        result = await db.execute(
+            select(EmbeddingCache.text_hash, EmbeddingCache.embedding).where(
+                *_key_filter(hashes)
+            )
+        )
+        # pgvector returns lists or numpy arrays depending on its version
+        found = {row.text_hash: list(map(float, row.embedding)) for row in result}
+
+        if found:
+            await db.execute(
+                sa.update(EmbeddingCache)
+                .where(
+                    *_key_filter(list(found)),
+                    EmbeddingCache.last_used_at < sa.func.now() - TOUCH_INTERVAL,
+                )
+                .values(last_used_at=sa.func.now())
+            )
+            await db.commit()
+
+    return found
+
+
+async def store(embeddings: dict[bytes, list[float]]) -> None:
+    """Insert new cache entries; rows another worker added first are kept."""
+    items = list(embeddings.items())
+    backend = get_embedding_backend()
+    async with get_session_ctx() as db:
+        for i in range(0, len(items), STORE_BATCH_SIZE):
+            batch = items[i : i + STORE_BATCH_SIZE]
+            await db.execute(
+                pg_insert(EmbeddingCache)
+                .values([
+                    {
+                        "text_hash": h,
+                        "model": backend.model,
+                        "dimensions": backend.dimensions,
+                        "embedding": embedding,
+                    }
+                    for h, embedding in batch
+                ])
+                .on_conflict_do_nothing()
+            )
+        await db.commit()
+    stats["stored"] += len(items)
+
+
+async def evict(
+    max_age_days: int | None = None, max_rows: int | None = None
+) -> int:
+    """Drop entries unused for ``max_age_days``, then the least recently used
+    ones beyond ``max_rows``. Returns the number of rows removed."""
+    max_age_days = max_age_days or settings.embedding_cache_max_age_days
+    max_rows = max_rows or settings.embedding_cache_max_rows
+    cutoff = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=max_age_days)
+
+    async with get_session_ctx() as db:
+        result = await db.execute(
+            sa.delete(EmbeddingCache).where(EmbeddingCache.last_used_at < cutoff)
+        )
+        removed = result.rowcount
+
+        total = (
+            await db.execute(select(sa.func.count()).select_from(EmbeddingCache))
+        ).scalar_one()
+        if total > max_rows:
+            oldest = (
+                select(
+                    EmbeddingCache.text_hash,
+                    EmbeddingCache.model,
+                    EmbeddingCache.dimensions,
+                )
+                .order_by(EmbeddingCache.last_used_at)
+                .limit(total - max_rows)
+            )
+            result = await db.execute(
+                sa.delete(EmbeddingCache).where(
+                    sa.tuple_(
+                        EmbeddingCache.text_hash,
+                        EmbeddingCache.model,
+                        EmbeddingCache.dimensions,
+                    ).in_(oldest)
+                )
+            )
+            removed += result.rowcount
+        await db.commit()
+
+    stats["evicted"] += removed
+    logger.info(f"Embedding cache eviction: removed {removed} entries")
+    return removed
@@ -1,32 +1,388 @@
+import asyncio
 import datetime
+import hashlib
+import itertools
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Callable
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from app.config import settings
+from app.database import get_session_ctx
 from app.models.chunk import Chunk
 from app.models.document import Document
 from app.models.document_access import DocumentAccess
-from app.pipeline.chunker import chunk_text
+from app.pipeline import content_store, visibility
+from app.pipeline.chunk_pool import chunk_document
+from app.pipeline.chunker import iter_chunks, iter_text_pieces, next_window
 from app.pipeline.embedder import embed_texts
+from app.pipeline.pg_copy import copy_chunks
+from app.pipeline.stages import Stage, feed
 
 logger = logging.getLogger("uvicorn.error")
 
 
-async def _ensure_access(
-    db: AsyncSession, user_id: uuid.UUID, document_id: uuid.UUID
-):
-    """Add a document_access entry if one doesn't already exist."""
+async def _grant_access(
+    db: AsyncSession, user_id: uuid.UUID, document_ids: list[uuid.UUID]
+) -> list[uuid.UUID]:
+    """Grant the user access to all documents in one statement, keeping
+    entries that already exist. Returns the documents newly granted, whose
+    chunks need ``visibility.sync`` once this commits."""
+    if not document_ids:
+        return []
     result = await db.execute(
-        select(DocumentAccess).where(
-            DocumentAccess.user_id == user_id,
-            DocumentAccess.document_id == document_id,
+        pg_insert(DocumentAccess)
+        .from_select(
+            ["user_id", "document_id"],
+            sa.select(
+                sa.literal(user_id, PGUUID(as_uuid=True)),
+                sa.func.unnest(
+                    sa.bindparam(
+                        "document_ids", document_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                    )
+                ),
+            ),
+        )
+        .on_conflict_do_nothing(constraint="uq_document_access_user_doc")
+        .returning(DocumentAccess.document_id)
+    )
+    return list(result.scalars())
+
+
+def _parse_source_created_at(value) -> datetime.datetime | None:
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value or None
+
+
+def _content_hash(doc_data: dict) -> bytes:
+    """Fingerprint of what a document's chunks are built from. Migration 006
+    computes the same value in SQL; keep the two in sync."""
+    text = f"{doc_data.get('title') or ''}\n{doc_data.get('raw_content') or ''}"
+    return hashlib.sha256(text.encode()).digest()
+
+
+async def _existing_documents(
+    db: AsyncSession, provider: str, external_ids: list[str]
+) -> dict[str, sa.Row]:
+    """Map the given external IDs that are already indexed to (id, user_id,
+    content_hash, claimed_at) rows, in one query."""
+    result = await db.execute(
+        select(
+            Document.external_id,
+            Document.id,
+            Document.user_id,
+            Document.content_hash,
+            Document.claimed_at,
+        ).where(
+            Document.provider == provider,
+            Document.external_id == sa.any_(
+                sa.bindparam(
+                    "external_ids", list(set(external_ids)), type_=ARRAY(sa.Text)
+                )
+            ),
+        )
+    )
+    return {row.external_id: row for row in result}
+
+
+def _new_document(
+    user_id: uuid.UUID, connector_id: uuid.UUID, provider: str, doc_data: dict
+) -> Document:
+    return Document(
+        user_id=user_id,
+        connector_id=connector_id,
+        provider=provider,
+        external_id=doc_data["external_id"],
+        title=doc_data.get("title"),
+        url=doc_data.get("url"),
+        author_name=doc_data.get("author_name"),
+        author_email=doc_data.get("author_email"),
+        content_type=doc_data["content_type"],
+        raw_content=doc_data.get("raw_content"),
+        metadata_=doc_data.get("metadata"),
+        source_created_at=_parse_source_created_at(doc_data.get("source_created_at")),
+        content_hash=_content_hash(doc_data),
+    )
+
+
+def _claimable():
+    """Unclaimed, or claimed longer than ingest_claim_timeout_minutes ago."""
+    return sa.or_(
+        Document.claimed_at.is_(None),
+        Document.claimed_at
+        < sa.func.now() - datetime.timedelta(minutes=settings.ingest_claim_timeout_minutes),
+    )
+
+
+async def _claim_documents(
+    user_id: uuid.UUID,
+    provider: str,
+    new: list[Document],
+    existing_ids: list[uuid.UUID],
+) -> set[uuid.UUID]:
+    """Claim documents for indexing; returns the ids this sync now owns.
+
+    New documents are inserted with ``ON CONFLICT DO NOTHING RETURNING``.
+    Those another sync inserted first are not returned, and the user is
+    granted access to them instead. Existing documents (edited upstream, or
+    left with an abandoned claim) are claimed by a conditional UPDATE. This
+    runs in a short transaction of its own, so concurrent syncs see the
+    claims at once rather than when this sync commits its next batch.
+    """
+    claimed: set[uuid.UUID] = set()
+    granted: list[uuid.UUID] = []
+    async with get_session_ctx() as claim_db:
+        if new:
+            await content_store.offload(claim_db, new)
+            now = datetime.datetime.now(datetime.UTC)
+            # Same lock order as any concurrent insert of overlapping documents
+            new = sorted(new, key=lambda doc: doc.external_id)
+            result = await claim_db.execute(
+                pg_insert(Document)
+                .on_conflict_do_nothing(constraint="uq_documents_provider_external")
+                .returning(Document.id),
+                [{**doc.model_dump(), "claimed_at": now} for doc in new],
+            )
+            claimed.update(result.scalars())
+            taken = await _existing_documents(
+                claim_db, provider, [doc.external_id for doc in new if doc.id not in claimed]
+            ) if len(claimed) < len(new) else {}
+            granted = await _grant_access(
+                claim_db, user_id, [*claimed, *(row.id for row in taken.values())]
+            )
+        if existing_ids:
+            result = await claim_db.execute(
+                sa.update(Document)
+                .where(
+                    Document.id == sa.any_(
+                        sa.bindparam(
+                            "document_ids", existing_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                        )
+                    ),
+                    _claimable(),
+                )
+                .values(claimed_at=sa.func.now())
+                .returning(Document.id)
+                .execution_options(synchronize_session=False)
+            )
+            claimed.update(result.scalars())
+        await claim_db.commit()
+    # Documents another sync took may have chunks already
+    await visibility.sync(granted)
+    return claimed
+
+
+async def _release_claims(db: AsyncSession, document_ids: list[uuid.UUID]) -> None:
+    """Mark documents as indexed; takes effect when ``db`` commits."""
+    if not document_ids:
+        return
+    await db.execute(
+        sa.update(Document)
+        .where(
+            Document.id == sa.any_(
+                sa.bindparam(
+                    "document_ids", document_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                )
+            )
+        )
+        .values(claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _abandon_claims(document_ids: set[uuid.UUID]) -> None:
+    """After a failed sync, expire the claims it still holds so that the
+    next sync (this user's or another's) can take them over right away."""
+    if not document_ids:
+        return
+    try:
+        async with get_session_ctx() as claim_db:
+            await claim_db.execute(
+                sa.update(Document)
+                .where(
+                    Document.id == sa.any_(
+                        sa.bindparam(
+                            "document_ids",
+                            list(document_ids),
+                            type_=ARRAY(PGUUID(as_uuid=True)),
+                        )
+                    ),
+                    Document.claimed_at.is_not(None),
+                )
+                .values(claimed_at=sa.text("'-infinity'::timestamptz"))
+                .execution_options(synchronize_session=False)
+            )
+            await claim_db.commit()
+    except Exception:
+        logger.exception("Failed to release document claims")
+
+
+async def _chunk_hashes(
+    db: AsyncSession, document_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, dict[str, list[uuid.UUID]]]:
+    """Current chunks of the given documents as {document_id: {md5 of
+    content: [chunk ids]}}, without loading content or embeddings."""
+    hashes: dict[uuid.UUID, dict[str, list[uuid.UUID]]] = {
+        doc_id: {} for doc_id in document_ids
+    }
+    if not document_ids:
+        return hashes
+    result = await db.execute(
+        select(Chunk.document_id, Chunk.id, sa.func.md5(Chunk.content)).where(
+            Chunk.document_id == sa.any_(
+                sa.bindparam(
+                    "document_ids", document_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                )
+            )
+        )
+    )
+    for document_id, chunk_id, digest in result:
+        hashes[document_id].setdefault(digest, []).append(chunk_id)
+    return hashes
+
+
+def _diff_chunks(
+    chunks: list[dict], previous: dict[str, list[uuid.UUID]]
+) -> tuple[list[dict], list[tuple[uuid.UUID, int]], list[uuid.UUID]]:
+    """Match re-chunked content against a document's current chunks.
+
+    Returns (chunks that need embedding, [(kept chunk id, its new chunk)],
+    ids of chunks that no longer exist). ``previous`` is consumed.
+    """
+    changed, kept = [], []
+    for chunk_data in chunks:
+        ids = previous.get(hashlib.md5(chunk_data["content"].encode()).hexdigest())
+        if ids:
+            kept.append((ids.pop(), chunk_data))
+        else:
+            changed.append(chunk_data)
+    stale = [chunk_id for ids in previous.values() for chunk_id in ids]
+    return changed, kept, stale
+
+
+async def _update_documents(db: AsyncSession, docs: list[Document]) -> None:
+    """Write edited documents' new content over their existing rows."""
+    if not docs:
+        return
+    await db.execute(
+        sa.update(Document),
+        [
+            {
+                "id": doc.id,
+                "title": doc.title,
+                "url": doc.url,
+                "author_name": doc.author_name,
+                "author_email": doc.author_email,
+                "raw_content": doc.raw_content,
+                "content_ref": doc.content_ref,
+                "metadata_": doc.metadata_,
+                "content_hash": doc.content_hash,
+            }
+            for doc in docs
+        ],
+    )
+
+
+def _chunk_metadata(chunk_data: dict) -> dict | None:
+    """Chunk-level metadata: the chunk's character span in the document.
+    Document-level fields (title, url, author, ...) live on the document
+    and are joined in at query time."""
+    if "char_start" not in chunk_data:
+        return None
+    return {"char_start": chunk_data["char_start"], "char_end": chunk_data["char_end"]}
+
+
+def _chunk_rows(
+    document_id: uuid.UUID,
+    user_id: uuid.UUID,
+    chunks: list[dict],
+    embeddings: list[list[float]],
+    visible_to: list[uuid.UUID],
+) -> list[dict]:
+    return [
+        {
+            "document_id": document_id,
+            "user_id": user_id,
+            "chunk_index": chunk_data["chunk_index"],
+            "content": chunk_data["content"],
+            "token_count": chunk_data["token_count"],
+            "embedding": embedding,
+            "metadata": _chunk_metadata(chunk_data),
+            "visible_to": visible_to,
+        }
+        for chunk_data, embedding in zip(chunks, embeddings)
+    ]
+
+
+async def _write_chunks(db: AsyncSession, rows: list[dict]) -> list[Chunk]:
+    """Store chunk rows: binary COPY for large batches, ORM inserts otherwise.
+    Returns the ORM objects added, if any."""
+    if len(rows) >= settings.chunk_copy_min_rows:
+        await copy_chunks(db, rows)
+        return []
+    chunks = [
+        Chunk(
+            document_id=row["document_id"],
+            user_id=row["user_id"],
+            chunk_index=row["chunk_index"],
+            content=row["content"],
+            token_count=row["token_count"],
+            embedding=row["embedding"],
+            metadata_=row["metadata"],
+            visible_to=row["visible_to"],
         )
+        for row in rows
+    ]
+    db.add_all(chunks)
+    return chunks
+
+
+async def _index_streamed(
+    db: AsyncSession,
+    doc: Document,
+    doc_data: dict,
+    user_id: uuid.UUID,
+    header: str,
+) -> list[list[float]]:
+    """Chunk, embed and store a huge document one bounded window at a time.
+
+    Only the window being embedded is held in memory; each one is flushed
+    before the next is chunked. Returns the first window's embeddings, which
+    is what overlap detection gets for streamed documents.
+    """
+    visible_to = (await visibility.access_lists(db, [doc.id])).get(doc.id, [])
+    stream = iter_chunks(
+        itertools.chain(
+            [f"{header}\n\n"], iter_text_pieces(doc_data.get("raw_content") or "")
+        ),
+        doc_data["content_type"],
     )
-    if not result.scalar_one_or_none():
-        db.add(DocumentAccess(user_id=user_id, document_id=document_id))
+    first_embeddings: list[list[float]] = []
+
+    while window := await asyncio.to_thread(
+        next_window, stream, settings.chunk_stream_window
+    ):
+        embeddings = await embed_texts(
+            [c["content"] for c in window], [c["token_count"] for c in window]
+        )
+        await _write_chunks(
+            db, _chunk_rows(doc.id, user_id, window, embeddings, visible_to)
+        )
+        await db.flush()
+        if not first_embeddings:
+            first_embeddings = embeddings
+
+    return first_embeddings
+
+
+async def _single_batch(documents: list[dict]) -> AsyncIterator[list[dict]]:
+    yield documents
 
 
 async def index_documents(
@@ -34,120 +390,284 @@ async def index_documents(
     user_id: uuid.UUID,
     connector_id: uuid.UUID,
     provider: str,
-    documents: list[dict],
+    documents: list[dict] | AsyncIterable[list[dict]],
+    on_commit: Callable[[dict], None] | None = None,
 ) -> list[dict]:
-    """Process and index a list of documents: preprocess, chunk, embed, store.
+    """Process and index documents: preprocess, chunk, embed, store.
+
+    ``documents`` is a list or an async iterable of batches (connector
+    pages). Batches flow through bounded queues: prepare (dedup) -> chunk ->
+    embed -> store. Fetching, tokenizing, embedding and writing therefore
+    overlap, and a slow stage holds back the ones before it.
 
     Documents are globally deduplicated by (provider, external_id).
     If a document already exists (synced by another user), we skip
     re-embedding and just grant the current user access via document_access.
+    Documents to index are claimed first (see ``_claim_documents``), so when
+    several users sync the same source at once, each document is embedded
+    by one of them and the others only get access.
+    An existing document whose title or content changed upstream (see
+    ``_content_hash``) is re-chunked; chunks whose text is unchanged keep
+    their embeddings and only new or edited chunks are embedded.
+    Documents are written together with their chunks and committed every
+    ``ingest_commit_documents`` documents or ``ingest_commit_chunks`` chunks.
+    A failed sync keeps what was committed, and the next one skips it as
+    unchanged. ``on_commit`` is called with the sync's progress so far
+    ({documents, chunks}) just before each commit, so a
+    caller can record it in the same transaction. Chunks are written with
+    their document's ``visible_to``, and after each commit the documents
+    granted or written are synced (see ``app.pipeline.visibility``).
 
     Returns a list of newly created documents with their embeddings:
     [{document_id, chunk_embeddings}, ...]
     """
-    new_count = 0
-    dedup_count = 0
-    new_docs = []
-
-    for doc_data in documents:
-        source_created_at = None
-        if doc_data.get("source_created_at"):
-            if isinstance(doc_data["source_created_at"], str):
-                source_created_at = datetime.datetime.fromisoformat(
-                    doc_data["source_created_at"].replace("Z", "+00:00")
+    if isinstance(documents, list):
+        documents = _single_batch(documents)
+
+    started = time.perf_counter()
+    first_stored: float | None = None
+    progress = {"documents": 0, "chunks": 0}
+    uncommitted = {"documents": 0, "chunks": 0}
+    counts = {"fetched": 0, "new": 0, "updated": 0, "dedup": 0}
+    new_docs: list[dict] = []
+    # (doc, doc_data, header, whether it replaces an existing document)
+    streamed: list[tuple[Document, dict, str, bool]] = []
+    seen: set[str] = set()
+    # Documents claimed by this sync
+    owned: set[uuid.UUID] = set()
+    # Documents granted or written since the last commit, to sync visibility for
+    touched: set[uuid.UUID] = set()
+    # The prepare and store stages share the session
+    db_lock = asyncio.Lock()
+
+    prepare = Stage("prepare", 1, settings.ingest_queue_size)
+    chunk = Stage("chunk", settings.ingest_chunk_concurrency, settings.ingest_queue_size)
+    embed = Stage("embed", settings.ingest_embed_concurrency, settings.ingest_queue_size)
+    store = Stage("store", 1, settings.ingest_queue_size)
+
+    async def prepare_batches(batches: list[list[dict]]):
+        for batch in batches:
+            counts["fetched"] += len(batch)
+            async with db_lock:
+                existing = await _existing_documents(
+                    db, provider, [d["external_id"] for d in batch]
                 )
-            else:
-                source_created_at = doc_data["source_created_at"]
-
-        # Global lookup by (provider, external_id) — not per-user
-        result = await db.execute(
-            select(Document).where(
-                Document.provider == provider,
-                Document.external_id == doc_data["external_id"],
+                touched.update(await _grant_access(
+                    db, user_id, list({row.id for row in existing.values()})
+                ))
+
+            # (doc, doc_data, text, existing document or None)
+            pending: list[tuple[Document, dict, str, sa.Row | None]] = []
+            for doc_data in batch:
+                external_id = doc_data["external_id"]
+                # Repeated within this sync
+                if external_id in seen:
+                    counts["dedup"] += 1
+                    continue
+                seen.add(external_id)
+
+                row = existing.get(external_id)
+                if row is None:
+                    doc = _new_document(user_id, connector_id, provider, doc_data)
+                else:
+                    doc = _new_document(row.user_id, connector_id, provider, doc_data)
+                    # Unchanged since it was indexed: nothing to do
+                    if row.claimed_at is None and doc.content_hash == row.content_hash:
+                        counts["dedup"] += 1
+                        continue
+                    doc.id = row.id
+
+                # Preprocess: prepend metadata header
+                raw = doc_data.get("raw_content") or ""
+                header = f"[{provider}] {doc_data.get('title', '')}"
+                if doc_data.get("author_name"):
+                    header += f" by {doc_data['author_name']}"
+                if len(raw) >= settings.chunk_stream_min_chars:
+                    streamed.append((doc, doc_data, header, row is not None))
+                else:
+                    pending.append((doc, doc_data, f"{header}\n\n{raw}", row))
+
+            claimed = await _claim_documents(
+                user_id,
+                provider,
+                [doc for doc, _, _, row in pending if row is None],
+                [doc.id for doc, _, _, row in pending if row is not None],
             )
-        )
-        existing_doc = result.scalar_one_or_none()
-
-        if existing_doc:
-            # Document already exists — just grant access and skip embedding
-            await _ensure_access(db, user_id, existing_doc.id)
-            dedup_count += 1
-            continue
-
-        # New document — create it, embed, and index
-        doc = Document(
-            user_id=user_id,
-            connector_id=connector_id,
-            provider=provider,
-            external_id=doc_data["external_id"],
-            title=doc_data.get("title"),
-            url=doc_data.get("url"),
-            author_name=doc_data.get("author_name"),
-            author_email=doc_data.get("author_email"),
-            content_type=doc_data["content_type"],
-            raw_content=doc_data.get("raw_content"),
-            metadata_=doc_data.get("metadata"),
-            source_created_at=source_created_at,
-        )
-        db.add(doc)
-        await db.flush()
+            owned.update(claimed)
+            # Being indexed by another sync
+            counts["dedup"] += len(pending) - len(claimed)
+            pending = [item for item in pending if item[0].id in claimed]
+
+            changed = [doc.id for doc, _, _, row in pending if row is not None]
+            if changed:
+                async with db_lock:
+                    previous = await _chunk_hashes(db, changed)
+            for doc, doc_data, text, row in pending:
+                await chunk.put(
+                    (doc, doc_data, text, previous[doc.id] if row is not None else None)
+                )
 
-        # Grant access to the creator
-        await _ensure_access(db, user_id, doc.id)
-
-        # Preprocess: prepend metadata header
-        raw = doc_data.get("raw_content") or ""
-        header = f"[{provider}] {doc_data.get('title', '')}"
-        if doc_data.get("author_name"):
-            header += f" by {doc_data['author_name']}"
-        text_with_header = f"{header}\n\n{raw}"
-
-        # Chunk the text
-        chunks = chunk_text(text_with_header)
-
-        if not chunks:
-            continue
-
-        # Embed all chunks
-        chunk_texts = [c["content"] for c in chunks]
-        embeddings = await embed_texts(chunk_texts)
-
-        # Build chunk metadata
-        chunk_meta = {
-            "title": doc_data.get("title"),
-            "url": doc_data.get("url"),
-            "author_name": doc_data.get("author_name"),
-            "author_email": doc_data.get("author_email"),
-            "provider": provider,
-            "content_type": doc_data["content_type"],
-            "source_created_at": doc_data.get("source_created_at"),
-        }
-        if doc_data.get("metadata"):
-            chunk_meta.update(doc_data["metadata"])
-
-        # Store chunks with embeddings
-        for chunk_data, embedding in zip(chunks, embeddings):
-            chunk = Chunk(
-                document_id=doc.id,
-                user_id=user_id,
-                chunk_index=chunk_data["chunk_index"],
-                content=chunk_data["content"],
-                token_count=chunk_data["token_count"],
-                embedding=embedding,
-                metadata_=chunk_meta,
+    async def chunk_docs(items: list[tuple[Document, dict, str, dict | None]]):
+        for doc, doc_data, text, previous in items:
+            chunks = await chunk_document(text, doc_data["content_type"])
+            await embed.put((doc, doc_data, chunks, previous))
+
+    async def embed_docs(items: list[tuple[Document, dict, list[dict], dict | None]]):
+        # Edited documents only embed the chunks whose text changed
+        work = []
+        for doc, doc_data, chunks, previous in items:
+            if previous is None:
+                work.append((doc, doc_data, chunks, None))
+            else:
+                changed, kept, stale = _diff_chunks(chunks, previous)
+                work.append((doc, doc_data, changed, (kept, stale)))
+
+        # Chunks of several small documents share embedding requests
+        all_chunks = [c for _, _, chunks, _ in work for c in chunks]
+        embeddings = await embed_texts(
+            [c["content"] for c in all_chunks], [c["token_count"] for c in all_chunks]
+        ) if all_chunks else []
+        offset = 0
+        for doc, doc_data, chunks, diff in work:
+            await store.put(
+                (doc, doc_data, chunks, embeddings[offset : offset + len(chunks)], diff)
             )
-            db.add(chunk)
-
-        new_count += 1
-        new_docs.append({
-            "document_id": doc.id,
-            "chunk_embeddings": embeddings,
-        })
-
-    await db.commit()
+            offset += len(chunks)
+
+    async def commit():
+        nonlocal first_stored
+        for key in uncommitted:
+            progress[key] += uncommitted[key]
+            uncommitted[key] = 0
+        if on_commit is not None:
+            on_commit(dict(progress))
+        synced = set(touched)
+        touched.clear()
+        await db.commit()
+        await visibility.sync(synced)
+        if first_stored is None and progress["chunks"]:
+            first_stored = time.perf_counter() - started
+
+    async def store_docs(
+        items: list[tuple[Document, dict, list[dict], list, tuple | None]],
+    ):
+        rows: list[dict] = []
+        updated: list[Document] = []
+        kept_chunks: list[dict] = []
+        stale_chunks: list[uuid.UUID] = []
+        async with db_lock:
+            access = await visibility.access_lists(db, [item[0].id for item in items])
+        for doc, doc_data, chunks, embeddings, diff in items:
+            rows.extend(
+                _chunk_rows(doc.id, doc.user_id, chunks, embeddings, access.get(doc.id, []))
+            )
+            if diff is not None:
+                kept, stale = diff
+                updated.append(doc)
+                kept_chunks.extend(
+                    {
+                        "id": chunk_id,
+                        "chunk_index": chunk_data["chunk_index"],
+                        "metadata_": _chunk_metadata(chunk_data),
+                    }
+                    for chunk_id, chunk_data in kept
+                )
+                stale_chunks.extend(stale)
+                if kept or stale:
+                    counts["updated"] += 1
+                    continue
+            # New, or never finished by a sync that abandoned its claim
+            if chunks:
+                new_docs.append({"document_id": doc.id, "chunk_embeddings": embeddings})
+                counts["new"] += 1
+
+        # New documents were inserted when they were claimed
+        async with db_lock:
+            await content_store.offload(db, updated)
+            await _update_documents(db, updated)
+            if stale_chunks:
+                await db.execute(sa.delete(Chunk).where(Chunk.id.in_(stale_chunks)))
+            if kept_chunks:
+                await db.execute(sa.update(Chunk), kept_chunks)
+            added = await _write_chunks(db, rows)
+            await _release_claims(db, [item[0].id for item in items])
+            touched.update(item[0].id for item in items)
+            await db.flush()
+            # Keep the session's identity map from growing with the sync
+            for obj in added:
+                db.expunge(obj)
+
+            uncommitted["documents"] += len(items)
+            uncommitted["chunks"] += len(rows)
+            if (
+                uncommitted["documents"] >= settings.ingest_commit_documents
+                or uncommitted["chunks"] >= settings.ingest_commit_chunks
+            ):
+                await commit()
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(feed("fetch", documents, prepare))
+            tg.create_task(prepare.run(prepare_batches, chunk))
+            tg.create_task(chunk.run(chunk_docs, embed))
+            tg.create_task(embed.run(
+                embed_docs, store,
+                max_items=settings.embedding_batch_max_texts,
+                weight=lambda item: sum(c["token_count"] for c in item[2]),
+                max_weight=settings.embedding_batch_max_tokens,
+            ))
+            tg.create_task(store.run(
+                store_docs,
+                max_items=settings.ingest_queue_size,
+                weight=lambda item: len(item[2]),
+                max_weight=settings.ingest_store_batch_rows,
+            ))
+        await commit()
+
+        # Huge documents are chunked and embedded window by window, and
+        # claimed only when their turn comes. Edited ones are re-indexed in
+        # full.
+        for doc, doc_data, header, replaces in streamed:
+            if not await _claim_documents(
+                user_id, provider, [] if replaces else [doc], [doc.id] if replaces else []
+            ):
+                counts["dedup"] += 1
+                continue
+            owned.add(doc.id)
+            if replaces:
+                await content_store.offload(db, [doc])
+                await _update_documents(db, [doc])
+                await db.execute(sa.delete(Chunk).where(Chunk.document_id == doc.id))
+            embeddings = await _index_streamed(db, doc, doc_data, doc.user_id, header)
+            await _release_claims(db, [doc.id])
+            touched.add(doc.id)
+            uncommitted["documents"] += 1
+            await commit()
+            if replaces:
+                counts["updated"] += 1
+                continue
+            if not embeddings:
+                continue
+            counts["new"] += 1
+            new_docs.append({
+                "document_id": doc.id,
+                "chunk_embeddings": embeddings,
+            })
+    except BaseException as e:
+        # Uncommitted work holds row locks on claimed documents; drop it
+        # before handing the claims back
+        await db.rollback()
+        await _abandon_claims(owned)
+        if isinstance(e, ExceptionGroup):
+            # Surface the failing stage's error, not the group
+            raise e.exceptions[0]
+        raise
+
+    first = f"{first_stored:.1f}s" if first_stored is not None else "n/a"
     logger.info(
-        f"Indexed {provider}: {new_count} new, {dedup_count} deduplicated "
-        f"(of {len(documents)} total)"
+        f"Indexed {provider}: {counts['new']} new, {counts['updated']} updated, "
+        f"{counts['dedup']} deduplicated (of {counts['fetched']} total) in "
+        f"{time.perf_counter() - started:.1f}s, first searchable after {first}"
     )
 
     return new_docs
@@ -172,8 +692,20 @@ async def cleanup_stale_documents(
     Documents with NULL source_created_at or older than the window are left alone.
     Orphaned documents (no remaining access) are deleted entirely.
 
+    The fetched IDs are bound as one array and anti-joined through
+    ``unnest()``, so the statement stays the same size however many there
+    are. Deletes run in batches of ``cleanup_batch_size``, each committed on
+    its own, so locks on document_access are held briefly. The user is
+    removed from the remaining chunks' visible_to in the same transaction.
+
     Returns the number of access entries removed.
     """
+    fetched = sa.func.unnest(
+        sa.bindparam(
+            "fetched_external_ids", list(fetched_external_ids), type_=ARRAY(sa.Text)
+        )
+    ).table_valued("external_id").render_derived(name="fetched")
+
     # Find stale documents: in the user's access, in the fetch window, but not fetched
     stale_q = (
         select(DocumentAccess.id, Document.id.label("doc_id"))
@@ -182,7 +714,7 @@ async def cleanup_stale_documents(
             DocumentAccess.user_id == user_id,
             Document.provider == provider,
             Document.source_created_at >= since,
-            Document.external_id.notin_(fetched_external_ids),
+            ~sa.exists().where(fetched.c.external_id == Document.external_id),
         )
     )
     result = await db.execute(stale_q)
@@ -191,30 +723,41 @@ async def cleanup_stale_documents(
     if not stale_rows:
         return 0
 
-    access_ids = [row[0] for row in stale_rows]
-    stale_doc_ids = [row[1] for row in stale_rows]
-
-    # Delete user's access entries for stale documents
-    await db.execute(
-        sa.delete(DocumentAccess).where(DocumentAccess.id.in_(access_ids))
-    )
+    orphan_count = 0
+    for i in range(0, len(stale_rows), settings.cleanup_batch_size):
+        batch = stale_rows[i : i + settings.cleanup_batch_size]
+        access_ids = [row[0] for row in batch]
+        stale_doc_ids = [row[1] for row in batch]
+
+        # Delete user's access entries for stale documents
+        await db.execute(
+            sa.delete(DocumentAccess).where(
+                DocumentAccess.id == sa.any_(
+                    sa.bindparam(
+                        "access_ids", access_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                    )
+                )
+            )
+        )
 
-    # Delete orphaned documents (no remaining access entries)
-    orphan_subq = (
-        select(Document.id)
-        .outerjoin(DocumentAccess, DocumentAccess.document_id == Document.id)
-        .where(
-            Document.id.in_(stale_doc_ids),
-            DocumentAccess.id.is_(None),
+        await visibility.revoke(db, user_id, stale_doc_ids)
+
+        # Delete orphaned documents (no remaining access entries)
+        orphan_result = await db.execute(
+            sa.delete(Document).where(
+                Document.id == sa.any_(
+                    sa.bindparam(
+                        "document_ids", stale_doc_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                    )
+                ),
+                ~sa.exists().where(DocumentAccess.document_id == Document.id),
+            )
         )
-    )
-    orphan_result = await db.execute(
-        sa.delete(Document).where(Document.id.in_(orphan_subq))
-    )
-    orphan_count = orphan_result.rowcount
+        orphan_count += orphan_result.rowcount
+        await db.commit()
 
     logger.info(
-        f"Stale cleanup {provider}: removed {len(access_ids)} access entries, "
+        f"Stale cleanup {provider}: removed {len(stale_rows)} access entries, "
         f"{orphan_count} orphaned documents"
     )
-    return len(access_ids)
+    return len(stale_rows)
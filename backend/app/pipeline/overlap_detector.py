@@ -3,6 +3,7 @@ import logging
 import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from sqlmodel import select
 
 from app.config import settings
@@ -10,6 +11,7 @@ from app.models.chat_message import ChatMessage
 from app.models.document import Document
 from app.models.overlap_alert import OverlapAlert
 from app.models.user import User
+from app.pipeline import content_store
 from app.pipeline.retriever import cross_user_similarity_search
 from app.prompts.overlap_confirm import build_overlap_confirm_prompt
 from app.services.openai_client import get_openai, with_backoff
@@ -130,8 +132,12 @@ async def detect_overlaps_for_document(
         logger.warning(f"Overlap detection for doc {document_id}: no embeddings, skipping")
         return
 
-    # Get the source document
-    result = await db.execute(select(Document).where(Document.id == document_id))
+    # Get the source document (raw content is read only if an LLM check runs)
+    result = await db.execute(
+        select(Document)
+        .options(defer(Document.raw_content))
+        .where(Document.id == document_id)
+    )
     source_doc = result.scalar_one_or_none()
     if not source_doc:
         logger.warning(f"Overlap detection: source doc {document_id} not found")
@@ -152,6 +158,7 @@ async def detect_overlaps_for_document(
     logger.info(
         f"Overlap detection for doc {document_id}: {len(candidates)} candidates"
     )
+    source_preview: str | None = None
 
     for candidate in candidates:
         target_doc_id = candidate["document_id"]
@@ -162,19 +169,24 @@ async def detect_overlaps_for_document(
             continue
 
         # Get target document
-        result = await db.execute(select(Document).where(Document.id == target_doc_id))
+        result = await db.execute(
+            select(Document)
+            .options(defer(Document.raw_content))
+            .where(Document.id == target_doc_id)
+        )
         target_doc = result.scalar_one_or_none()
         if not target_doc:
             continue
 
         # LLM confirm
-        target_meta = candidate.get("chunk_metadata", {}) or {}
+        if source_preview is None:
+            source_preview = await content_store.read(db, document_id) or ""
         llm_result = await _llm_confirm_overlap(
             source_doc=source_doc,
-            source_preview=source_doc.raw_content[:1000] if source_doc.raw_content else "",
+            source_preview=source_preview,
             target_title=target_doc.title,
             target_provider=target_doc.provider,
-            target_author=target_meta.get("author_name"),
+            target_author=target_doc.author_name,
             target_preview=candidate.get("chunk_content", ""),
         )
 
@@ -0,0 +1,112 @@
+"""Binary COPY of chunk rows, bypassing per-row ORM objects and parameters.
+
+Rows are encoded in Postgres' binary COPY format, with the vector/halfvec
+wire format (int16 dims, int16 unused, big-endian floats) and uuid[]
+written by hand.
+pgvector's own asyncpg codec would change how every connection binds
+vectors, which breaks SQLAlchemy's text binding for the rest of the app.
+"""
+import json
+import struct
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_TRAILER = struct.pack(">h", -1)
+_NULL = struct.pack(">i", -1)
+_UUID_OID = 2950
+
+# Rows encoded per buffer handed to asyncpg
+_ROWS_PER_BUFFER = 256
+
+CHUNK_COLUMNS = [
+    "document_id",
+    "user_id",
+    "chunk_index",
+    "content",
+    "token_count",
+    "embedding",
+    "metadata",
+    "visible_to",
+]
+
+
+def _field(data: bytes) -> bytes:
+    return struct.pack(">i", len(data)) + data
+
+
+def _int4(value: int) -> bytes:
+    return b"\x00\x00\x00\x04" + struct.pack(">i", value)
+
+
+def _uuid(value: uuid.UUID) -> bytes:
+    return b"\x00\x00\x00\x10" + value.bytes
+
+
+def _uuid_array(values: list[uuid.UUID]) -> bytes:
+    # ndim, has-nulls flag, element type, then (size, lower bound) per dim
+    if not values:
+        return _field(struct.pack(">iii", 0, 0, _UUID_OID))
+    header = struct.pack(">iiiii", 1, 0, _UUID_OID, len(values), 1)
+    return _field(header + b"".join(_uuid(value) for value in values))
+
+
+def _text(value: str) -> bytes:
+    return _field(value.encode())
+
+
+def _jsonb(value) -> bytes:
+    if value is None:
+        return _NULL
+    # jsonb binary format: version byte followed by the JSON text
+    return _field(b"\x01" + json.dumps(value).encode())
+
+
+def _vector(value: list[float] | None, fmt: str) -> bytes:
+    if value is None:
+        return _NULL
+    n = len(value)
+    return _field(struct.pack(f">hh{n}{fmt}", n, 0, *value))
+
+
+def encode_chunk_rows(rows: list[dict]) -> bytes:
+    """Encode rows (keyed like CHUNK_COLUMNS) as binary COPY tuples."""
+    fmt = "e" if settings.embedding_storage == "halfvec" else "f"
+    field_count = struct.pack(">h", len(CHUNK_COLUMNS))
+    parts = []
+    for row in rows:
+        parts.append(
+            field_count
+            + _uuid(row["document_id"])
+            + _uuid(row["user_id"])
+            + _int4(row["chunk_index"])
+            + _text(row["content"])
+            + _int4(row["token_count"])
+            + _vector(row["embedding"], fmt)
+            + _jsonb(row["metadata"])
+            + _uuid_array(row["visible_to"])
+        )
+    return b"".join(parts)
+
+
+async def copy_chunks(db: AsyncSession, rows: list[dict]) -> None:
+    """COPY rows into ``chunks`` on the session's connection.
+
+    The session must already have run a statement, so that its transaction
+    is open and the COPY is committed or rolled back with everything else.
+    """
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+
+    async def source():
+        yield _HEADER
+        for i in range(0, len(rows), _ROWS_PER_BUFFER):
+            yield encode_chunk_rows(rows[i : i + _ROWS_PER_BUFFER])
+        yield _TRAILER
+
+    await raw.driver_connection.copy_to_table(
+        "chunks", source=source(), columns=CHUNK_COLUMNS, format="binary"
+    )
@@ -0,0 +1,120 @@
+import asyncio
+import collections
+import logging
+import time
+
+from app.config import settings
+from app.embeddings import get_embedding_backend
+from app.pipeline import embedding_cache
+
+logger = logging.getLogger("uvicorn.error")
+
+# key -> (expires_at, embedding), least recently used first
+_entries: collections.OrderedDict[tuple, tuple[float, list[float]]] = (
+    collections.OrderedDict()
+)
+
+# Concurrent requests for the same query (e.g. frontend retries on reconnect)
+# wait on the first one instead of embedding it again
+_inflight: dict[tuple, asyncio.Future] = {}
+
+stats = {"hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+
+def metrics() -> dict:
+    # Coalesced requests were served without an API call, so they count as hits
+    hits = stats["hits"] + stats["shared_hits"] + stats["coalesced"]
+    lookups = hits + stats["misses"]
+    return {
+        **stats,
+        "size": len(_entries),
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+def _get(key: tuple) -> list[float] | None:
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    expires_at, embedding = entry
+    if expires_at < time.monotonic():
+        del _entries[key]
+        return None
+    _entries.move_to_end(key)
+    return embedding
+
+
+def _put(key: tuple, embedding: list[float]) -> None:
+    _entries[key] = (time.monotonic() + settings.query_cache_ttl_seconds, embedding)
+    _entries.move_to_end(key)
+    while len(_entries) > settings.query_cache_size:
+        _entries.popitem(last=False)
+
+
+async def _load_or_embed(h: bytes, query: str, embed) -> list[float]:
+    if settings.query_cache_shared:
+        try:
+            found = await embedding_cache.lookup([h])
+        except Exception:
+            logger.exception("Shared query cache lookup failed")
+            stats["errors"] += 1
+            found = {}
+        if h in found:
+            stats["shared_hits"] += 1
+            return found[h]
+
+    stats["misses"] += 1
+    embedding = await embed(query)
+
+    if settings.query_cache_shared:
+        try:
+            await embedding_cache.store({h: embedding})
+        except Exception:
+            logger.exception("Shared query cache store failed")
+            stats["errors"] += 1
+    return embedding
+
+
+async def get_or_embed(query: str, embed) -> list[float]:
+    """Return the cached embedding for ``query``, calling ``embed(query)`` on
+    a miss.
+
+    Queries are keyed like chunks in the embedding cache (normalized text,
+    backend model, dimensions), so the shared tier is the ``embedding_cache`` table:
+    other workers' queries, and chunks with identical text, are hits too.
+    """
+    if settings.query_cache_size <= 0:
+        return await embed(query)
+
+    h = embedding_cache.text_hash(query)
+    backend = get_embedding_backend()
+    key = (h, backend.model, backend.dimensions)
+
+    embedding = _get(key)
+    if embedding is not None:
+        stats["hits"] += 1
+        return embedding
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        stats["coalesced"] += 1
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        embedding = await _load_or_embed(h, query, embed)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Retrieve it here so an un-awaited failure isn't logged as unhandled
+        future.exception()
+        raise
+    else:
+        future.set_result(embedding)
+        _put(key, embedding)
+        return embedding
+    finally:
+        del _inflight[key]
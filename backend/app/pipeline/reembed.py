@@ -0,0 +1,135 @@
+"""Backfill chunk embeddings after a model, dimension or storage change.
+
+``--convert`` first changes chunks.embedding to CONNECTIVE_EMBEDDING_STORAGE
+and CONNECTIVE_EMBEDDING_DIMENSIONS if it isn't already (see ``convert``).
+By default only chunks with no embedding are processed (what ``convert``
+leaves behind when vectors can't be converted in place). ``--all``
+re-embeds every chunk, e.g. after switching embedding models. Progress is
+committed per batch, and converting an already converted column does
+nothing, so the command can be interrupted and re-run.
+
+Usage (from backend/):
+    python -m app.pipeline.reembed [--convert] [--all] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+
+import sqlalchemy as sa
+from sqlmodel import select
+
+from app.config import settings
+from app.database import get_session_ctx
+from app.models.chunk import Chunk, embedding_index_expression
+from app.pipeline.embedder import embed_texts
+
+logger = logging.getLogger("uvicorn.error")
+
+
+async def column_type() -> str:
+    """chunks.embedding's current type, e.g. "vector(1536)"."""
+    async with get_session_ctx() as db:
+        return (await db.execute(sa.text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'chunks'::regclass AND attname = 'embedding'"
+        ))).scalar_one()
+
+
+async def convert() -> bool:
+    """Change chunks.embedding to the configured storage and dimensions and
+    rebuild its HNSW index. Same dimensions: the values are cast. Fewer
+    dimensions on OpenAI's text-embedding-3 models: vectors are truncated
+    and renormalized, which is what the API's ``dimensions`` parameter
+    does. Otherwise embeddings are cleared for ``reembed`` to fill. Returns
+    False if the column already had the configured type."""
+    current = await column_type()
+    dims = settings.embedding_dimensions
+    target = f"{settings.embedding_storage}({dims})"
+    if current == target:
+        return False
+    current_dims = int(current.split("(")[1].rstrip(")"))
+
+    if dims == current_dims:
+        using = f"embedding::{target}"
+    elif (
+        dims < current_dims
+        and settings.embedding_backend == "openai"
+        and settings.embedding_model.startswith("text-embedding-3")
+    ):
+        using = f"l2_normalize(subvector(embedding::vector, 1, {dims}))::{target}"
+    else:
+        using = "NULL"
+
+    logger.info(f"Converting chunks.embedding from {current} to {target} (USING {using})")
+    async with get_session_ctx() as db:
+        await db.execute(sa.text("DROP INDEX IF EXISTS chunks_embedding_idx"))
+        await db.execute(sa.text(
+            f"ALTER TABLE chunks ALTER COLUMN embedding TYPE {target} USING {using}"
+        ))
+        await db.execute(sa.text(
+            "CREATE INDEX chunks_embedding_idx ON chunks "
+            f"USING hnsw ({embedding_index_expression()})"
+        ))
+        await db.commit()
+    return True
+
+
+async def reembed(all_chunks: bool = False, batch_size: int = 500) -> int:
+    """Embed chunks in id order, ``batch_size`` at a time. Returns the count."""
+    done = 0
+    last_id = uuid.UUID(int=0)
+
+    while True:
+        async with get_session_ctx() as db:
+            stmt = (
+                select(Chunk.id, Chunk.content, Chunk.token_count)
+                .where(Chunk.id > last_id)
+                .order_by(Chunk.id)
+                .limit(batch_size)
+            )
+            if not all_chunks:
+                stmt = stmt.where(Chunk.embedding.is_(None))
+            rows = (await db.execute(stmt)).all()
+            if not rows:
+                break
+
+            embeddings = await embed_texts(
+                [row.content for row in rows], [row.token_count for row in rows]
+            )
+            await db.execute(
+                sa.update(Chunk),
+                [
+                    {"id": row.id, "embedding": embedding}
+                    for row, embedding in zip(rows, embeddings)
+                ],
+            )
+            await db.commit()
+
+        done += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"Re-embedded {done} chunks")
+
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--convert", action="store_true",
+        help="first change the column to the configured storage and dimensions",
+    )
+    parser.add_argument("--all", action="store_true", help="re-embed every chunk")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.convert:
+        changed = asyncio.run(convert())
+        print("Converted chunks.embedding" if changed else "chunks.embedding already matches")
+    count = asyncio.run(reembed(args.all, args.batch_size))
+    print(f"Re-embedded {count} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,225 @@
-import json
+import asyncio
 import logging
+import time
 import uuid
 
+import sqlalchemy as sa
 from pgvector.sqlalchemy import HALFVEC
 from sqlalchemy import Float, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import cast, select, text
+from sqlmodel import cast, select
 
+from app import rerankers
 from app.config import settings
+from app.database import get_session_ctx
 from app.models.chunk import Chunk
+from app.models.document import Document
 from app.models.document_access import DocumentAccess
 from app.pipeline.embedder import embed_query
-from app.services.openai_client import get_openai, with_backoff
 
 logger = logging.getLogger("uvicorn.error")
 
+# Top fused results the reranker chooses from
+RERANK_CANDIDATES = 10
+# Largest hnsw.ef_search pgvector accepts
+HNSW_MAX_EF_SEARCH = 1000
+# How long a user's visible-chunk estimate is reused
+VISIBILITY_ESTIMATE_TTL_SECONDS = 60
 
-def _accessible_doc_ids(user_id: uuid.UUID):
-    """Subquery returning document IDs the user has access to."""
-    return (
-        select(DocumentAccess.document_id)
-        .where(DocumentAccess.user_id == user_id)
-        .scalar_subquery()
-    )
+# How vector legs scanned: exactly, through HNSW, or through HNSW with a
+# raised ef_search
+stats = {"exact": 0, "hnsw": 0, "widened": 0}
 
+# (user_id, providers) -> (expires_at, (visible chunks, total chunks) or None)
+_visibility: dict[tuple, tuple[float, tuple[float, float] | None]] = {}
 
-async def _llm_rerank(
-    query: str, candidates: list[dict], top_k: int = 6
-) -> list[dict]:
-    """Rerank candidates using LLM scoring. Takes top 10, returns top_k."""
-    if len(candidates) <= top_k:
-        return candidates
 
-    # Take top 10 for reranking
-    to_rerank = candidates[:10]
+def metrics() -> dict:
+    return dict(stats)
+
+
+def cosine_distance(embedding: list[float], column=Chunk.embedding):
+    """Cosine distance from each chunk to ``embedding``, written to match the
+    HNSW index expression so the planner can use it."""
+    halfvec = HALFVEC(settings.embedding_dimensions)
+    if settings.embedding_storage != "halfvec":
+        column = cast(column, halfvec)
+    return column.op("<=>")(cast(embedding, halfvec)).cast(Float)
+
+
+def _accessible_docs_stmt(user_id: uuid.UUID, providers: list[str] | None = None):
+    stmt = select(DocumentAccess.document_id).where(DocumentAccess.user_id == user_id)
+    if providers:
+        stmt = stmt.join(Document, Document.id == DocumentAccess.document_id).where(
+            Document.provider.in_(providers)
+        )
+    return stmt
+
+
+def _accessible_doc_ids(user_id: uuid.UUID, providers: list[str] | None = None):
+    """Subquery returning document IDs the user has access to, optionally
+    only from the given providers."""
+    return _accessible_docs_stmt(user_id, providers).scalar_subquery()
+
+
+def _visible_to(user_id: uuid.UUID, providers: list[str] | None = None):
+    """Filter for chunks the user can see: a GIN lookup on chunks.visible_to,
+    which mirrors document_access. A provider filter still goes through the
+    user's documents."""
+    visible = Chunk.visible_to.contains([user_id])
+    if providers:
+        visible = sa.and_(
+            visible, Chunk.document_id.in_(_accessible_doc_ids(user_id, providers))
+        )
+    return visible
+
 
-    numbered = "\n".join(
-        f"[{i}] {c['content'][:300]}" for i, c in enumerate(to_rerank)
+def _reltuples(table: str):
+    # -1 until the table is first vacuumed or analyzed
+    return sa.literal_column(
+        f"(SELECT reltuples FROM pg_class WHERE oid = '{table}'::regclass)"
     )
 
-    client = get_openai()
-    response = await with_backoff(
-        client.chat.completions.create,
-        model=settings.llm_model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a relevance scorer. Given a query and numbered passages, "
-                    "return a JSON array of the passage indices sorted by relevance "
-                    "(most relevant first). Only return the JSON array, nothing else. "
-                    "Example: [3, 0, 7, 1, 5, 2]"
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"Query: {query}\n\nPassages:\n{numbered}",
-            },
-        ],
-        temperature=0.0,
+
+async def _estimate_visible_chunks(
+    db: AsyncSession, user_id: uuid.UUID, providers: list[str] | None
+) -> tuple[float, float] | None:
+    """(chunks the user can see, chunks in total). Visible chunks are the
+    user's document count times the table-wide average chunks per document,
+    from the planner's row estimates; cached briefly per user. Only good
+    enough to size ef_search: it can be far off for users whose documents
+    are unusually long. None while the tables have never been analyzed
+    (e.g. after a restore), when there is nothing to estimate from."""
+    key = (user_id, tuple(sorted(providers or ())))
+    entry = _visibility.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    row = (
+        await db.execute(
+            select(
+                func.count().label("documents"),
+                _reltuples("chunks").label("total_chunks"),
+                _reltuples("documents").label("total_documents"),
+            ).select_from(_accessible_docs_stmt(user_id, providers).subquery())
+        )
+    ).one()
+    estimate = None
+    if row.total_chunks >= 0 and row.total_documents >= 0:
+        per_document = row.total_chunks / row.total_documents if row.total_documents else 0.0
+        estimate = row.documents * per_document, float(row.total_chunks)
+
+    if len(_visibility) >= 10_000:
+        _visibility.clear()
+    _visibility[key] = (time.monotonic() + VISIBILITY_ESTIMATE_TTL_SECONDS, estimate)
+    return estimate
+
+
+async def _count_visible_chunks(
+    db: AsyncSession, user_id: uuid.UUID, providers: list[str] | None, cap: int
+) -> int:
+    """Chunks the user can see, counted up to ``cap + 1``: enough to tell
+    whether there are more than ``cap`` without reading them all."""
+    bounded = select(sa.literal(1)).where(_visible_to(user_id, providers)).limit(cap + 1)
+    return (
+        await db.execute(select(func.count()).select_from(bounded.subquery()))
+    ).scalar_one()
+
+
+async def _plan_vector_leg(
+    db: AsyncSession, user_id: uuid.UUID, providers: list[str] | None, vector_top: int
+) -> tuple[bool, int | None]:
+    """How the vector leg should scan: (exact, ef_search to raise it to).
+
+    The HNSW scan drops invisible chunks after collecting ef_search
+    candidates, so it returns about ef_search * selectivity results. Users
+    who can see at most ann_exact_max_chunks chunks (counted, so the exact
+    scan never reads more) are scanned exactly. Otherwise ef_search is
+    raised until twice vector_top visible hits are expected, up to
+    pgvector's maximum, unless iterative index scans are on. Without an
+    estimate it keeps the plain HNSW scan, which is bounded whatever the
+    user can see.
+    """
+    cap = settings.ann_exact_max_chunks
+    if await _count_visible_chunks(db, user_id, providers, cap) <= cap:
+        stats["exact"] += 1
+        return True, None
+    estimate = await _estimate_visible_chunks(db, user_id, providers)
+    if estimate is None:
+        stats["hnsw"] += 1
+        return False, None
+    visible, total = estimate
+    # The count has shown there are more than cap
+    visible = max(visible, cap + 1)
+    ef_search = min(HNSW_MAX_EF_SEARCH, int(2 * vector_top * total / visible) + 1)
+    if settings.hnsw_iterative_scan or ef_search <= settings.hnsw_ef_search:
+        stats["hnsw"] += 1
+        return False, None
+    stats["widened"] += 1
+    return False, ef_search
+
+
+async def _raise_ef_search(db: AsyncSession, ef_search: int | None) -> None:
+    if ef_search:
+        # SET takes no bind parameters; ef_search is an int we computed
+        await db.execute(sa.text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+
+async def _document_metadata(
+    db: AsyncSession, document_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, dict]:
+    """Citation metadata (title, url, author, provider, ...) for each of the
+    given documents, in one query."""
+    if not document_ids:
+        return {}
+    result = await db.execute(
+        select(
+            Document.id,
+            Document.title,
+            Document.url,
+            Document.author_name,
+            Document.author_email,
+            Document.provider,
+            Document.content_type,
+            Document.source_created_at,
+            Document.metadata_,
+        ).where(
+            Document.id == sa.any_(
+                sa.bindparam(
+                    "document_ids", document_ids, type_=ARRAY(PGUUID(as_uuid=True))
+                )
+            )
+        )
     )
+    metadata = {}
+    for row in result:
+        meta = {
+            "title": row.title,
+            "url": row.url,
+            "author_name": row.author_name,
+            "author_email": row.author_email,
+            "provider": row.provider,
+            "content_type": row.content_type,
+            "source_created_at": (
+                row.source_created_at.isoformat() if row.source_created_at else None
+            ),
+        }
+        # Connector-specific fields (channel, repo, ...)
+        meta.update(row.metadata_ or {})
+        metadata[row.id] = meta
+    return metadata
+
 
-    try:
-        content = response.choices[0].message.content or "[]"
-        # Strip markdown code fences if present
-        content = content.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-        ranking = json.loads(content)
-        reranked = []
-        for idx in ranking:
-            if isinstance(idx, int) and 0 <= idx < len(to_rerank):
-                reranked.append(to_rerank[idx])
-        # Add any candidates missed by LLM
-        seen = set(ranking)
-        for i, c in enumerate(to_rerank):
-            if i not in seen:
-                reranked.append(c)
-        return reranked[:top_k]
-    except (json.JSONDecodeError, TypeError, KeyError):
-        logger.warning("LLM reranking failed, falling back to RRF order")
-        return candidates[:top_k]
+async def _hydrate_metadata(db: AsyncSession, results: list[dict]) -> None:
+    """Replace each result's chunk-level metadata with its document's metadata
+    plus those chunk fields, looking up each distinct document once."""
+    documents = await _document_metadata(
+        db, list({r["document_id"] for r in results})
+    )
+    for r in results:
+        doc_meta = documents.get(r["document_id"], {})
+        r["metadata"] = {**doc_meta, **r["metadata"]} if r["metadata"] else doc_meta
 
 
 async def cross_user_similarity_search(
@@ -99,12 +238,7 @@ async def cross_user_similarity_search(
     seen_documents: dict[uuid.UUID, dict] = {}  # doc_id -> best match
 
     for embedding in chunk_embeddings:
-        distance = (
-            cast(Chunk.embedding, HALFVEC(1536))
-            .op("<=>")(cast(embedding, HALFVEC(1536)))
-            .cast(Float)
-            .label("distance")
-        )
+        distance = cosine_distance(embedding).label("distance")
 
         stmt = (
             select(
@@ -112,7 +246,6 @@ async def cross_user_similarity_search(
                 Chunk.document_id,
                 Chunk.user_id,
                 Chunk.content,
-                Chunk.metadata_,
                 distance,
             )
             .where(Chunk.document_id != source_document_id)
@@ -121,7 +254,6 @@ async def cross_user_similarity_search(
             .limit(top_k_per_chunk)
         )
 
-        await db.execute(text("SET LOCAL hnsw.ef_search = 100"))
         results = (await db.execute(stmt)).all()
 
         for row in results:
@@ -132,7 +264,6 @@ async def cross_user_similarity_search(
                     "user_id": row.user_id,
                     "distance": row.distance,
                     "chunk_content": row.content,
-                    "chunk_metadata": row.metadata_,
                 }
 
     logger.info(
@@ -142,111 +273,257 @@ async def cross_user_similarity_search(
     return list(seen_documents.values())
 
 
-async def hybrid_search(
-    db: AsyncSession,
-    user_id: uuid.UUID,
-    query: str,
-    filters: dict | None = None,
-    top_k: int = 6,
-    vector_top: int = 40,
-    fts_top: int = 40,
-    rrf_k: int = 60,
-    rerank: bool = True,
-) -> list[dict]:
-    """Hybrid search: vector + full-text search with Reciprocal Rank Fusion + LLM reranking.
+def _vector_leg(visible, query_embedding: list[float], limit: int, exact: bool):
+    """Nearest ``visible`` chunks to the query embedding, closest first.
 
-    Uses document_access to filter chunks the user can see, enabling
-    cross-user deduplication.
+    With ``exact`` the visible chunks are collected first (a MATERIALIZED
+    CTE, which the HNSW index cannot serve) and all of them are compared.
     """
-
-    # Subquery: document IDs this user can access
-    accessible_docs = _accessible_doc_ids(user_id)
-
-    # 1. Embed the query
-    query_embedding = await embed_query(query)
-
-    # 2. Vector search — cosine distance via halfvec cast (ethelflow pattern)
-    distance = (
-        cast(Chunk.embedding, HALFVEC(1536))
-        .op("<=>")(cast(query_embedding, HALFVEC(1536)))
-        .cast(Float)
-        .label("distance")
-    )
-
-    vector_stmt = (
-        select(Chunk.id, Chunk.content, Chunk.metadata_, distance)
-        .where(Chunk.document_id.in_(accessible_docs))
+    if exact:
+        candidates = (
+            select(Chunk.id, Chunk.embedding)
+            .where(visible)
+            .cte("visible")
+            .prefix_with("MATERIALIZED")
+        )
+        distance = cosine_distance(query_embedding, candidates.c.embedding).label("distance")
+        return select(candidates.c.id, distance).order_by(distance).limit(limit)
+    distance = cosine_distance(query_embedding).label("distance")
+    return (
+        select(Chunk.id, distance)
+        .where(visible)
         .order_by(distance)
-        .limit(vector_top)
+        .limit(limit)
     )
 
-    # Apply filters
-    if filters:
-        if filters.get("providers"):
-            vector_stmt = vector_stmt.where(
-                Chunk.metadata_["provider"].astext.in_(filters["providers"])
-            )
 
-    await db.execute(text("SET LOCAL hnsw.ef_search = 100"))
-    vector_results = (await db.execute(vector_stmt)).all()
-
-    # 3. Full-text search
+def _fts_leg(visible, query: str, limit: int):
+    """Visible chunks matching the query's terms, best ts_rank first."""
     ts_query = func.plainto_tsquery("english", query)
     fts_rank = func.ts_rank(Chunk.fts, ts_query).cast(Float).label("rank")
-
-    fts_stmt = (
-        select(Chunk.id, Chunk.content, Chunk.metadata_, fts_rank)
-        .where(Chunk.document_id.in_(accessible_docs))
+    return (
+        select(Chunk.id, fts_rank)
+        .where(visible)
         .where(Chunk.fts.op("@@")(ts_query))
         .order_by(fts_rank.desc())
-        .limit(fts_top)
+        .limit(limit)
     )
 
-    if filters:
-        if filters.get("providers"):
-            fts_stmt = fts_stmt.where(
-                Chunk.metadata_["provider"].astext.in_(filters["providers"])
-            )
 
-    fts_results = (await db.execute(fts_stmt)).all()
+async def _search_separate(
+    db: AsyncSession,
+    visible,
+    query: str,
+    query_embedding: list[float],
+    vector_top: int,
+    fts_top: int,
+    rrf_k: int,
+    limit: int,
+    exact: bool,
+    ef_search: int | None,
+) -> list[dict]:
+    """Run the two legs as separate queries, fuse them in Python and load
+    the top ``limit`` chunks."""
+    await _raise_ef_search(db, ef_search)
+    vector_results = (
+        await db.execute(_vector_leg(visible, query_embedding, vector_top, exact))
+    ).all()
+    fts_results = (await db.execute(_fts_leg(visible, query, fts_top))).all()
+    return await _fuse_and_load(db, vector_results, fts_results, rrf_k, limit)
+
 
-    # 4. Reciprocal Rank Fusion
-    scores: dict[uuid.UUID, dict] = {}
+async def _search_concurrent(
+    db: AsyncSession,
+    visible,
+    query: str,
+    vector_top: int,
+    fts_top: int,
+    rrf_k: int,
+    limit: int,
+    exact: bool,
+    ef_search: int | None,
+) -> list[dict]:
+    """Like ``_search_separate``, but the legs run at the same time on two
+    pooled connections, and the query is embedded while the FTS leg runs."""
 
-    for rank, row in enumerate(vector_results):
-        chunk_id = row.id
-        rrf_score = 1.0 / (rrf_k + rank + 1)
-        scores[chunk_id] = {
-            "content": row.content,
-            "metadata": row.metadata_,
-            "score": rrf_score,
-        }
+    async def vector_leg():
+        query_embedding = await embed_query(query)
+        async with get_session_ctx() as leg_db:
+            await _raise_ef_search(leg_db, ef_search)
+            return (
+                await leg_db.execute(
+                    _vector_leg(visible, query_embedding, vector_top, exact)
+                )
+            ).all()
 
-    for rank, row in enumerate(fts_results):
-        chunk_id = row.id
-        rrf_score = 1.0 / (rrf_k + rank + 1)
-        if chunk_id in scores:
-            scores[chunk_id]["score"] += rrf_score
-        else:
-            scores[chunk_id] = {
-                "content": row.content,
-                "metadata": row.metadata_,
-                "score": rrf_score,
-            }
+    async def fts_leg():
+        async with get_session_ctx() as leg_db:
+            return (await leg_db.execute(_fts_leg(visible, query, fts_top))).all()
+
+    vector_results, fts_results = await asyncio.gather(vector_leg(), fts_leg())
+    return await _fuse_and_load(db, vector_results, fts_results, rrf_k, limit)
 
-    # 5. Sort by RRF score
-    ranked = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
+
+async def _fuse_and_load(
+    db: AsyncSession, vector_results: list, fts_results: list, rrf_k: int, limit: int
+) -> list[dict]:
+    """Reciprocal Rank Fusion of the two legs, then the top ``limit`` chunks."""
+    # On ties, vector hits come first
+    scores: dict[uuid.UUID, float] = {}
+    for results in (vector_results, fts_results):
+        for rank, row in enumerate(results):
+            scores[row.id] = scores.get(row.id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    ranked_ids = sorted(scores, key=scores.get, reverse=True)
 
     logger.info(
         f"Hybrid search: {len(vector_results)} vector + {len(fts_results)} FTS "
         f"→ {len(scores)} unique"
     )
+    return await _load_chunks(db, ranked_ids[:limit], scores)
+
+
+async def _load_chunks(
+    db: AsyncSession, chunk_ids: list[uuid.UUID], scores: dict[uuid.UUID, float]
+) -> list[dict]:
+    """Results for the given chunks, in the given order."""
+    if not chunk_ids:
+        return []
+    result = await db.execute(
+        select(Chunk.id, Chunk.document_id, Chunk.content, Chunk.metadata_).where(
+            Chunk.id == sa.any_(
+                sa.bindparam("chunk_ids", chunk_ids, type_=ARRAY(PGUUID(as_uuid=True)))
+            )
+        )
+    )
+    rows = {row.id: row for row in result}
+    return [
+        {
+            "chunk_id": chunk_id,
+            "document_id": rows[chunk_id].document_id,
+            "content": rows[chunk_id].content,
+            "metadata": rows[chunk_id].metadata_,
+            "score": scores[chunk_id],
+        }
+        for chunk_id in chunk_ids
+        if chunk_id in rows
+    ]
+
+
+def _fused_statement(
+    visible,
+    query: str,
+    query_embedding: list[float],
+    vector_top: int,
+    fts_top: int,
+    rrf_k: int,
+    limit: int,
+    exact: bool,
+):
+    """Both legs, Reciprocal Rank Fusion and the top ``limit`` chunks' content
+    in one statement.
+
+    Each leg only produces chunk ids and ranks; content and metadata are
+    joined in for the fused top ``limit``. Ties are broken like the Python
+    fusion: by first appearance, vector hits before FTS-only ones.
+    """
+    vector = _vector_leg(visible, query_embedding, vector_top, exact).subquery("vector")
+    fts = _fts_leg(visible, query, fts_top).subquery("fts")
+    vector_rank = func.row_number().over(order_by=vector.c.distance)
+    fts_rank = func.row_number().over(order_by=fts.c.rank.desc())
+    legs = sa.union_all(
+        select(vector.c.id, vector_rank.label("rank"), vector_rank.label("position")),
+        select(fts.c.id, fts_rank.label("rank"), (fts_rank + vector_top).label("position")),
+    ).subquery("legs")
+
+    # In float8: dividing by a bigint makes SQLAlchemy cast it to numeric,
+    # and the whole sum would be numeric (Decimal through asyncpg)
+    score = func.sum(
+        sa.literal(1.0, Float) / cast(legs.c.rank + rrf_k, Float)
+    ).label("score")
+    position = func.min(legs.c.position).label("position")
+    fused = (
+        select(legs.c.id, score, position)
+        .group_by(legs.c.id)
+        .order_by(score.desc(), position)
+        .limit(limit)
+        .cte("fused")
+    )
+    return (
+        select(Chunk.id, Chunk.document_id, Chunk.content, Chunk.metadata_, fused.c.score)
+        .join(fused, fused.c.id == Chunk.id)
+        .order_by(fused.c.score.desc(), fused.c.position)
+    )
 
-    # 6. LLM reranking (top 10 → top_k)
+
+async def hybrid_search(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    query: str,
+    filters: dict | None = None,
+    top_k: int = 6,
+    vector_top: int = 40,
+    fts_top: int = 40,
+    rrf_k: int = 60,
+    rerank: bool = True,
+) -> list[dict]:
+    """Hybrid search: vector + full-text search with Reciprocal Rank Fusion +
+    reranking (``settings.reranker``, see ``app.rerankers``).
+
+    Filters on chunks.visible_to, which mirrors document_access, so
+    documents indexed once are searchable by every user with access. With
+    ``hybrid_search_mode = "single"`` both legs and the fusion run as one
+    statement; see ``_fused_statement``.
+    With "concurrent" they run side by side; see ``_search_concurrent``.
+    How the vector leg scans depends on how much the user can see; see
+    ``_plan_vector_leg``.
+    """
+
+    providers = (filters or {}).get("providers")
+    visible = _visible_to(user_id, providers)
+    exact, ef_search = await _plan_vector_leg(db, user_id, providers, vector_top)
+
+    # Only what is returned (or shown to the reranker) is loaded
+    limit = max(top_k, RERANK_CANDIDATES) if rerank else top_k
+    if settings.hybrid_search_mode == "concurrent":
+        ranked = await _search_concurrent(
+            db, visible, query, vector_top, fts_top, rrf_k, limit, exact, ef_search
+        )
+    elif settings.hybrid_search_mode == "single":
+        query_embedding = await embed_query(query)
+        await _raise_ef_search(db, ef_search)
+        result = await db.execute(
+            _fused_statement(
+                visible, query, query_embedding, vector_top, fts_top, rrf_k, limit,
+                exact,
+            )
+        )
+        ranked = [
+            {
+                "chunk_id": row.id,
+                "document_id": row.document_id,
+                "content": row.content,
+                "metadata": row.metadata_,
+                "score": row.score,
+            }
+            for row in result
+        ]
+        logger.info(f"Hybrid search: {len(ranked)} results in one statement")
+    else:
+        query_embedding = await embed_query(query)
+        ranked = await _search_separate(
+            db, visible, query, query_embedding, vector_top, fts_top, rrf_k, limit,
+            exact, ef_search,
+        )
+
+    # Reranking (top RERANK_CANDIDATES → top_k), in fused order if it fails
+    # or runs over rerank_budget_seconds
     if rerank and len(ranked) > top_k:
-        ranked = await _llm_rerank(query, ranked, top_k=top_k)
-        logger.info(f"After LLM reranking: {len(ranked)} results")
+        ranked = await rerankers.rerank(query, ranked, top_k)
+        logger.info(f"After reranking ({settings.reranker}): {len(ranked)} results")
     else:
         ranked = ranked[:top_k]
 
+    # Document metadata for the results only, once per document
+    await _hydrate_metadata(db, ranked)
+
     return ranked
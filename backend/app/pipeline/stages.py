@@ -0,0 +1,110 @@
+"""Bounded-queue stages for the ingestion pipeline.
+
+Each stage owns an input queue drained by a fixed number of worker
+coroutines. A full queue blocks the stage feeding it, so a slow stage
+(usually embedding) holds back fetching instead of letting documents pile
+up in memory. Upstream ends a stage by putting one ``DONE`` per worker.
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable
+
+DONE = object()
+
+# Totals across every sync in this process, by stage name
+_totals: dict[str, dict] = {}
+_active: set["Stage"] = set()
+
+
+def metrics() -> dict:
+    out = {}
+    for name, totals in _totals.items():
+        busy = totals["busy_seconds"]
+        out[name] = {
+            **totals,
+            "queue_depth": sum(s.queue.qsize() for s in _active if s.name == name),
+            "items_per_second": totals["items"] / busy if busy else 0.0,
+        }
+    return out
+
+
+def _record(name: str, items: int, seconds: float) -> None:
+    totals = _totals.setdefault(name, {"items": 0, "busy_seconds": 0.0})
+    totals["items"] += items
+    totals["busy_seconds"] += seconds
+
+
+class Stage:
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def put(self, item) -> None:
+        await self.queue.put(item)
+
+    async def _take(
+        self,
+        max_items: int,
+        weight: Callable[[object], int] | None,
+        max_weight: int | None,
+    ) -> tuple[list, bool]:
+        """Wait for one item, then add whatever else is already queued, up to
+        the limits. Returns (items, whether DONE was reached)."""
+        item = await self.queue.get()
+        if item is DONE:
+            return [], True
+        items = [item]
+        total = weight(item) if weight else 1
+        while len(items) < max_items and not self.queue.empty():
+            if max_weight is not None and total >= max_weight:
+                break
+            item = self.queue.get_nowait()
+            if item is DONE:
+                return items, True
+            items.append(item)
+            total += weight(item) if weight else 1
+        return items, False
+
+    async def run(
+        self,
+        handle: Callable[[list], Awaitable[None]],
+        downstream: "Stage | None" = None,
+        max_items: int = 1,
+        weight: Callable[[object], int] | None = None,
+        max_weight: int | None = None,
+    ) -> None:
+        """Run the workers until DONE, then signal ``downstream``. ``handle``
+        gets lists of up to ``max_items`` items (or ``max_weight`` total)."""
+
+        async def worker():
+            while True:
+                items, done = await self._take(max_items, weight, max_weight)
+                if items:
+                    start = time.perf_counter()
+                    await handle(items)
+                    _record(self.name, len(items), time.perf_counter() - start)
+                if done:
+                    return
+
+        _active.add(self)
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.workers)))
+        finally:
+            _active.discard(self)
+        if downstream is not None:
+            for _ in range(downstream.workers):
+                await downstream.put(DONE)
+
+
+async def feed(
+    name: str, source: AsyncIterable, downstream: Stage, size: Callable = len
+) -> None:
+    """Put every item of ``source`` into ``downstream``, then end it."""
+    start = time.perf_counter()
+    async for item in source:
+        _record(name, size(item), time.perf_counter() - start)
+        await downstream.put(item)
+        start = time.perf_counter()
+    for _ in range(downstream.workers):
+        await downstream.put(DONE)
@@ -0,0 +1,177 @@
+"""Per-chunk visibility, materialized from document_access.
+
+``chunks.visible_to`` holds the sorted ids of the users with access to the
+chunk's document, so retrieval filters with one GIN-indexed ``@>`` instead
+of going through document_access.
+
+Revocations fail closed: ``revoke`` removes the user from visible_to in
+the same transaction as the document_access delete, so no failure leaves a
+revoked user able to see the chunks.
+
+Grants may lag: they commit first and then call ``sync``, and so does a
+sync's chunk writing, for grants that committed while its chunks were in
+flight. Until then the new reader just doesn't see the chunks yet. Chunks
+get their document's list when they are written (``access_lists``).
+
+``sync`` reads document_access with FOR KEY SHARE in a short transaction
+of its own, so it and a revocation wait for each other rather than
+writing the user back. ``access_lists`` runs inside the long indexing
+transaction and takes no locks, which would block revocations until the
+next batch commit; a revocation that commits while those chunks are in
+flight misses them, and the sync after their commit removes the user.
+
+``python -m app.pipeline.visibility`` recomputes every chunk, e.g. after a
+crash between a grant's commit and its sync.
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+from collections.abc import Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.database import get_session_ctx
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+
+logger = logging.getLogger("uvicorn.error")
+
+# Documents per sync transaction
+SYNC_BATCH_SIZE = 1000
+
+stats = {"synced_documents": 0, "updated_chunks": 0, "revoked_chunks": 0}
+
+_SYNC = sa.text(
+    """
+    WITH locked AS (
+        SELECT document_id, user_id FROM document_access
+        WHERE document_id = ANY(:document_ids)
+        ORDER BY document_id, user_id
+        FOR KEY SHARE
+    )
+    UPDATE chunks SET visible_to = access.users
+    FROM (
+        SELECT ids.id, coalesce(
+            array_agg(a.user_id ORDER BY a.user_id) FILTER (WHERE a.user_id IS NOT NULL),
+            '{}'
+        ) AS users
+        FROM unnest(:document_ids) AS ids(id)
+        LEFT JOIN locked a ON a.document_id = ids.id
+        GROUP BY ids.id
+    ) AS access
+    WHERE chunks.document_id = access.id
+      AND chunks.visible_to IS DISTINCT FROM access.users
+    """
+).bindparams(sa.bindparam("document_ids", type_=ARRAY(PGUUID(as_uuid=True))))
+
+_REVOKE = sa.text(
+    """
+    UPDATE chunks SET visible_to = array_remove(visible_to, :user_id)
+    WHERE document_id = ANY(:document_ids)
+      AND visible_to @> ARRAY[:user_id]
+    """
+).bindparams(
+    sa.bindparam("user_id", type_=PGUUID(as_uuid=True)),
+    sa.bindparam("document_ids", type_=ARRAY(PGUUID(as_uuid=True))),
+)
+
+
+def metrics() -> dict:
+    return dict(stats)
+
+
+async def access_lists(
+    db: AsyncSession, document_ids: Iterable[uuid.UUID]
+) -> dict[uuid.UUID, list[uuid.UUID]]:
+    """The sorted ids of the users with access to each document, as of now
+    (no locks: revocations racing the caller are left to ``sync``)."""
+    document_ids = list(set(document_ids))
+    if not document_ids:
+        return {}
+    result = await db.execute(
+        select(DocumentAccess.document_id, DocumentAccess.user_id)
+        .where(
+            DocumentAccess.document_id == sa.any_(
+                sa.bindparam("document_ids", document_ids, type_=ARRAY(PGUUID(as_uuid=True)))
+            )
+        )
+        .order_by(DocumentAccess.document_id, DocumentAccess.user_id)
+    )
+    lists: dict[uuid.UUID, list[uuid.UUID]] = {}
+    for document_id, user_id in result:
+        lists.setdefault(document_id, []).append(user_id)
+    return lists
+
+
+async def revoke(
+    db: AsyncSession, user_id: uuid.UUID, document_ids: Iterable[uuid.UUID]
+) -> int:
+    """Remove ``user_id`` from the chunks of the given documents. Call it in
+    the transaction that deletes the user's document_access rows for them.
+    Returns the number of chunks changed."""
+    document_ids = list(set(document_ids))
+    if not document_ids:
+        return 0
+    result = await db.execute(_REVOKE, {"user_id": user_id, "document_ids": document_ids})
+    stats["revoked_chunks"] += result.rowcount
+    return result.rowcount
+
+
+async def sync(document_ids: Iterable[uuid.UUID]) -> int:
+    """Recompute visible_to for the chunks of the given documents from
+    document_access, in transactions of its own. Call it after the commit
+    that granted access or wrote their chunks. Returns the number of
+    chunks changed; chunks that are already right are not rewritten."""
+    document_ids = sorted(set(document_ids))
+    updated = 0
+    for i in range(0, len(document_ids), SYNC_BATCH_SIZE):
+        batch = document_ids[i : i + SYNC_BATCH_SIZE]
+        async with get_session_ctx() as db:
+            result = await db.execute(_SYNC, {"document_ids": batch})
+            await db.commit()
+        updated += result.rowcount
+    stats["synced_documents"] += len(document_ids)
+    stats["updated_chunks"] += updated
+    return updated
+
+
+async def rebuild(batch_size: int = SYNC_BATCH_SIZE) -> int:
+    """Sync every document, in id order. Returns the chunks changed."""
+    updated = 0
+    last_id = uuid.UUID(int=0)
+    while True:
+        async with get_session_ctx() as db:
+            document_ids = (
+                await db.execute(
+                    select(Document.id)
+                    .where(Document.id > last_id)
+                    .order_by(Document.id)
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+        if not document_ids:
+            break
+        updated += await sync(document_ids)
+        last_id = document_ids[-1]
+        logger.info(f"Visibility rebuild: up to document {last_id}, {updated} chunks changed")
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute chunks.visible_to from document_access"
+    )
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(rebuild(args.batch_size))
+    print(f"Updated {count} chunks")
+
+
+if __name__ == "__main__":
+    main()
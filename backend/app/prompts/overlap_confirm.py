@@ -1,3 +1,9 @@
+from app.services.tokenizer import truncate_tokens
+
+# Token budget for each document preview
+PREVIEW_TOKENS = 250
+
+
 def build_overlap_confirm_prompt(
     source_title: str | None,
     source_provider: str | None,
@@ -34,12 +40,12 @@ def build_overlap_confirm_prompt(
                 f"  Title: {source_title or 'Untitled'}\n"
                 f"  Source: {source_provider or 'unknown'}\n"
                 f"  Author: {source_author or 'Unknown'}\n"
-                f"  Preview:\n{source_preview[:1000]}\n\n"
+                f"  Preview:\n{truncate_tokens(source_preview, PREVIEW_TOKENS)}\n\n"
                 f"Document B:\n"
                 f"  Title: {target_title or 'Untitled'}\n"
                 f"  Source: {target_provider or 'unknown'}\n"
                 f"  Author: {target_author or 'Unknown'}\n"
-                f"  Preview:\n{target_preview[:1000]}"
+                f"  Preview:\n{truncate_tokens(target_preview, PREVIEW_TOKENS)}"
             ),
         },
     ]
@@ -1,14 +1,30 @@
-def build_rag_prompt(query: str, chunks: list[dict]) -> list[dict]:
+from app.services.tokenizer import count_tokens, truncate_tokens
+
+# Token budget for retrieved context; lower-ranked chunks are cut first
+MAX_CONTEXT_TOKENS = 6000
+
+
+def build_rag_prompt(
+    query: str, chunks: list[dict], max_context_tokens: int = MAX_CONTEXT_TOKENS
+) -> list[dict]:
     """Build the RAG prompt with retrieved context chunks."""
     context_parts = []
+    budget = max_context_tokens
     for i, chunk in enumerate(chunks):
+        if budget <= 0:
+            break
         meta = chunk.get("metadata", {})
         source = f"[{i + 1}] [{meta.get('provider', 'unknown')}] {meta.get('title', 'Untitled')}"
         if meta.get("author_name"):
             source += f" (by {meta['author_name']})"
         if meta.get("url"):
             source += f"\nURL: {meta['url']}"
-        context_parts.append(f"{source}\n{chunk['content']}")
+        part = f"{source}\n{chunk['content']}"
+        part_tokens = count_tokens(part)
+        if part_tokens > budget:
+            part = truncate_tokens(part, budget)
+        budget -= part_tokens
+        context_parts.append(part)
 
     context = "\n\n---\n\n".join(context_parts)
 
@@ -1,3 +1,10 @@
+from app.services.tokenizer import truncate_tokens
+
+# Token budgets for the user's own work and for each evidence snippet
+CONTENT_TOKENS = 2000
+SNIPPET_TOKENS = 50
+
+
 def build_scan_prompt(content: str, chunks: list[dict]) -> list[dict]:
     """Build prompt for scan overlap analysis."""
     context_parts = []
@@ -6,7 +13,9 @@ def build_scan_prompt(content: str, chunks: list[dict]) -> list[dict]:
         source = f"[{meta.get('provider', 'unknown')}] {meta.get('title', 'Untitled')}"
         if meta.get("author_name"):
             source += f" by {meta['author_name']}"
-        context_parts.append(f"- {source}: {chunk['content'][:200]}")
+        context_parts.append(
+            f"- {source}: {truncate_tokens(chunk['content'], SNIPPET_TOKENS)}"
+        )
 
     context = "\n".join(context_parts)
 
@@ -28,7 +37,7 @@ def build_scan_prompt(content: str, chunks: list[dict]) -> list[dict]:
         {
             "role": "user",
             "content": (
-                f"My current work:\n{content}\n\n"
+                f"My current work:\n{truncate_tokens(content, CONTENT_TOKENS)}\n\n"
                 f"Related evidence from connected tools:\n{context}"
             ),
         },
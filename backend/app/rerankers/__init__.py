@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from app.config import settings
+from app.rerankers.base import Reranker
+
+logger = logging.getLogger("uvicorn.error")
+
+_reranker: Reranker | None = None
+
+stats = {"reranked": 0, "timeouts": 0, "errors": 0, "cache_hits": 0, "cache_misses": 0}
+
+
+def metrics() -> dict:
+    return dict(stats)
+
+
+def get_reranker() -> Reranker | None:
+    """Process-wide reranker chosen by ``settings.reranker``; None for "none"."""
+    global _reranker
+    if _reranker is None and settings.reranker != "none":
+        if settings.reranker == "llm":
+            from app.rerankers.llm_reranker import LLMReranker
+
+            _reranker = LLMReranker()
+        elif settings.reranker == "cross_encoder":
+            from app.rerankers.cross_encoder_reranker import CrossEncoderReranker
+
+            _reranker = CrossEncoderReranker()
+        else:
+            raise ValueError(f"Unknown reranker: {settings.reranker}")
+    return _reranker
+
+
+def shutdown_reranker() -> None:
+    global _reranker
+    if _reranker is not None:
+        _reranker.close()
+        _reranker = None
+
+
+async def rerank(query: str, candidates: list[dict], top_k: int) -> list[dict]:
+    """The top ``top_k`` of ``candidates`` as ordered by the configured
+    reranker. Falls back to their fused order if the reranker fails or takes
+    longer than ``rerank_budget_seconds``."""
+    reranker = get_reranker()
+    if reranker is None or len(candidates) <= top_k:
+        return candidates[:top_k]
+
+    budget = settings.rerank_budget_seconds or None
+    try:
+        async with asyncio.timeout(budget):
+            ranked = await reranker.rerank(query, candidates, top_k)
+    except TimeoutError:
+        stats["timeouts"] += 1
+        logger.warning(f"Reranking took over {budget}s, falling back to RRF order")
+        return candidates[:top_k]
+    except Exception:
+        stats["errors"] += 1
+        logger.exception("Reranking failed, falling back to RRF order")
+        return candidates[:top_k]
+    stats["reranked"] += 1
+    return ranked
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+
+
+class Reranker(ABC):
+    """Base class for rerankers.
+
+    Candidates are hybrid search results in fused (RRF) order, each with
+    ``chunk_id`` and ``content``.
+    """
+
+    @abstractmethod
+    async def rerank(self, query: str, candidates: list[dict], top_k: int) -> list[dict]:
+        """Return the ``top_k`` candidates most relevant to ``query``, most
+        relevant first."""
+        ...
+
+    def close(self) -> None:
+        """Release workers or connections held by the reranker."""
@@ -0,0 +1,109 @@
+"""Local CPU reranking with a sentence-transformers cross-encoder, in place
+of a chat completion per search.
+
+Optional dependency: the ``local-models`` extra
+(``pip install -e '.[local-models]'``). The model is loaded once and
+scores (query, passage) pairs in batches on a thread pool; torch releases
+the GIL while it runs, so the event loop keeps serving and the threads
+share one copy of the model.
+
+Scores are cached per (query, chunk id). A chunk's content never changes
+under its id (re-indexing only keeps ids for identical content), so entries
+are evicted by size only.
+"""
+import asyncio
+import collections
+import importlib.util
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.pipeline.embedding_cache import text_hash
+from app.rerankers import stats
+from app.rerankers.base import Reranker
+
+
+class CrossEncoderReranker(Reranker):
+    """sentence-transformers CrossEncoder running in a thread pool."""
+
+    def __init__(self):
+        if importlib.util.find_spec("sentence_transformers") is None:
+            raise RuntimeError(
+                "reranker 'cross_encoder' needs sentence-transformers: "
+                "pip install -e '.[local-models]'"
+            )
+        self.batch_size = settings.cross_encoder_batch_size
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.cross_encoder_workers),
+            thread_name_prefix="cross-encoder",
+        )
+        self._model = None
+        self._model_lock = threading.Lock()
+        # (query hash, chunk id) -> score, least recently used first
+        self._scores: collections.OrderedDict[tuple[bytes, uuid.UUID], float] = (
+            collections.OrderedDict()
+        )
+
+    def _predict(self, pairs: list[tuple[str, str]]) -> list[float]:
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(
+                    settings.cross_encoder_model,
+                    device="cpu",
+                    max_length=settings.cross_encoder_max_length,
+                )
+        return self._model.predict(
+            pairs, batch_size=self.batch_size, convert_to_numpy=True
+        ).tolist()
+
+    def _store(self, keys: list[tuple], scoring: asyncio.Future) -> None:
+        if scoring.cancelled() or scoring.exception() is not None:
+            return
+        scores = [score for part in scoring.result() for score in part]
+        for key, score in zip(keys, scores):
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+        while len(self._scores) > settings.rerank_cache_size:
+            self._scores.popitem(last=False)
+
+    async def rerank(self, query: str, candidates: list[dict], top_k: int) -> list[dict]:
+        h = text_hash(query)
+        scores: dict[uuid.UUID, float] = {}
+        missing = []
+        for c in candidates:
+            key = (h, c["chunk_id"])
+            if key in self._scores:
+                self._scores.move_to_end(key)
+                scores[c["chunk_id"]] = self._scores[key]
+            else:
+                missing.append(c)
+        stats["cache_hits"] += len(candidates) - len(missing)
+        stats["cache_misses"] += len(missing)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            scoring = asyncio.gather(*(
+                loop.run_in_executor(
+                    self._pool,
+                    self._predict,
+                    [(query, c["content"]) for c in missing[i : i + self.batch_size]],
+                )
+                for i in range(0, len(missing), self.batch_size)
+            ))
+            # Scores that arrive after the latency budget ran out still fill
+            # the cache, so a repeat of the query is served in budget
+            keys = [(h, c["chunk_id"]) for c in missing]
+            scoring.add_done_callback(lambda f: self._store(keys, f))
+            parts = await asyncio.shield(scoring)
+            fresh = [score for part in parts for score in part]
+            for c, score in zip(missing, fresh):
+                scores[c["chunk_id"]] = score
+
+        # Stable: equal scores keep their fused order
+        return sorted(candidates, key=lambda c: scores[c["chunk_id"]], reverse=True)[:top_k]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,67 @@
+"""Reranking by the chat model: one completion per search, so it adds a full
+round trip (often over a second) to /api/chat and /api/scan."""
+import json
+import logging
+
+from app.config import settings
+from app.rerankers.base import Reranker
+from app.services.openai_client import get_openai, with_backoff
+from app.services.tokenizer import truncate_tokens
+
+logger = logging.getLogger("uvicorn.error")
+
+# Token budget per passage shown to the model
+RERANK_PASSAGE_TOKENS = 80
+
+
+class LLMReranker(Reranker):
+    """``llm_model`` returns the candidates' indices sorted by relevance."""
+
+    async def rerank(self, query: str, candidates: list[dict], top_k: int) -> list[dict]:
+        numbered = "\n".join(
+            f"[{i}] {truncate_tokens(c['content'], RERANK_PASSAGE_TOKENS)}"
+            for i, c in enumerate(candidates)
+        )
+
+        client = get_openai()
+        response = await with_backoff(
+            client.chat.completions.create,
+            model=settings.llm_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You are a relevance scorer. Given a query and numbered passages, "
+                        "return a JSON array of the passage indices sorted by relevance "
+                        "(most relevant first). Only return the JSON array, nothing else. "
+                        "Example: [3, 0, 7, 1, 5, 2]"
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": f"Query: {query}\n\nPassages:\n{numbered}",
+                },
+            ],
+            temperature=0.0,
+        )
+
+        try:
+            content = response.choices[0].message.content or "[]"
+            # Strip markdown code fences if present
+            content = content.strip()
+            if content.startswith("```"):
+                content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
+            ranking = json.loads(content)
+            reranked = []
+            for idx in ranking:
+                if isinstance(idx, int) and 0 <= idx < len(candidates):
+                    reranked.append(candidates[idx])
+            # Add any candidates missed by LLM
+            seen = set(ranking)
+            for i, c in enumerate(candidates):
+                if i not in seen:
+                    reranked.append(c)
+            return reranked[:top_k]
+        except (json.JSONDecodeError, TypeError, KeyError):
+            logger.warning("LLM reranking failed, falling back to RRF order")
+            return candidates[:top_k]
@@ -39,3 +39,4 @@ class IngestStatusResponse(BaseModel):
     status: str
     last_synced_at: datetime.datetime | None
     error_message: str | None
+    progress: dict | None = None
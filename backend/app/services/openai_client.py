@@ -23,12 +23,83 @@ MAX_RETRY_TIME = 30.0
 def get_openai() -> AsyncOpenAI:
     global _client
     if _client is None:
-        _client = AsyncOpenAI(api_key=settings.openai_api_key)
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+        )
     return _client
 
 
-async def with_backoff(fn, *args, **kwargs):
-    """Retry wrapper with exponential backoff (from ethelflow pattern)."""
+def _retry_after(e: Exception) -> float | None:
+    """Seconds the server asked us to wait, from the Retry-After headers."""
+    response = getattr(e, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class AdaptiveLimiter:
+    """Caps concurrent requests, shrinking the cap on rate limits.
+
+    Works like a semaphore whose size can change: each 429 halves the limit
+    and pauses new requests for the server's Retry-After, and the limit grows
+    back by one after every ``limit`` successful requests. ``asyncio.Semaphore``
+    can't be resized, hence the condition variable.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        delay = self._resume_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self._in_flight -= 1
+            if exc_type is None:
+                self._successes += 1
+                if self.limit < self.max_concurrency and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def on_retry(self, e: Exception, delay: float) -> None:
+        """``with_backoff`` hook: back off the whole pool, not just one call."""
+        if getattr(e, "status_code", None) != 429:
+            return
+        now = asyncio.get_running_loop().time()
+        # Requests in flight together tend to fail together; count that burst
+        # as one signal rather than halving once per request
+        if now >= self._resume_at:
+            self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        self._resume_at = max(self._resume_at, now + delay)
+
+
+async def with_backoff(fn, *args, on_retry=None, **kwargs):
+    """Retry wrapper with exponential backoff (from ethelflow pattern).
+
+    A Retry-After header on the error takes precedence over the computed
+    delay. ``on_retry(error, delay)`` is called before each retry sleep.
+    """
     for attempt in range(MAX_RETRIES):
         try:
             return await fn(*args, **kwargs)
@@ -38,6 +109,9 @@ async def with_backoff(fn, *args, **kwargs):
                 raise
 
             backoff_delay = BASE_DELAY * (2**attempt) + random.uniform(0, 0.5)
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                backoff_delay = retry_after + random.uniform(0, 0.5)
             delay = min(backoff_delay, MAX_RETRY_TIME)
 
             if attempt == MAX_RETRIES - 1:
@@ -47,6 +121,8 @@ async def with_backoff(fn, *args, **kwargs):
                 f"Rate limit or transient error (HTTP {status_code}), "
                 f"retrying in {delay:.2f}s (attempt {attempt + 1}/{MAX_RETRIES})..."
             )
+            if on_retry is not None:
+                on_retry(e, delay)
             await asyncio.sleep(delay)
         except Exception:
             raise
@@ -0,0 +1,52 @@
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# First guess at the prefix holding max_tokens tokens, so huge inputs aren't
+# encoded in full when only a short prefix is kept. Not a bound: runs of
+# whitespace, "=" or "-" make tokens much longer, so the prefix is widened
+# until it holds enough tokens.
+_PREFIX_CHARS_PER_TOKEN = 8
+
+_encoders: dict[str, tiktoken.Encoding] = {}
+
+
+def get_encoding(name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """Return the process-wide encoder, loading its BPE ranks on first use."""
+    enc = _encoders.get(name)
+    if enc is None:
+        enc = _encoders[name] = tiktoken.get_encoding(name)
+    return enc
+
+
+def warm_up(names: tuple[str, ...] = (DEFAULT_ENCODING,)) -> None:
+    """Load encoders ahead of time so no request pays for BPE file loading."""
+    for name in names:
+        get_encoding(name)
+
+
+def count_tokens(text: str, name: str = DEFAULT_ENCODING) -> int:
+    """Number of tokens in ``text``; special-token markers count as plain text."""
+    return len(get_encoding(name).encode_ordinary(text))
+
+
+def truncate_tokens(
+    text: str, max_tokens: int, name: str = DEFAULT_ENCODING
+) -> str:
+    """Cut ``text`` down to at most ``max_tokens`` tokens, at a character
+    boundary."""
+    enc = get_encoding(name)
+    limit = max(max_tokens, 1) * _PREFIX_CHARS_PER_TOKEN
+    while True:
+        tokens = enc.encode_ordinary(text[:limit])
+        if len(tokens) > max_tokens:
+            # A cut inside a multi-byte character would decode to U+FFFD,
+            # which re-encodes to more tokens; drop the partial character,
+            # and cut again in case the shorter text tokenizes differently
+            while len(tokens) > max_tokens:
+                text = enc.decode_bytes(tokens[:max_tokens]).decode("utf-8", errors="ignore")
+                tokens = enc.encode_ordinary(text)
+            return text
+        if limit >= len(text):
+            return text
+        limit *= 4
@@ -0,0 +1,80 @@
+"""Chunk insertion: ORM objects vs. binary COPY.
+
+Inserts N chunk rows with random embeddings of the configured size, once
+per path, and reports rows/s and client CPU per row. The CPU figure is
+process time, so it includes SQLAlchemy and encoding but not the server.
+Everything runs inside a transaction that is rolled back.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunk_insert [--rows 20000]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.user import User
+from app.pipeline.indexer import _write_chunks
+
+
+def make_rows(n: int, document_id: uuid.UUID, user_id: uuid.UUID) -> list[dict]:
+    rng = random.Random(0)
+    return [
+        {
+            "document_id": document_id,
+            "user_id": user_id,
+            "chunk_index": i,
+            "content": f"chunk {i} " + "lorem ipsum dolor sit amet " * 60,
+            "token_count": 400,
+            "embedding": [rng.uniform(-0.1, 0.1) for _ in range(settings.embedding_dimensions)],
+            "metadata": {"char_start": i * 1600, "char_end": (i + 1) * 1600},
+        }
+        for i in range(n)
+    ]
+
+
+async def run(n: int) -> None:
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-insert-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        connector = Connector(user_id=user.id, provider="slack")
+        db.add(connector)
+        await db.flush()
+        doc = Document(
+            user_id=user.id, connector_id=connector.id, provider="slack",
+            external_id=f"bench-{uuid.uuid4().hex}", content_type="message",
+        )
+        db.add(doc)
+        await db.flush()
+
+        rows = make_rows(n, doc.id, user.id)
+        print(f"{n} rows, {settings.embedding_dimensions}-d {settings.embedding_storage}")
+        print(f"{'path':<8} {'time':>8} {'rows/s':>9} {'CPU us/row':>11}")
+
+        for label, threshold in (("orm", n + 1), ("copy", 0)):
+            settings.chunk_copy_min_rows = threshold
+            wall, cpu = time.perf_counter(), time.process_time()
+            await _write_chunks(db, rows)
+            await db.flush()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            print(f"{label:<8} {wall:>7.2f}s {n / wall:>9.0f} {cpu / n * 1e6:>11.1f}")
+            db.expunge_all()
+
+        await db.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    asyncio.run(run(parser.parse_args().rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Peak memory of whole-document chunking vs the streaming chunk generator.
+
+The streaming path consumes chunks in windows the way index_documents does
+for huge documents and drops each window before pulling the next, so its
+peak should track the window and buffer sizes, not the document size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunk_memory --sizes 10 50 --window 64
+"""
+import argparse
+import gc
+import tracemalloc
+
+from app.pipeline.chunker import (
+    chunk_structured,
+    iter_chunks,
+    iter_text_pieces,
+    next_window,
+)
+from benchmarks.bench_chunker import make_text
+
+
+def peak_mb(fn) -> tuple[float, int]:
+    gc.collect()
+    tracemalloc.start()
+    n_chunks = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, n_chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[10, 50])
+    parser.add_argument("--window", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'whole (MB)':>11} {'stream (MB)':>12} {'chunks':>8}")
+    for size in args.sizes:
+        text = make_text(size)
+
+        def whole() -> int:
+            return len(chunk_structured(text, "file"))
+
+        def stream() -> int:
+            chunks = iter_chunks(iter_text_pieces(text), "file")
+            total = 0
+            while window := next_window(chunks, args.window):
+                total += len(window)
+            return total
+
+        whole_mb, n_whole = peak_mb(whole)
+        stream_mb, n_stream = peak_mb(stream)
+        print(f"{size:>4.0f}MB {whole_mb:>11.1f} {stream_mb:>12.1f} {n_stream:>8} (whole: {n_whole})")
+
+
+if __name__ == "__main__":
+    main()
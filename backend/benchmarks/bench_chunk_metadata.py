@@ -0,0 +1,163 @@
+"""Chunk metadata: copied into every chunk vs. kept on the document.
+
+Seeds D documents of C chunks each, with connector-like metadata, twice:
+once with the old layout (document fields copied into every chunk's
+metadata) and once with the current one (chunk offsets only). It reports
+how much each insert grew the chunks table. Embeddings are left NULL so
+that only the metadata differs between the two layouts.
+
+It then compares the metadata one search ships. hybrid_search fetches K
+candidates (vector + FTS) and returns the top_k of them. The old layout
+returned full metadata with every candidate. The current one returns the
+small chunk fields for the candidates, then one document row per distinct
+document among the top_k results, fetched the way hybrid_search hydrates
+them.
+
+Everything runs in a transaction that is rolled back.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunk_metadata [--documents 200] [--chunks 50]
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+
+import sqlalchemy as sa
+
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.user import User
+from app.pipeline.pg_copy import copy_chunks
+from app.pipeline.retriever import _document_metadata
+
+PROVIDER = "google_drive"
+CHUNK_CHARS = 1600
+
+
+def _doc_metadata(doc: Document) -> dict:
+    """The dict the indexer used to copy into each chunk."""
+    return {
+        "title": doc.title,
+        "url": doc.url,
+        "author_name": doc.author_name,
+        "author_email": doc.author_email,
+        "provider": doc.provider,
+        "content_type": doc.content_type,
+        "source_created_at": doc.source_created_at,
+        **doc.metadata_,
+    }
+
+
+def make_documents(n: int, user_id: uuid.UUID, connector_id: uuid.UUID) -> list[Document]:
+    return [
+        Document(
+            user_id=user_id,
+            connector_id=connector_id,
+            provider=PROVIDER,
+            external_id=f"bench-{uuid.uuid4().hex}",
+            title=f"Q{i % 4 + 1} planning notes — platform team ({i})",
+            url=f"https://docs.google.com/document/d/{uuid.uuid4().hex}{uuid.uuid4().hex}/edit",
+            author_name=f"Author {i % 30}",
+            author_email=f"author{i % 30}@example.com",
+            content_type="google_doc",
+            metadata_={
+                "file_id": uuid.uuid4().hex + uuid.uuid4().hex[:12],
+                "mime_type": "application/vnd.google-apps.document",
+                "folder_id": uuid.uuid4().hex[:28],
+                "folder_name": "Engineering / Planning",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def chunk_rows(docs: list[Document], per_doc: int, legacy: bool) -> list[dict]:
+    rows = []
+    for doc in docs:
+        doc_meta = _doc_metadata(doc)
+        for i in range(per_doc):
+            rows.append({
+                "document_id": doc.id,
+                "user_id": doc.user_id,
+                "chunk_index": i,
+                "content": f"chunk {i} " + "lorem ipsum dolor sit amet " * 60,
+                "token_count": 400,
+                "embedding": None,
+                "metadata": (
+                    doc_meta if legacy
+                    else {"char_start": i * CHUNK_CHARS, "char_end": (i + 1) * CHUNK_CHARS}
+                ),
+                "visible_to": [doc.user_id],
+            })
+    return rows
+
+
+async def _table_size(db) -> int:
+    await db.execute(sa.text("SELECT 1"))
+    return (await db.execute(
+        sa.text("SELECT pg_total_relation_size('chunks')")
+    )).scalar_one()
+
+
+def _json_bytes(value) -> int:
+    return len(json.dumps(value, default=str))
+
+
+async def run(n_docs: int, per_doc: int, candidates: int, top_k: int) -> None:
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-meta-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        connector = Connector(user_id=user.id, provider=PROVIDER)
+        db.add(connector)
+        await db.flush()
+        docs = make_documents(n_docs, user.id, connector.id)
+        db.add_all(docs)
+        await db.flush()
+
+        n = n_docs * per_doc
+        print(f"{n_docs} documents x {per_doc} chunks = {n} chunks")
+        print(f"{'layout':<16} {'table growth':>13} {'bytes/chunk':>12}")
+        sizes = {}
+        for label, legacy in (("per-chunk copy", True), ("per-document", False)):
+            before = await _table_size(db)
+            await copy_chunks(db, chunk_rows(docs, per_doc, legacy))
+            sizes[label] = await _table_size(db) - before
+            print(f"{label:<16} {sizes[label] / 2**20:>11.1f}MB {sizes[label] / n:>12.0f}")
+        print(f"reduction: {1 - sizes['per-document'] / sizes['per-chunk copy']:.0%}")
+
+        # Metadata shipped for one search: candidates, then top_k results
+        rng = random.Random(0)
+        hits = rng.sample([(d, i) for d in docs for i in range(per_doc)], candidates)
+        legacy = sum(_json_bytes(_doc_metadata(d)) for d, _ in hits)
+        chunk_fields = sum(
+            _json_bytes({"char_start": i * CHUNK_CHARS, "char_end": (i + 1) * CHUNK_CHARS})
+            for _, i in hits
+        )
+        hydrated = await _document_metadata(db, list({d.id for d, _ in hits[:top_k]}))
+        # + a 16-byte document_id per candidate
+        current = chunk_fields + 16 * candidates + sum(map(_json_bytes, hydrated.values()))
+        print(f"\nmetadata for {candidates} candidates, top {top_k} "
+              f"({len(hydrated)} distinct documents) hydrated")
+        print(f"{'per-chunk copy':<16} {legacy:>8} bytes")
+        print(f"{'per-document':<16} {current:>8} bytes  ({1 - current / legacy:.0%} less)")
+
+        await db.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=80)
+    parser.add_argument("--top-k", type=int, default=6)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.chunks, args.candidates, args.top_k))
+
+
+if __name__ == "__main__":
+    main()
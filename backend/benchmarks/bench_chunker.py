@@ -0,0 +1,63 @@
+"""Compare the decode-per-window chunker with the offset-slicing chunker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunker --sizes 1 10 50
+"""
+import argparse
+import random
+import time
+
+from app.pipeline.chunker import chunk_text, chunk_text_with_offsets
+
+_WORDS = (
+    "the sync pipeline embeds every chunk before search can see it "
+    "naïve café résumé 東京 データ ✓ 🚀 def fn(x): return x * 2 "
+    "OAuth token refresh failed for connector retrying in 5s"
+).split()
+
+
+def make_text(size_mb: float, seed: int = 0) -> str:
+    """Deterministic mixed ASCII / multi-byte text of roughly ``size_mb`` MB."""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts: list[str] = []
+    length = 0
+    while length < target:
+        line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 25)))
+        parts.append(line)
+        length += len(line.encode()) + 1
+    return "\n".join(parts)
+
+
+def _time(fn, text: str) -> tuple[float, list[dict]]:
+    start = time.perf_counter()
+    chunks = fn(text)
+    return time.perf_counter() - start, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'chunks':>8} {'decode (s)':>11} {'offsets (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        text = make_text(size)
+        decode_s, decoded = _time(chunk_text, text)
+        offsets_s, sliced = _time(chunk_text_with_offsets, text)
+
+        assert len(decoded) == len(sliced)
+        for a, b in zip(decoded, sliced):
+            assert a["token_count"] == b["token_count"]
+            assert b["content"] == text[b["char_start"]:b["char_end"]]
+            if "�" not in a["content"]:
+                assert a["content"] == b["content"]
+
+        print(
+            f"{size:>4.0f}MB {len(sliced):>8} {decode_s:>11.3f} "
+            f"{offsets_s:>12.3f} {decode_s / offsets_s:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
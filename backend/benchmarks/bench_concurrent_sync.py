@@ -0,0 +1,102 @@
+"""Concurrent syncs of the same source: embedding spend and failures.
+
+Several users sync the same pages (a shared Slack channel or GitHub repo)
+at the same time. Before document claims, every sync that passed the
+existence check embedded the same documents, and all but one then failed on
+uq_documents_provider_external. This reports, for one sync alone and for N
+concurrent ones, the texts sent to the embeddings API, the syncs that
+failed, and the documents each user can access. With claims, the concurrent
+run embeds what the single sync does.
+
+Embeddings come from the in-process fake OpenAI server, with the embedding
+cache disabled so it cannot hide duplicate work. Scratch users are deleted
+afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_concurrent_sync [--users 4] [--pages 10]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import sqlalchemy as sa
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.embeddings import shutdown_embedding_backend
+from app.models.document_access import DocumentAccess
+from app.models.user import User
+from app.pipeline.indexer import index_documents
+from app.services import openai_client
+from benchmarks.bench_ingest_pipeline import PROVIDER, _make_user, fake_pages
+from benchmarks.fake_openai import create_app, serve
+
+
+async def _sync(user_id, connector_id, args, namespace: str) -> int:
+    pages = fake_pages(args.pages, args.page_size, args.page_latency, args.words, namespace)
+    async with get_session_ctx() as db:
+        await index_documents(db, user_id, connector_id, PROVIDER, pages)
+    async with get_session_ctx() as db:
+        return (await db.execute(
+            sa.select(sa.func.count()).where(DocumentAccess.user_id == user_id)
+        )).scalar_one()
+
+
+async def run(args) -> None:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    settings.embedding_cache_enabled = False
+    app = create_app(base_latency=args.latency, dimensions=settings.embedding_dimensions)
+    base_url, server = serve(app, args.port)
+    settings.openai_base_url = base_url
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+    users = []
+    try:
+        print(f"{args.pages} pages x {args.page_size} documents")
+        print(f"{'syncs':>5} {'time':>8} {'texts embedded':>15} {'failed':>7} {'access/user':>12}")
+        for n in (1, args.users):
+            accounts = []
+            async with get_session_ctx() as db:
+                for _ in range(n):
+                    accounts.append(await _make_user(db, "concurrent"))
+                await db.commit()
+            users.extend(user_id for user_id, _ in accounts)
+
+            namespace = uuid.uuid4().hex[:8]
+            before = app.state.inputs
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(_sync(user_id, connector_id, args, namespace) for user_id, connector_id in accounts),
+                return_exceptions=True,
+            )
+            elapsed = time.perf_counter() - start
+            failed = [r for r in results if isinstance(r, BaseException)]
+            access = sorted({r for r in results if not isinstance(r, BaseException)})
+            print(f"{n:>5} {elapsed:>7.2f}s {app.state.inputs - before:>15} "
+                  f"{len(failed):>7} {'/'.join(map(str, access)) or '-':>12}")
+            for e in failed:
+                print(f"      {type(e).__name__}: {e}")
+    finally:
+        server.should_exit = True
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_(users)))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--page-latency", type=float, default=0.1)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--port", type=int, default=8767)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
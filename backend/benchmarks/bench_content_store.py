@@ -0,0 +1,107 @@
+"""Raw content: inline TEXT vs. the zstd content store.
+
+Builds D documents from the repo's own markdown and source files (the
+corpus bench_structured_chunker uses, a few files per document with a
+per-document header so every document is distinct) and stores them twice: once inline, as before,
+and once with ``content_store = "db"``. For each mode it reports how much
+documents + content_blobs grew and the time spent preparing and inserting
+the documents, i.e. what the store adds to a sync.
+
+Everything runs in a transaction that is rolled back.
+
+Usage (from backend/):
+    python -m benchmarks.bench_content_store [--documents 2000] [--files-per-doc 4]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import sqlalchemy as sa
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.user import User
+from app.pipeline import content_store
+from app.pipeline.indexer import _new_document
+from benchmarks.bench_structured_chunker import load_corpus
+
+PROVIDER = "google_drive"
+
+
+def make_documents(n: int, files_per_doc: int) -> list[dict]:
+    """Each document concatenates files_per_doc corpus entries, like an
+    exported multi-section Drive file."""
+    corpus = [text for _, text in load_corpus()]
+    return [
+        {
+            "external_id": f"bench-{uuid.uuid4().hex}",
+            "title": f"Exported file {i}",
+            "content_type": "file",
+            "raw_content": f"Exported file {i}\n\n" + "\n\n".join(
+                corpus[(i + j) % len(corpus)] for j in range(files_per_doc)
+            ),
+        }
+        for i in range(n)
+    ]
+
+
+async def _size(db) -> int:
+    return (await db.execute(sa.text(
+        "SELECT pg_total_relation_size('documents') + pg_total_relation_size('content_blobs')"
+    ))).scalar_one()
+
+
+async def run(n_docs: int, files_per_doc: int) -> None:
+    documents = make_documents(n_docs, files_per_doc)
+    raw = sum(len(d["raw_content"].encode()) for d in documents)
+    large = sum(len(d["raw_content"]) >= settings.content_store_min_chars for d in documents)
+    print(f"{n_docs} documents, {raw / 2**20:.1f}MB raw, "
+          f"{large} at or above {settings.content_store_min_chars} chars")
+    print(f"{'mode':<8} {'disk growth':>12} {'insert':>9} {'per doc':>9}")
+
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-content-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        connector = Connector(user_id=user.id, provider=PROVIDER)
+        db.add(connector)
+        await db.flush()
+
+        for mode in ("", "db"):
+            settings.content_store = mode
+            before = await _size(db)
+            start = time.perf_counter()
+            docs = [
+                _new_document(
+                    user.id, connector.id, PROVIDER,
+                    {**d, "external_id": f"{d['external_id']}-{mode or 'inline'}"},
+                )
+                for d in documents
+            ]
+            await content_store.offload(db, docs)
+            db.add_all(docs)
+            await db.flush()
+            elapsed = time.perf_counter() - start
+            growth = await _size(db) - before
+            print(f"{mode or 'inline':<8} {growth / 2**20:>10.1f}MB {elapsed:>8.2f}s "
+                  f"{elapsed / n_docs * 1000:>7.2f}ms")
+            db.expunge_all()
+
+        m = content_store.metrics()
+        print(f"\nstore: {m['stored']} blobs, compression ratio {m['ratio']:.2f}")
+        await db.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--files-per-doc", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.files_per_doc))
+
+
+if __name__ == "__main__":
+    main()
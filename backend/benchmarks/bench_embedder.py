@@ -0,0 +1,114 @@
+"""Embedding throughput: fixed serial batches vs. token-packed concurrent ones.
+
+Runs against the in-process fake OpenAI server (see ``fake_openai``), so the
+numbers reflect request scheduling, not the real API. The cache is disabled,
+and vectors are kept small so JSON encoding in the fake server (which shares
+this process) doesn't become the bottleneck.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedder [--texts 5000] [--latency 0.15]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.config import settings
+from app.embeddings import shutdown_embedding_backend
+from app.pipeline import embedder
+from app.services import openai_client
+from app.services.openai_client import get_openai, with_backoff
+from benchmarks.fake_openai import create_app, serve
+
+WORDS = (
+    "sync connector document chunk overlap embedding retriever token "
+    "session index query issue pull request review channel thread"
+).split()
+
+
+def make_texts(n: int, seed: int = 0) -> list[str]:
+    """Chunk-sized texts of 100-500 words, each unique."""
+    rng = random.Random(seed)
+    return [
+        f"{i} " + " ".join(rng.choices(WORDS, k=rng.randint(100, 500)))
+        for i in range(n)
+    ]
+
+
+async def serial_fixed_batches(texts: list[str], batch_size: int = 100):
+    """The previous strategy: batches of 100 texts, one request at a time."""
+    client = get_openai()
+    out = []
+    for i in range(0, len(texts), batch_size):
+        response = await with_backoff(
+            client.embeddings.create,
+            input=texts[i : i + batch_size],
+            model=settings.embedding_model,
+        )
+        out.extend(item.embedding for item in response.data)
+    return out
+
+
+def _reset(base_url: str, concurrency: int) -> None:
+    settings.openai_base_url = base_url
+    settings.embedding_max_concurrency = concurrency
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+
+async def _timed(label: str, coro, n: int, app) -> None:
+    before = app.state.rate_limited
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    assert len(result) == n
+    print(
+        f"{label:<34} {elapsed:>7.2f}s {n / elapsed:>9.0f} texts/s "
+        f"{app.state.rate_limited - before:>6} 429s"
+    )
+
+
+async def run(args) -> None:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    settings.embedding_cache_enabled = False
+    texts = make_texts(args.texts)
+    counts = [len(t) // 4 for t in texts]
+
+    for rps, port in ((0, args.port), (args.rps, args.port + 1)):
+        app = create_app(
+            base_latency=args.latency, requests_per_second=rps, dimensions=16
+        )
+        base_url, server = serve(app, port)
+        print(f"\n{len(texts)} texts, latency {args.latency}s, "
+              f"rate limit {rps or 'none'} req/s")
+        print(f"{'strategy':<34} {'time':>8} {'throughput':>15} {'rate limited':>11}")
+
+        _reset(base_url, 1)
+        await _timed("serial, 100 per batch", serial_fixed_batches(texts), len(texts), app)
+
+        settings.embedding_batch_max_tokens = args.batch_tokens
+        for concurrency in (1, 4, 8):
+            _reset(base_url, concurrency)
+            await _timed(
+                f"packed {args.batch_tokens} tok, {concurrency} in flight",
+                embedder.embed_texts(texts, counts),
+                len(texts),
+                app,
+            )
+        server.should_exit = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument(
+        "--batch-tokens", type=int, default=settings.embedding_batch_max_tokens
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
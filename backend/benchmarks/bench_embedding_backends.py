@@ -0,0 +1,140 @@
+"""Throughput and retrieval quality of the embedding backends.
+
+The fixture corpus is the repo's own files, chunked like synced documents
+(see ``bench_structured_chunker``). The quality task finds a chunk again
+from a ~30-word passage taken out of its middle. It reports hit@1, hit@10
+and MRR for each backend, then the local-minus-OpenAI delta.
+
+Throughput embeds the whole corpus after a warm-up call, bypassing the
+embedding cache. For the local backend it is also divided by the cores the
+pool uses. OpenAI is network-bound, so its per-core figure isn't meaningful.
+
+The OpenAI backend needs CONNECTIVE_OPENAI_API_KEY. The local backend needs
+the local-models extra, and CONNECTIVE_EMBEDDING_DIMENSIONS is overridden to
+--local-dims for it.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_backends [--backends openai local]
+        [--workers 1 2 4] [--queries 200]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+
+from app.config import settings
+from app.embeddings.base import EmbeddingBackend
+from app.pipeline.chunker import chunk_structured
+from benchmarks.bench_structured_chunker import load_corpus
+
+QUERY_WORDS = 30
+
+
+def load_task(n_queries: int, seed: int = 0) -> tuple[list[str], list[str], list[int]]:
+    """Return (chunks, queries, index of each query's source chunk)."""
+    chunks = [
+        c["content"]
+        for content_type, body in load_corpus()
+        for c in chunk_structured(body, content_type)
+    ]
+    rng = random.Random(seed)
+    candidates = [i for i, c in enumerate(chunks) if len(c.split()) >= QUERY_WORDS * 2]
+    targets = rng.sample(candidates, min(n_queries, len(candidates)))
+    queries = []
+    for i in targets:
+        words = chunks[i].split()
+        start = rng.randrange(len(words) // 4, len(words) - QUERY_WORDS)
+        queries.append(" ".join(words[start : start + QUERY_WORDS]))
+    return chunks, queries, targets
+
+
+def _normalized(v: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norm for x in v]
+
+
+def retrieval_quality(
+    chunk_vecs: list[list[float]], query_vecs: list[list[float]], targets: list[int]
+) -> dict:
+    chunk_vecs = [_normalized(v) for v in chunk_vecs]
+    hit1 = hit10 = rr = 0.0
+    for q, target in zip(query_vecs, targets):
+        q = _normalized(q)
+        scores = [sum(a * b for a, b in zip(q, c)) for c in chunk_vecs]
+        rank = 1 + sum(1 for s in scores if s > scores[target])
+        hit1 += rank == 1
+        hit10 += rank <= 10
+        rr += 1 / rank
+    n = len(targets)
+    return {"hit@1": hit1 / n, "hit@10": hit10 / n, "mrr": rr / n}
+
+
+async def measure(
+    backend: EmbeddingBackend, chunks: list[str], queries: list[str], targets: list[int]
+) -> dict:
+    await backend.embed(chunks[:8])  # model load / connection setup
+    start = time.perf_counter()
+    chunk_vecs = await backend.embed(chunks)
+    elapsed = time.perf_counter() - start
+    query_vecs = await backend.embed(queries)
+    return {
+        "texts_per_s": len(chunks) / elapsed,
+        **retrieval_quality(chunk_vecs, query_vecs, targets),
+    }
+
+
+def _print_row(label: str, r: dict, cores: int | None) -> None:
+    per_core = f"{r['texts_per_s'] / cores:>10.1f}" if cores else f"{'-':>10}"
+    print(f"{label:<40} {r['texts_per_s']:>9.1f} {per_core} "
+          f"{r['hit@1']:>7.3f} {r['hit@10']:>7.3f} {r['mrr']:>7.3f}")
+
+
+async def run(args) -> None:
+    chunks, queries, targets = load_task(args.queries)
+    print(f"corpus: {len(chunks)} chunks, {len(queries)} queries")
+    print(f"{'backend':<40} {'texts/s':>9} {'per core':>10} "
+          f"{'hit@1':>7} {'hit@10':>7} {'mrr':>7}")
+    results = {}
+
+    if "openai" in args.backends:
+        from app.embeddings.openai_backend import OpenAIEmbeddingBackend
+
+        backend = OpenAIEmbeddingBackend()
+        label = f"openai {backend.model} ({backend.dimensions}d)"
+        results["openai"] = await measure(backend, chunks, queries, targets)
+        _print_row(label, results["openai"], None)
+
+    if "local" in args.backends:
+        from app.embeddings.local_backend import LocalEmbeddingBackend
+
+        settings.embedding_dimensions = args.local_dims
+        for workers in args.workers:
+            settings.local_embedding_workers = workers
+            backend = LocalEmbeddingBackend()
+            try:
+                r = await measure(backend, chunks, queries, targets)
+            finally:
+                backend.close()
+            results["local"] = r
+            label = f"local {settings.local_embedding_model.split('/')[-1]} x{workers}"
+            _print_row(label, r, os.cpu_count() or 1)
+
+    if "openai" in results and "local" in results:
+        delta = {k: results["local"][k] - results["openai"][k] for k in ("hit@1", "hit@10", "mrr")}
+        print("quality delta (local - openai): "
+              + ", ".join(f"{k} {v:+.3f}" for k, v in delta.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["openai", "local"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--local-dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Size, insert rate and recall of chunk embedding storage modes.
+
+Compares the current layout (vector(1536), HNSW on a halfvec cast) with
+native halfvec columns at 1536, 768 and 512 dimensions. The fixture corpus
+is the repo's own files chunked like synced documents (see
+``bench_structured_chunker``); queries are prefixes of sampled chunks.
+
+Corpus and queries are embedded once at 1536 dimensions. Shorter vectors
+are derived by truncating and renormalizing, which is what the API's
+``dimensions`` parameter returns for text-embedding-3 models. Recall@k is
+measured against exact float32 1536-d search. Without an API key, pass
+``--synthetic`` for random vectors with a decaying spectrum. They are only
+good for sizes and insert rates, not for judging recall.
+
+Each mode gets a scratch table in the configured database, which is dropped
+afterwards. Needs pgvector >= 0.7 (halfvec).
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_storage [--synthetic] [--k 10]
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.pipeline.chunker import chunk_structured
+from app.pipeline.embedder import embed_texts
+from benchmarks.bench_structured_chunker import load_corpus
+
+# (label, column type, HNSW index expression, query-side cast)
+MODES = [
+    ("vector(1536), halfvec cast", "vector(1536)",
+     "(embedding::halfvec(1536)) halfvec_cosine_ops", "halfvec(1536)"),
+    ("halfvec(1536)", "halfvec(1536)", "embedding halfvec_cosine_ops", "halfvec(1536)"),
+    ("halfvec(768)", "halfvec(768)", "embedding halfvec_cosine_ops", "halfvec(768)"),
+    ("halfvec(512)", "halfvec(512)", "embedding halfvec_cosine_ops", "halfvec(512)"),
+]
+
+INSERT_BATCH = 500
+
+
+def _dims(column_type: str) -> int:
+    return int(column_type.split("(")[1].rstrip(")"))
+
+
+def _literal(vector: list[float], dims: int) -> str:
+    head = vector[:dims]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return "[" + ",".join(f"{x / norm:.6f}" for x in head) + "]"
+
+
+def _column_expr(column_type: str, query_cast: str) -> str:
+    return "embedding" if column_type == query_cast else f"embedding::{query_cast}"
+
+
+def synthetic_vectors(n: int, dims: int = 1536, seed: int = 0) -> list[list[float]]:
+    """Random vectors whose leading components carry most of the variance,
+    loosely mimicking Matryoshka-trained embeddings."""
+    rng = random.Random(seed)
+    scales = [1 / math.sqrt(1 + i / 32) for i in range(dims)]
+    return [[rng.gauss(0, s) for s in scales] for _ in range(n)]
+
+
+async def load_fixture(synthetic: bool, n_queries: int):
+    chunks = [
+        c["content"]
+        for content_type, body in load_corpus()
+        for c in chunk_structured(body, content_type)
+    ]
+    rng = random.Random(1)
+    queries = [c[:200] for c in rng.sample(chunks, min(n_queries, len(chunks)))]
+
+    if synthetic:
+        corpus_vecs = synthetic_vectors(len(chunks))
+        # Queries sit near a corpus vector, like a paraphrase would
+        query_vecs = [
+            [x + rng.gauss(0, 0.3 * abs(x) + 1e-3) for x in rng.choice(corpus_vecs)]
+            for _ in queries
+        ]
+    else:
+        corpus_vecs = await embed_texts(chunks)
+        query_vecs = await embed_texts(queries)
+    return corpus_vecs, query_vecs
+
+
+async def exact_neighbours(
+    conn, corpus: list[list[float]], queries: list[list[float]], k: int
+) -> list[set[int]]:
+    """Ground truth: exact float32 1536-d cosine search."""
+    await conn.execute(text("CREATE TEMP TABLE bench_exact (id int, embedding vector(1536))"))
+    await conn.execute(
+        text("INSERT INTO bench_exact VALUES (:id, CAST(:e AS vector))"),
+        [{"id": i, "e": _literal(v, 1536)} for i, v in enumerate(corpus)],
+    )
+    truth = []
+    for q in queries:
+        rows = await conn.execute(
+            text(
+                "SELECT id FROM bench_exact "
+                "ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"
+            ),
+            {"q": _literal(q, 1536), "k": k},
+        )
+        truth.append({r.id for r in rows})
+    await conn.execute(text("DROP TABLE bench_exact"))
+    return truth
+
+
+async def run_mode(conn, mode, corpus, queries, truth, k: int) -> dict:
+    label, column_type, index_expr, query_cast = mode
+    dims = _dims(column_type)
+    await conn.execute(text(
+        f"CREATE TABLE bench_storage (id int PRIMARY KEY, embedding {column_type})"
+    ))
+    await conn.execute(text(
+        f"CREATE INDEX bench_storage_idx ON bench_storage USING hnsw ({index_expr})"
+    ))
+
+    # Insert with the index in place, as syncs do
+    rows = [{"id": i, "e": _literal(v, dims)} for i, v in enumerate(corpus)]
+    start = time.perf_counter()
+    for i in range(0, len(rows), INSERT_BATCH):
+        await conn.execute(
+            text(f"INSERT INTO bench_storage VALUES (:id, CAST(:e AS {column_type}))"),
+            rows[i : i + INSERT_BATCH],
+        )
+    insert_rate = len(rows) / (time.perf_counter() - start)
+
+    sizes = (await conn.execute(text(
+        "SELECT pg_table_size('bench_storage') AS heap, "
+        "pg_relation_size('bench_storage_idx') AS idx"
+    ))).one()
+
+    column = _column_expr(column_type, query_cast)
+    hits = 0
+    start = time.perf_counter()
+    for q, expected in zip(queries, truth):
+        result = await conn.execute(
+            text(
+                f"SELECT id FROM bench_storage ORDER BY {column} <=> "
+                f"CAST(:q AS {query_cast}) LIMIT :k"
+            ),
+            {"q": _literal(q, dims), "k": k},
+        )
+        hits += len(expected & {r.id for r in result})
+    query_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    await conn.execute(text("DROP TABLE bench_storage"))
+    return {
+        "label": label,
+        "heap_mb": sizes.heap / 2**20,
+        "index_mb": sizes.idx / 2**20,
+        "insert_rate": insert_rate,
+        "recall": hits / (k * len(queries)),
+        "query_ms": query_ms,
+    }
+
+
+async def run(args) -> None:
+    corpus, queries = await load_fixture(args.synthetic, args.queries)
+    print(f"corpus: {len(corpus)} chunks, {len(queries)} queries, k={args.k}"
+          f"{' (synthetic vectors)' if args.synthetic else ''}")
+
+    async with engine.connect() as conn:
+        truth = await exact_neighbours(conn, corpus, queries, args.k)
+        await conn.commit()
+        print(f"{'storage':<28} {'heap MB':>8} {'index MB':>9} {'rows/s':>8} "
+              f"{'recall@k':>9} {'query ms':>9}")
+        for mode in MODES:
+            r = await run_mode(conn, mode, corpus, queries, truth, args.k)
+            await conn.commit()
+            print(f"{r['label']:<28} {r['heap_mb']:>8.2f} {r['index_mb']:>9.2f} "
+                  f"{r['insert_rate']:>8.0f} {r['recall']:>9.3f} {r['query_ms']:>9.2f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
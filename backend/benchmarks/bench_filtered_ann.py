@@ -0,0 +1,155 @@
+"""Filtered ANN: vector-leg recall and latency across access selectivities.
+
+Seeds a corpus of --chunks chunks (bench_hybrid_search's generator) and,
+for each selectivity in --selectivities, a user with access to that
+fraction of its documents ("granted"; "visible" is the estimated share of
+the whole chunks table, other users' chunks included). For each user it
+runs the vector leg of hybrid_search for --queries random query vectors:
+
+- "previous": the HNSW scan with the connection's ef_search, filtered by
+  access afterwards, as before _plan_vector_leg.
+- "planned": whatever _plan_vector_leg picks (exact scan, raised
+  ef_search, or the plain HNSW scan).
+
+Recall@vector_top is measured against an exact scan of the user's chunks.
+Random vectors are a hard case for HNSW in general, so compare recall
+across rows rather than reading it as the recall on real embeddings.
+Users and corpus are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_filtered_ann [--chunks 100000]
+        [--selectivities 0.005 0.02 0.1 0.5 1] [--exact-max-chunks 10000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import struct
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlmodel import text
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.user import User
+from app.pipeline import retriever, visibility
+from benchmarks.bench_hybrid_search import seed
+
+VECTOR_TOP = 40
+
+
+async def _make_user(label: str) -> uuid.UUID:
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-ann-{label}-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def _grant(owner_id, user_id, fraction: float) -> None:
+    """Give ``user_id`` access to a random ``fraction`` of the owner's documents."""
+    async with get_session_ctx() as db:
+        granted = (await db.execute(
+            text(
+                "INSERT INTO document_access (user_id, document_id) "
+                "SELECT :user_id, id FROM documents WHERE user_id = :owner_id "
+                "AND random() < :fraction RETURNING document_id"
+            ),
+            {"user_id": user_id, "owner_id": owner_id, "fraction": fraction},
+        )).scalars().all()
+        await db.commit()
+    await visibility.sync(granted)
+
+
+async def _vector_ids(user_id, embedding, strategy: str) -> list[uuid.UUID]:
+    visible = retriever._visible_to(user_id)
+    async with get_session_ctx() as db:
+        if strategy == "planned":
+            exact, ef_search = await retriever._plan_vector_leg(db, user_id, None, VECTOR_TOP)
+            await retriever._raise_ef_search(db, ef_search)
+        else:
+            exact = strategy == "truth"
+        result = await db.execute(
+            retriever._vector_leg(visible, embedding, VECTOR_TOP, exact)
+        )
+        return [row.id for row in result]
+
+
+def _p(latencies: list[float], q: int) -> float:
+    return statistics.quantiles(latencies, n=100)[q - 1]
+
+
+async def run(args) -> None:
+    settings.ann_exact_max_chunks = args.exact_max_chunks
+    dims = settings.embedding_dimensions
+    queries = [list(struct.unpack(f"{dims}b", os.urandom(dims))) for _ in range(args.queries)]
+    users = []
+    try:
+        owner_id = await _make_user("owner")
+        users.append(owner_id)
+        async with get_session_ctx() as db:
+            connector = Connector(user_id=owner_id, provider="google_drive")
+            db.add(connector)
+            await db.commit()
+        await seed(owner_id, connector.id, 0, args.chunks)
+
+        readers = []
+        for fraction in args.selectivities:
+            user_id = await _make_user(f"{fraction:g}")
+            users.append(user_id)
+            await _grant(owner_id, user_id, fraction)
+            readers.append((fraction, user_id))
+        async with get_session_ctx() as db:
+            await db.execute(text("ANALYZE document_access"))
+            await db.commit()
+
+        print(f"{args.chunks} chunks, ef_search {settings.hnsw_ef_search}, "
+              f"exact scan up to {settings.ann_exact_max_chunks} visible chunks")
+        print(f"{'granted':>8} {'visible':>8} {'strategy':<9} {'plan':<11} {'results':>7} "
+              f"{'recall':>7} {'p50':>9} {'p95':>9}")
+        for fraction, user_id in readers:
+            async with get_session_ctx() as db:
+                visible, total = await retriever._estimate_visible_chunks(db, user_id, None)
+            truth = [set(await _vector_ids(user_id, q, "truth")) for q in queries]
+            for strategy in ("previous", "planned"):
+                before = dict(retriever.stats)
+                latencies, found, hits = [], 0, 0
+                for embedding, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    ids = await _vector_ids(user_id, embedding, strategy)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    found += len(ids)
+                    hits += len(expected.intersection(ids))
+                plan = "-"
+                if strategy == "planned":
+                    plan = max(retriever.stats, key=lambda k: retriever.stats[k] - before[k])
+                expected_total = sum(map(len, truth))
+                recall = hits / expected_total if expected_total else 1.0
+                print(
+                    f"{fraction:>8.1%} {visible / total:>8.1%} {strategy:<9} {plan:<11} "
+                    f"{found / len(queries):>7.1f} {recall:>7.2f} "
+                    f"{_p(latencies, 50):>7.1f}ms {_p(latencies, 95):>7.1f}ms"
+                )
+    finally:
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_(users)))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument(
+        "--selectivities", nargs="+", type=float, default=[0.005, 0.02, 0.1, 0.5, 1.0]
+    )
+    parser.add_argument("--exact-max-chunks", type=int, default=settings.ann_exact_max_chunks)
+    parser.add_argument("--queries", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
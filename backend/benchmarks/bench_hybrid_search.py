@@ -0,0 +1,239 @@
+"""Hybrid search latency: previous flow vs. separate, concurrent and single modes.
+
+Seeds a scratch user's corpus up to each size in --sizes (chunks of ~300
+words from a Zipf-distributed synthetic vocabulary, random embeddings,
+20 chunks per document), ANALYZEs, then times hybrid_search without
+reranking, the retrieval part of /api/chat, for a fixed set of queries.
+
+- "previous": the flow before this mode existed, kept here as the
+  baseline: SET LOCAL hnsw.ef_search, a vector query and an FTS query that
+  both return content and metadata for every candidate, RRF in Python.
+- "separate", "concurrent", "single": hybrid_search_mode.
+
+Query embeddings come from the in-process fake OpenAI server. By default
+they are cached after a warm-up pass, so the timings are retrieval only.
+With ``--embed-latency S`` the query cache is off and every search waits S
+seconds for its embedding, the case "concurrent" overlaps with the FTS
+leg. The user and its corpus are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hybrid_search [--sizes 100000 1000000]
+        [--embed-latency 0.1]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import struct
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy import Float, func
+from sqlmodel import select, text
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.embeddings import shutdown_embedding_backend
+from app.models.chunk import Chunk
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.user import User
+from app.pipeline import retriever
+from app.pipeline.embedder import embed_query
+from app.pipeline.pg_copy import copy_chunks
+from app.services import openai_client
+from benchmarks.fake_openai import create_app, serve
+
+CHUNKS_PER_DOC = 20
+WORDS_PER_CHUNK = 300
+SEED_BATCH = 5000
+
+
+def make_vocabulary(n: int = 5000) -> list[str]:
+    rng = random.Random(0)
+    syllables = ["ka", "lo", "mi", "ren", "to", "sa", "vel", "dor", "qui", "nex", "ba", "ru"]
+    words = set()
+    while len(words) < n:
+        words.add("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+VOCABULARY = make_vocabulary()
+# Zipf weights: a few very common words, a long tail of rare ones
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def make_queries(n: int) -> list[str]:
+    """Queries of 2-4 words from the middle of the frequency range."""
+    rng = random.Random(1)
+    return [" ".join(rng.sample(VOCABULARY[50:1000], rng.randint(2, 4))) for _ in range(n)]
+
+
+async def previous_search(db, user_id, query, top_k=6, vector_top=40, fts_top=40, rrf_k=60):
+    """hybrid_search (without rerank) before the single-statement mode."""
+    accessible_docs = retriever._accessible_doc_ids(user_id)
+    query_embedding = await embed_query(query)
+    distance = retriever.cosine_distance(query_embedding).label("distance")
+    await db.execute(text("SET LOCAL hnsw.ef_search = 100"))
+    vector_results = (await db.execute(
+        select(Chunk.id, Chunk.document_id, Chunk.content, Chunk.metadata_, distance)
+        .where(Chunk.document_id.in_(accessible_docs))
+        .order_by(distance)
+        .limit(vector_top)
+    )).all()
+    ts_query = func.plainto_tsquery("english", query)
+    fts_rank = func.ts_rank(Chunk.fts, ts_query).cast(Float).label("rank")
+    fts_results = (await db.execute(
+        select(Chunk.id, Chunk.document_id, Chunk.content, Chunk.metadata_, fts_rank)
+        .where(Chunk.document_id.in_(accessible_docs))
+        .where(Chunk.fts.op("@@")(ts_query))
+        .order_by(fts_rank.desc())
+        .limit(fts_top)
+    )).all()
+    scores: dict = {}
+    for results in (vector_results, fts_results):
+        for rank, row in enumerate(results):
+            entry = scores.setdefault(row.id, {
+                "document_id": row.document_id,
+                "content": row.content,
+                "metadata": row.metadata_,
+                "score": 0.0,
+            })
+            entry["score"] += 1.0 / (rrf_k + rank + 1)
+    ranked = sorted(scores.values(), key=lambda x: x["score"], reverse=True)[:top_k]
+    await retriever._hydrate_metadata(db, ranked)
+    return ranked
+
+
+async def current_search(db, user_id, query):
+    return await retriever.hybrid_search(db, user_id, query, rerank=False)
+
+
+async def seed(user_id, connector_id, start: int, count: int) -> None:
+    """Add ``count`` chunks (in documents of CHUNKS_PER_DOC) to the corpus."""
+    rng = random.Random(start)
+    dims = settings.embedding_dimensions
+    for offset in range(0, count, SEED_BATCH):
+        n = min(SEED_BATCH, count - offset)
+        async with get_session_ctx() as db:
+            doc_ids = [uuid.uuid4() for _ in range(n // CHUNKS_PER_DOC)]
+            await db.execute(sa.insert(Document), [
+                {
+                    "id": doc_id, "user_id": user_id, "connector_id": connector_id,
+                    "provider": "google_drive", "external_id": f"bench-{doc_id}",
+                    "title": f"Bench doc {doc_id.hex[:8]}", "content_type": "file",
+                }
+                for doc_id in doc_ids
+            ])
+            await db.execute(
+                text(
+                    "INSERT INTO document_access (user_id, document_id) "
+                    "SELECT :user_id, unnest(CAST(:ids AS uuid[]))"
+                ),
+                {"user_id": user_id, "ids": doc_ids},
+            )
+            # Random int8 components: cosine distance ignores scale
+            await copy_chunks(db, [
+                {
+                    "document_id": doc_id,
+                    "user_id": user_id,
+                    "chunk_index": i,
+                    "content": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=WORDS_PER_CHUNK)),
+                    "token_count": WORDS_PER_CHUNK,
+                    "embedding": struct.unpack(f"{dims}b", os.urandom(dims)),
+                    "metadata": {"char_start": i * 1600, "char_end": (i + 1) * 1600},
+                    "visible_to": [user_id],
+                }
+                for doc_id in doc_ids
+                for i in range(CHUNKS_PER_DOC)
+            ])
+            await db.commit()
+        print(f"  seeded {start + offset + n} chunks", end="\r", flush=True)
+    print(" " * 30, end="\r")
+    async with get_session_ctx() as db:
+        for table in ("chunks", "documents", "document_access"):
+            await db.execute(text(f"ANALYZE {table}"))
+        await db.commit()
+
+
+async def _time(fn, user_id, queries: list[str], repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            async with get_session_ctx() as db:
+                await fn(db, user_id, query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _p(latencies: list[float], q: int) -> float:
+    return statistics.quantiles(latencies, n=100)[q - 1]
+
+
+async def run(args) -> None:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    app = create_app(base_latency=args.embed_latency, dimensions=settings.embedding_dimensions)
+    base_url, server = serve(app, args.port)
+    settings.openai_base_url = base_url
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+    queries = make_queries(args.queries)
+    user_id = None
+    try:
+        async with get_session_ctx() as db:
+            user = User(email=f"bench-search-{uuid.uuid4().hex[:8]}@example.com")
+            db.add(user)
+            await db.flush()
+            connector = Connector(user_id=user.id, provider="google_drive")
+            db.add(connector)
+            await db.commit()
+            user_id, connector_id = user.id, connector.id
+        if args.embed_latency:
+            settings.query_cache_size = 0
+        else:
+            for query in queries:
+                await embed_query(query)
+
+        strategies = [
+            ("previous", previous_search, None),
+            ("separate", current_search, "separate"),
+            ("concurrent", current_search, "concurrent"),
+            ("single", current_search, "single"),
+        ]
+        seeded = 0
+        print(f"{'chunks':>9} {'strategy':<11} {'p50':>9} {'p95':>9}")
+        for size in sorted(args.sizes):
+            await seed(user_id, connector_id, seeded, size - seeded)
+            seeded = size
+            for label, fn, mode in strategies:
+                if mode:
+                    settings.hybrid_search_mode = mode
+                await _time(fn, user_id, queries[:5], 1)  # warm caches
+                latencies = await _time(fn, user_id, queries, args.repeat)
+                print(f"{size:>9} {label:<11} {_p(latencies, 50):>7.1f}ms "
+                      f"{_p(latencies, 95):>7.1f}ms")
+    finally:
+        server.should_exit = True
+        if user_id:
+            async with get_session_ctx() as db:
+                await db.execute(sa.delete(User).where(User.id == user_id))
+                await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds; 0 = cached")
+    parser.add_argument("--port", type=int, default=8773)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
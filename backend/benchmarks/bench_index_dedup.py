@@ -0,0 +1,175 @@
+"""Dedup phase of index_documents: per-document queries vs. bulk.
+
+Two scenarios on an N-message Slack-like fixture (default 10k):
+
+- first sync: every document is new, so Document and access rows are
+  created. Only the dedup phase is timed; chunking and embedding are the
+  same either way.
+- resync by a second user: every document exists already and only access is
+  granted. No chunking or embedding happens, so this is the full
+  time-to-index.
+
+"per-row" is the previous implementation: a SELECT per document, plus a
+SELECT per access check. Runs against the configured database, using
+scratch users that are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_index_dedup [--documents 10000]
+"""
+import argparse
+import asyncio
+import datetime
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.models.user import User
+from app.pipeline.indexer import (
+    _existing_documents,
+    _grant_access,
+    _new_document,
+    index_documents,
+)
+
+PROVIDER = "slack"
+
+
+def make_documents(n: int, namespace: str) -> list[dict]:
+    now = datetime.datetime.now(datetime.UTC)
+    return [
+        {
+            "external_id": f"bench-{namespace}-{i}",
+            "title": f"#general message {i}",
+            "author_name": f"user{i % 50}",
+            "content_type": "message",
+            "raw_content": f"Message {i} about the deploy pipeline and release notes.",
+            "source_created_at": (now - datetime.timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+async def per_row_dedup(db, user_id, connector_id, provider, documents) -> None:
+    """The previous dedup loop, kept here as the baseline."""
+    for doc_data in documents:
+        existing = (await db.execute(
+            select(Document).where(
+                Document.provider == provider,
+                Document.external_id == doc_data["external_id"],
+            )
+        )).scalar_one_or_none()
+        if existing is None:
+            existing = Document(
+                user_id=user_id,
+                connector_id=connector_id,
+                provider=provider,
+                external_id=doc_data["external_id"],
+                title=doc_data.get("title"),
+                author_name=doc_data.get("author_name"),
+                content_type=doc_data["content_type"],
+                raw_content=doc_data.get("raw_content"),
+                source_created_at=datetime.datetime.fromisoformat(
+                    doc_data["source_created_at"]
+                ),
+            )
+            db.add(existing)
+            await db.flush()
+        access = (await db.execute(
+            select(DocumentAccess).where(
+                DocumentAccess.user_id == user_id,
+                DocumentAccess.document_id == existing.id,
+            )
+        )).scalar_one_or_none()
+        if access is None:
+            db.add(DocumentAccess(user_id=user_id, document_id=existing.id))
+    await db.commit()
+
+
+async def bulk_dedup(db, user_id, connector_id, provider, documents) -> None:
+    """The prepare stage's queries for one batch, plus the document inserts."""
+    existing = await _existing_documents(
+        db, provider, [d["external_id"] for d in documents]
+    )
+    docs = [
+        _new_document(user_id, connector_id, provider, d)
+        for d in documents
+        if d["external_id"] not in existing
+    ]
+    db.add_all(docs)
+    await db.flush()
+    await _grant_access(
+        db, user_id, [*(row.id for row in existing.values()), *(d.id for d in docs)]
+    )
+    await db.commit()
+
+
+async def bulk_index(db, user_id, connector_id, provider, documents) -> None:
+    await index_documents(db, user_id, connector_id, provider, documents)
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+async def _timed(label, fn, counter, *args) -> None:
+    before = counter.count
+    start = time.perf_counter()
+    async with get_session_ctx() as db:
+        await fn(db, *args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:>8.2f}s {counter.count - before:>10}")
+
+
+async def _make_user(db, tag: str) -> tuple[uuid.UUID, uuid.UUID]:
+    user = User(email=f"bench-{tag}-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(user)
+    await db.flush()
+    connector = Connector(user_id=user.id, provider=PROVIDER)
+    db.add(connector)
+    await db.flush()
+    return user.id, connector.id
+
+
+async def run(n: int) -> None:
+    counter = StatementCounter()
+    async with get_session_ctx() as db:
+        first = await _make_user(db, "first")
+        second = await _make_user(db, "second")
+        await db.commit()
+
+    old_docs = make_documents(n, f"old-{uuid.uuid4().hex[:8]}")
+    new_docs = make_documents(n, f"new-{uuid.uuid4().hex[:8]}")
+    try:
+        print(f"{n} documents")
+        print(f"{'scenario':<40} {'time':>9} {'statements':>10}")
+        await _timed("first sync, per-row", per_row_dedup, counter, *first, PROVIDER, old_docs)
+        await _timed("first sync, bulk", bulk_dedup, counter, *first, PROVIDER, new_docs)
+        await _timed("resync by second user, per-row", per_row_dedup, counter, *second, PROVIDER, old_docs)
+        await _timed("resync by second user, bulk", bulk_index, counter, *second, PROVIDER, new_docs)
+    finally:
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_([first[0], second[0]])))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10_000)
+    asyncio.run(run(parser.parse_args().documents))
+
+
+if __name__ == "__main__":
+    main()
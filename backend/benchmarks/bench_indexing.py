@@ -0,0 +1,294 @@
+"""Indexing throughput: the real sync path against fake sources and a fake OpenAI.
+
+For each provider it creates scratch users, each with a connector and an
+OAuth token. It then runs the sync end to end through ``_run_ingestion``:
+fetch, index_documents, stale cleanup and overlap detection. With
+``--entry index`` it calls index_documents alone. Documents come from
+``fake_connectors``, and embeddings and chat completions from the in-process
+``fake_openai`` server, with the given latencies and rate limit.
+
+Reported per sync:
+- documents/s and chunks/s.
+- DB time: SQL statements plus chunk COPYs.
+- Embedding wait: summed over embedding API calls. Calls overlap, so this
+  can exceed wall time.
+- Embedding and chat requests.
+- Peak RSS of the process (ru_maxrss). It only grows, so pass a single
+  provider for a clean figure.
+
+``--json`` writes the results, the git revision and the relevant settings,
+for regression tracking. With ``--syncs 2`` the second sync of each
+provider measures an incremental sync with nothing new. With ``--users N``,
+N users sync the same source at once. The embedding cache is off unless
+``--cache`` is given. Scratch users are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_indexing [--providers slack github google_drive]
+        [--documents 1000] [--users 1] [--syncs 1] [--latency 0.15] [--rps 0]
+        [--json results.json]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import resource
+import subprocess
+import time
+import uuid
+
+import sqlalchemy as sa
+from cryptography.fernet import Fernet
+from sqlalchemy import event
+
+from app.api import ingest
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.embeddings import shutdown_embedding_backend
+from app.models.chunk import Chunk
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.oauth_token import OAuthToken
+from app.models.user import User
+from app.pipeline import embedder, indexer
+from app.services import encryption, openai_client
+from app.services.encryption import encrypt_token
+from benchmarks.fake_connectors import CONFIGS, SHAPES, FakeConnector
+from benchmarks.fake_openai import create_app, serve
+
+SETTINGS_PREFIXES = ("ingest_", "embedding_", "chunk_", "content_store")
+
+
+class Timers:
+    def __init__(self):
+        self.db = 0.0
+        self.embed = 0.0
+
+    def instrument(self) -> None:
+        """Time SQL statements, chunk COPYs and embedding API calls."""
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info["bench_start"] = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after(conn, cursor, statement, parameters, context, executemany):
+            self.db += time.perf_counter() - conn.info.pop("bench_start")
+
+        copy_chunks = indexer.copy_chunks
+        embed_uncached = embedder._embed_uncached
+
+        async def timed_copy(db, rows):
+            start = time.perf_counter()
+            try:
+                return await copy_chunks(db, rows)
+            finally:
+                self.db += time.perf_counter() - start
+
+        async def timed_embed(texts, token_counts=None):
+            start = time.perf_counter()
+            try:
+                return await embed_uncached(texts, token_counts)
+            finally:
+                self.embed += time.perf_counter() - start
+
+        indexer.copy_chunks = timed_copy
+        embedder._embed_uncached = timed_embed
+
+
+def _peak_rss_mb() -> float:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _make_account(provider: str) -> tuple[uuid.UUID, uuid.UUID]:
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-indexing-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        connector = Connector(
+            user_id=user.id, provider=provider, status="connected",
+            config=CONFIGS[provider],
+        )
+        db.add(connector)
+        db.add(OAuthToken(
+            user_id=user.id, provider=provider, access_token=encrypt_token("bench"),
+        ))
+        await db.commit()
+        return user.id, connector.id
+
+
+async def _sync(entry: str, provider: str, user_id, connector_id, source: FakeConnector):
+    if entry == "ingestion":
+        await ingest._run_ingestion(str(user_id), provider)
+        return
+    since = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=90)
+    async with get_session_ctx() as db:
+        await indexer.index_documents(
+            db, user_id, connector_id, provider,
+            source.iter_documents("bench", CONFIGS[provider], since),
+        )
+
+
+async def _totals(connector_ids: list[uuid.UUID]) -> tuple[int, int, int]:
+    """(documents, chunks, connectors in error) for the given connectors."""
+    async with get_session_ctx() as db:
+        documents, chunks = (await db.execute(
+            sa.select(
+                sa.func.count(sa.distinct(Document.id)), sa.func.count(Chunk.id)
+            )
+            .select_from(Document)
+            .outerjoin(Chunk, Chunk.document_id == Document.id)
+            .where(Document.connector_id.in_(connector_ids))
+        )).one()
+        errors = (await db.execute(
+            sa.select(sa.func.count()).where(
+                Connector.id.in_(connector_ids), Connector.status == "error"
+            )
+        )).scalar_one()
+    return documents, chunks, errors
+
+
+async def run_provider(provider: str, args, app, timers: Timers, users: list) -> list[dict]:
+    # A fresh namespace, so the first sync indexes everything
+    source = FakeConnector(
+        provider, args.documents, args.page_latency, args.seed, uuid.uuid4().hex[:8]
+    )
+    ingest.get_connector = lambda _: source
+    accounts = [await _make_account(provider) for _ in range(args.users)]
+    users.extend(user_id for user_id, _ in accounts)
+    connector_ids = [connector_id for _, connector_id in accounts]
+
+    results = []
+    for sync in range(1, args.syncs + 1):
+        before = await _totals(connector_ids)
+        timers.db = timers.embed = 0.0
+        requests, inputs, chats, limited = (
+            app.state.requests, app.state.inputs, app.state.chat_requests,
+            app.state.rate_limited,
+        )
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _sync(args.entry, provider, user_id, connector_id, source)
+            for user_id, connector_id in accounts
+        ))
+        wall = time.perf_counter() - start
+        after = await _totals(connector_ids)
+        documents, chunks = after[0] - before[0], after[1] - before[1]
+        results.append({
+            "provider": provider,
+            "entry": args.entry,
+            "sync": sync,
+            "users": args.users,
+            "documents_fetched": args.documents * args.users,
+            "documents_indexed": documents,
+            "chunks": chunks,
+            "wall_s": round(wall, 3),
+            "documents_per_s": round(args.documents * args.users / wall, 1),
+            "chunks_per_s": round(chunks / wall, 1),
+            "db_s": round(timers.db, 3),
+            "embed_wait_s": round(timers.embed, 3),
+            "embed_requests": app.state.requests - requests,
+            "embedded_texts": app.state.inputs - inputs,
+            "chat_requests": app.state.chat_requests - chats,
+            "rate_limited": app.state.rate_limited - limited,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "errors": after[2],
+        })
+    return results
+
+
+def _print(result: dict) -> None:
+    print(
+        f"{result['provider']:<13} {result['sync']:>4} {result['documents_fetched']:>6} "
+        f"{result['chunks']:>7} {result['wall_s']:>8.2f}s {result['documents_per_s']:>7.1f} "
+        f"{result['chunks_per_s']:>8.1f} {result['db_s']:>7.2f}s "
+        f"{result['embed_wait_s']:>8.2f}s {result['peak_rss_mb']:>7.0f}MB "
+        f"{result['errors']:>3}"
+    )
+
+
+async def run(args) -> dict:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    settings.fernet_key = settings.fernet_key or Fernet.generate_key().decode()
+    settings.embedding_cache_enabled = args.cache
+    encryption._fernet = None
+    app = create_app(
+        base_latency=args.latency,
+        requests_per_second=args.rps,
+        dimensions=settings.embedding_dimensions,
+        chat_latency=args.chat_latency,
+    )
+    base_url, server = serve(app, args.port)
+    settings.openai_base_url = base_url
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+    timers = Timers()
+    timers.instrument()
+    users: list[uuid.UUID] = []
+    results: list[dict] = []
+    print(f"entry {args.entry}, {args.users} user(s), embed latency {args.latency}s, "
+          f"rps {args.rps or 'unlimited'}, page latency {args.page_latency}s")
+    print(f"{'provider':<13} {'sync':>4} {'docs':>6} {'chunks':>7} {'wall':>9} "
+          f"{'docs/s':>7} {'chunks/s':>8} {'db':>8} {'embed':>9} {'rss':>9} {'err':>3}")
+    try:
+        for provider in args.providers:
+            for result in await run_provider(provider, args, app, timers, users):
+                _print(result)
+                results.append(result)
+    finally:
+        server.should_exit = True
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_(users)))
+            await db.commit()
+        await engine.dispose()
+
+    return {
+        "benchmark": "indexing",
+        "revision": _revision(),
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+        "args": vars(args),
+        "settings": {
+            key: value for key, value in settings.model_dump().items()
+            if key.startswith(SETTINGS_PREFIXES)
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--documents", type=int, default=1000, help="per provider")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--syncs", type=int, default=1)
+    parser.add_argument("--entry", choices=["ingestion", "index"], default="ingestion")
+    parser.add_argument("--page-latency", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--rps", type=float, default=0, help="0 = unlimited")
+    parser.add_argument("--cache", action="store_true", help="keep the embedding cache on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8772)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Ingestion: fetch-everything-then-index vs. the staged pipeline.
+
+A fake paged source stands in for a connector (each page takes --page-latency
+to arrive) and the in-process fake OpenAI server for embeddings. For each
+strategy it reports total wall time and time until the first chunk of the
+sync is searchable, i.e. visible to another session.
+
+"sequential" is the previous flow, kept here as the baseline: drain the
+source into one list, then chunk and embed document by document and commit
+once at the end.
+
+Runs against the configured database, using scratch users that are deleted
+afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest_pipeline [--pages 20] [--page-size 100]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import sqlalchemy as sa
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.embeddings import shutdown_embedding_backend
+from app.models.chunk import Chunk
+from app.models.connector import Connector
+from app.models.user import User
+from app.pipeline.chunk_pool import chunk_document
+from app.pipeline.embedder import embed_texts
+from app.pipeline.indexer import (
+    _chunk_rows,
+    _grant_access,
+    _new_document,
+    _write_chunks,
+    index_documents,
+)
+from app.services import openai_client
+from benchmarks.bench_embedder import WORDS
+from benchmarks.fake_openai import create_app, serve
+
+PROVIDER = "github"
+
+
+async def fake_pages(
+    n_pages: int, page_size: int, latency: float, max_words: int, namespace: str
+):
+    """Pages of issue-like documents of max_words/5 to max_words words."""
+    rng = random.Random(0)
+    for p in range(n_pages):
+        await asyncio.sleep(latency)
+        yield [
+            {
+                "external_id": f"bench-{namespace}-{p}-{i}",
+                "title": f"Issue #{p * page_size + i}",
+                "author_name": f"user{i % 20}",
+                "content_type": "issue",
+                "raw_content": " ".join(
+                    rng.choices(WORDS, k=rng.randint(max_words // 5, max_words))
+                ),
+            }
+            for i in range(page_size)
+        ]
+
+
+async def sequential(db, user_id, connector_id, pages) -> None:
+    documents = [doc async for page in pages for doc in page]
+    docs = [_new_document(user_id, connector_id, PROVIDER, d) for d in documents]
+    db.add_all(docs)
+    await db.flush()
+    await _grant_access(db, user_id, [doc.id for doc in docs])
+    rows = []
+    for doc, doc_data in zip(docs, documents):
+        chunks = await chunk_document(
+            f"[{PROVIDER}] {doc_data['title']}\n\n{doc_data['raw_content']}",
+            doc_data["content_type"],
+        )
+        embeddings = await embed_texts(
+            [c["content"] for c in chunks], [c["token_count"] for c in chunks]
+        )
+        rows.extend(_chunk_rows(doc.id, user_id, chunks, embeddings))
+    await _write_chunks(db, rows)
+    await db.commit()
+
+
+async def pipelined(db, user_id, connector_id, pages) -> None:
+    await index_documents(db, user_id, connector_id, PROVIDER, pages)
+
+
+async def _first_searchable(user_id: uuid.UUID, start: float) -> float:
+    """Poll from a separate session until a chunk of the sync is committed."""
+    while True:
+        async with get_session_ctx() as db:
+            found = (await db.execute(
+                sa.select(Chunk.id).where(Chunk.user_id == user_id).limit(1)
+            )).first()
+        if found:
+            return time.perf_counter() - start
+        await asyncio.sleep(0.05)
+
+
+async def _make_user(db, tag: str) -> tuple[uuid.UUID, uuid.UUID]:
+    user = User(email=f"bench-{tag}-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(user)
+    await db.flush()
+    connector = Connector(user_id=user.id, provider=PROVIDER)
+    db.add(connector)
+    await db.flush()
+    return user.id, connector.id
+
+
+async def run(args) -> None:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    settings.embedding_cache_enabled = False
+    app = create_app(
+        base_latency=args.latency, dimensions=settings.embedding_dimensions
+    )
+    base_url, server = serve(app, args.port)
+    settings.openai_base_url = base_url
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+    strategies = (("sequential", sequential), ("pipelined", pipelined))
+    users = []
+    try:
+        print(f"{args.pages} pages x {args.page_size} documents, "
+              f"page latency {args.page_latency}s, embed latency {args.latency}s")
+        print(f"{'strategy':<12} {'total':>8} {'first searchable':>17}")
+        for label, fn in strategies:
+            async with get_session_ctx() as db:
+                user_id, connector_id = await _make_user(db, label)
+                await db.commit()
+            users.append(user_id)
+
+            pages = fake_pages(
+                args.pages, args.page_size, args.page_latency, args.words,
+                uuid.uuid4().hex[:8],
+            )
+            start = time.perf_counter()
+            poller = asyncio.create_task(_first_searchable(user_id, start))
+            async with get_session_ctx() as db:
+                await fn(db, user_id, connector_id, pages)
+            total = time.perf_counter() - start
+            first = await poller
+            print(f"{label:<12} {total:>7.2f}s {first:>16.2f}s")
+    finally:
+        server.should_exit = True
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_(users)))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--page-latency", type=float, default=0.3)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--port", type=int, default=8766)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Reranking latency and quality: fused order vs. the rerankers.
+
+The labelled fixture set comes from the repo's own files, chunked like
+synced documents (see ``bench_embedding_backends``). Each query is
+--query-words distinct words drawn from one chunk. That chunk is relevant
+(grade 2) and the other chunks of its document are partly relevant
+(grade 1). The candidates are the top RERANK_CANDIDATES chunks by an
+IDF-weighted keyword overlap, standing in for the fused order; queries
+whose chunk is not among them are dropped.
+
+For each reranker it reports p50/p95 latency per search, nDCG@--top-k
+(ideal order taken over the candidates, since a reranker can only reorder
+them) and how often the latency budget ran out. "rrf" keeps the candidate
+order. "cross_encoder" runs twice: cold, then with every score cached.
+
+"llm" needs CONNECTIVE_OPENAI_API_KEY; "cross_encoder" needs the
+local-models extra.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rerank [--rerankers cross_encoder llm]
+        [--queries 200] [--budget 2.0]
+"""
+import argparse
+import asyncio
+import math
+import random
+import re
+import statistics
+import time
+import uuid
+from collections import Counter
+
+from app import rerankers
+from app.config import settings
+from app.pipeline.chunker import chunk_structured
+from app.pipeline.retriever import RERANK_CANDIDATES
+from benchmarks.bench_structured_chunker import load_corpus
+
+WORD = re.compile(r"[a-z]{3,}")
+
+
+def load_fixtures(
+    n_queries: int, query_words: int, seed: int = 0
+) -> list[tuple[str, list[dict], dict[uuid.UUID, int]]]:
+    """Return (query, candidates in first-stage order, grade per chunk id)."""
+    chunks = []
+    for doc, (content_type, body) in enumerate(load_corpus()):
+        for c in chunk_structured(body, content_type):
+            chunks.append({
+                "chunk_id": uuid.UUID(int=len(chunks)),
+                "document": doc,
+                "content": c["content"],
+                "words": set(WORD.findall(c["content"].lower())),
+            })
+    df = Counter(word for c in chunks for word in c["words"])
+    idf = {word: math.log(len(chunks) / n) for word, n in df.items()}
+
+    rng = random.Random(seed)
+    fixtures = []
+    for target in rng.sample(chunks, len(chunks)):
+        if len(fixtures) == n_queries:
+            break
+        if len(target["words"]) < query_words * 4:
+            continue
+        words = rng.sample(sorted(target["words"]), query_words)
+        overlap = [(sum(idf[w] for w in words if w in c["words"]), c) for c in chunks]
+        overlap.sort(key=lambda pair: pair[0], reverse=True)
+        candidates = [
+            {"chunk_id": c["chunk_id"], "content": c["content"], "score": score}
+            for score, c in overlap[:RERANK_CANDIDATES]
+        ]
+        if target["chunk_id"] not in {c["chunk_id"] for c in candidates}:
+            continue
+        grades = {
+            c["chunk_id"]: 2 if c is target else 1
+            for c in chunks
+            if c["document"] == target["document"]
+        }
+        fixtures.append((" ".join(words), candidates, grades))
+    return fixtures
+
+
+def ndcg(ranked: list[dict], candidates: list[dict], grades: dict, k: int) -> float:
+    def dcg(gains: list[int]) -> float:
+        return sum((2**g - 1) / math.log2(i + 2) for i, g in enumerate(gains[:k]))
+
+    ideal = dcg(sorted((grades.get(c["chunk_id"], 0) for c in candidates), reverse=True))
+    return dcg([grades.get(c["chunk_id"], 0) for c in ranked]) / ideal if ideal else 0.0
+
+
+def _p(latencies: list[float], q: int) -> float:
+    return statistics.quantiles(latencies, n=100)[q - 1]
+
+
+async def measure(label: str, fixtures: list, top_k: int) -> None:
+    before = dict(rerankers.stats)
+    latencies, scores = [], []
+    for query, candidates, grades in fixtures:
+        start = time.perf_counter()
+        ranked = await rerankers.rerank(query, candidates, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        scores.append(ndcg(ranked, candidates, grades, top_k))
+    timeouts = rerankers.stats["timeouts"] - before["timeouts"]
+    print(f"{label:<22} {_p(latencies, 50):>7.1f}ms {_p(latencies, 95):>7.1f}ms "
+          f"{statistics.mean(scores):>7.3f} {timeouts:>8}")
+
+
+async def run(args) -> None:
+    settings.rerank_budget_seconds = args.budget
+    fixtures = load_fixtures(args.queries, args.query_words)
+    print(f"{len(fixtures)} queries, {RERANK_CANDIDATES} candidates each, "
+          f"budget {args.budget}s")
+    print(f"{'reranker':<22} {'p50':>9} {'p95':>9} {f'nDCG@{args.top_k}':>7} {'timeouts':>8}")
+
+    settings.reranker = "none"
+    await measure("rrf", fixtures, args.top_k)
+    for name in args.rerankers:
+        settings.reranker = name
+        rerankers.shutdown_reranker()
+        try:
+            # Model load / connection setup, with a query no fixture repeats
+            await rerankers.get_reranker().rerank("warm up", fixtures[0][1], args.top_k)
+            label = name
+            if name == "cross_encoder":
+                label = f"cross_encoder {settings.cross_encoder_model.split('/')[-1]}"
+            await measure(label, fixtures, args.top_k)
+            if name == "cross_encoder":
+                await measure("  cached", fixtures, args.top_k)
+        finally:
+            rerankers.shutdown_reranker()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rerankers", nargs="*", default=["cross_encoder", "llm"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=6)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--budget", type=float, default=settings.rerank_budget_seconds)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Stale-document cleanup: NOT IN parameter list vs. unnest() anti-join.
+
+For each size, seeds a scratch user with N documents in the fetch window,
+then runs cleanup with all but 1% of their external IDs as the fetch
+result. So 1% of the documents are stale and get deleted. Each strategy
+gets freshly seeded data. The user is deleted afterwards.
+
+"not-in" is the previous implementation: every ID is a separate bind
+parameter, and the deletes run in one transaction. asyncpg caps a
+statement at 32767 parameters, so it fails outright on the largest size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stale_cleanup [--sizes 1000 10000 100000]
+"""
+import argparse
+import asyncio
+import datetime
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlmodel import select
+
+from app.database import engine, get_session_ctx
+from app.models.connector import Connector
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.models.user import User
+from app.pipeline.indexer import cleanup_stale_documents
+
+PROVIDER = "slack"
+
+
+async def not_in_cleanup(db, user_id, provider, fetched_external_ids, since) -> int:
+    """The previous cleanup, kept here as the baseline."""
+    stale_rows = (await db.execute(
+        select(DocumentAccess.id, Document.id)
+        .join(Document, DocumentAccess.document_id == Document.id)
+        .where(
+            DocumentAccess.user_id == user_id,
+            Document.provider == provider,
+            Document.source_created_at >= since,
+            Document.external_id.notin_(fetched_external_ids),
+        )
+    )).all()
+    if not stale_rows:
+        return 0
+    stale_doc_ids = [row[1] for row in stale_rows]
+    await db.execute(
+        sa.delete(DocumentAccess).where(DocumentAccess.id.in_([r[0] for r in stale_rows]))
+    )
+    orphans = (
+        select(Document.id)
+        .outerjoin(DocumentAccess, DocumentAccess.document_id == Document.id)
+        .where(Document.id.in_(stale_doc_ids), DocumentAccess.id.is_(None))
+    )
+    await db.execute(sa.delete(Document).where(Document.id.in_(orphans)))
+    await db.commit()
+    return len(stale_rows)
+
+
+async def seed(n: int) -> tuple[uuid.UUID, set[str]]:
+    """Create a user with n documents; returns (user id, fetched external IDs)."""
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-cleanup-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        connector = Connector(user_id=user.id, provider=PROVIDER)
+        db.add(connector)
+        await db.flush()
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        await db.execute(
+            sa.text(
+                """
+                INSERT INTO documents
+                    (user_id, connector_id, provider, external_id, content_type,
+                     source_created_at)
+                SELECT :user_id, :connector_id, :provider, :prefix || i, 'message',
+                       now() - i * interval '1 minute'
+                FROM generate_series(1, :n) AS i
+                """
+            ),
+            {"user_id": user.id, "connector_id": connector.id,
+             "provider": PROVIDER, "prefix": prefix, "n": n},
+        )
+        await db.execute(
+            sa.text(
+                """
+                INSERT INTO document_access (user_id, document_id)
+                SELECT user_id, id FROM documents WHERE connector_id = :connector_id
+                """
+            ),
+            {"connector_id": connector.id},
+        )
+        await db.commit()
+        await db.execute(sa.text("ANALYZE documents"))
+        await db.execute(sa.text("ANALYZE document_access"))
+        await db.commit()
+    # Every 100th document was not returned by the fetch
+    return user.id, {f"{prefix}{i}" for i in range(1, n + 1) if i % 100}
+
+
+async def run(sizes: list[int]) -> None:
+    since = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=365)
+    print(f"{'ids':>8} {'strategy':<10} {'time':>9} {'removed':>8}")
+    try:
+        for n in sizes:
+            for label, fn in (("not-in", not_in_cleanup), ("unnest", cleanup_stale_documents)):
+                user_id, fetched = await seed(n)
+                try:
+                    start = time.perf_counter()
+                    async with get_session_ctx() as db:
+                        removed = await fn(db, user_id, PROVIDER, fetched, since)
+                    elapsed = f"{time.perf_counter() - start:>8.3f}s"
+                except Exception as e:
+                    elapsed, removed = "failed", type(e).__name__
+                print(f"{len(fetched):>8} {label:<10} {elapsed:>9} {removed:>8}")
+                async with get_session_ctx() as db:
+                    await db.execute(sa.delete(User).where(User.id == user_id))
+                    await db.commit()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10_000, 100_000])
+    asyncio.run(run(parser.parse_args().sizes))
+
+
+if __name__ == "__main__":
+    main()
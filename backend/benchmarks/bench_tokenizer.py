@@ -0,0 +1,89 @@
+"""Cold-start and per-call cost of the encoder registry.
+
+Cold start is measured in fresh interpreters, since BPE ranks are cached for
+the lifetime of a process once loaded. Also checks that truncate_tokens
+stays within its limit on multi-byte text, where cuts can land inside a
+character.
+
+Usage (from backend/):
+    python -m benchmarks.bench_tokenizer --calls 2000
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+
+import tiktoken
+
+from app.services.tokenizer import DEFAULT_ENCODING, count_tokens, truncate_tokens, warm_up
+
+_COLD_START = f"""
+import time
+start = time.perf_counter()
+import tiktoken
+tiktoken.get_encoding({DEFAULT_ENCODING!r}).encode_ordinary("warm")
+print(time.perf_counter() - start)
+"""
+
+_SAMPLE = (
+    "Has anyone already migrated the Drive connector to the batched export "
+    "API? I saw a PR touching google_drive.py last week. "
+) * 4
+
+# CJK, accented Latin and emoji, all multi-byte in UTF-8
+_MULTI_BYTE = "日本語のテキスト中文文本éàüñ😀🚀✅ "
+
+
+def cold_start(runs: int) -> list[float]:
+    return [
+        float(subprocess.check_output([sys.executable, "-c", _COLD_START], text=True))
+        for _ in range(runs)
+    ]
+
+
+def per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(_SAMPLE)
+    return (time.perf_counter() - start) / calls
+
+
+def truncation_overruns(samples: int, seed: int = 0) -> int:
+    """Truncations of random multi-byte text that come out over the limit
+    or with a replacement character."""
+    rng = random.Random(seed)
+    overruns = 0
+    for _ in range(samples):
+        text = "".join(rng.choices(_MULTI_BYTE, k=rng.randint(50, 2000)))
+        max_tokens = rng.randint(1, 300)
+        result = truncate_tokens(text, max_tokens)
+        if count_tokens(result) > max_tokens or "\ufffd" in result:
+            overruns += 1
+    return overruns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--cold-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    cold = cold_start(args.cold_runs)
+    print(f"cold start (import + BPE load): min {min(cold) * 1e3:.1f} ms, "
+          f"max {max(cold) * 1e3:.1f} ms over {len(cold)} runs")
+
+    warm_up()
+    legacy = per_call(
+        lambda t: len(tiktoken.get_encoding(DEFAULT_ENCODING).encode(t)), args.calls
+    )
+    registry = per_call(count_tokens, args.calls)
+    chars = per_call(lambda t: t[:300], args.calls)
+    print(f"get_encoding + encode per call: {legacy * 1e6:8.1f} us")
+    print(f"count_tokens per call:          {registry * 1e6:8.1f} us")
+    print(f"char slice [:300] per call:     {chars * 1e6:8.1f} us")
+    print(f"truncate_tokens overruns:       {truncation_overruns(500):8d} / 500")
+
+
+if __name__ == "__main__":
+    main()
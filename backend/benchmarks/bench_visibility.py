@@ -0,0 +1,181 @@
+"""Access filtering: document_access subquery vs. chunks.visible_to.
+
+Seeds a corpus of --chunks chunks (bench_hybrid_search's generator) and
+--users users, each with access to a share of its documents spread
+log-uniformly from 0.5% to 50%. Then it syncs visible_to and times
+hybrid_search (no reranking) for every user and query, filtering with:
+
+- "join": ``Chunk.document_id IN (SELECT document_id FROM document_access
+  WHERE user_id = ...)``, as before visible_to existed.
+- "visible_to": the GIN-indexed ``visible_to @> ARRAY[user_id]``.
+
+Latency is reported per band of access share. ``--explain`` prints both
+legs' plans for the median user. Users and corpus are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_visibility [--chunks 100000] [--users 50]
+        [--explain]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import text
+
+from app.config import settings
+from app.database import engine, get_session_ctx
+from app.embeddings import shutdown_embedding_backend
+from app.models.chunk import Chunk
+from app.models.connector import Connector
+from app.models.user import User
+from app.pipeline import retriever, visibility
+from app.pipeline.embedder import embed_query
+from app.services import openai_client
+from benchmarks.bench_hybrid_search import _p, make_queries, seed
+from benchmarks.fake_openai import create_app, serve
+
+BANDS = [(0.0, 0.02), (0.02, 0.1), (0.1, 1.0)]
+
+
+def join_filter(user_id, providers=None):
+    """The access filter before visible_to."""
+    return Chunk.document_id.in_(retriever._accessible_doc_ids(user_id, providers))
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, COSTS OFF) " + compiler.process(element.stmt, **kw)
+
+
+async def _make_user(label: str) -> uuid.UUID:
+    async with get_session_ctx() as db:
+        user = User(email=f"bench-visibility-{label}-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def build_fixture(args, users: list) -> list[tuple[float, uuid.UUID]]:
+    """Seed the corpus and the readers; returns (access share, user id)."""
+    owner_id = await _make_user("owner")
+    users.append(owner_id)
+    async with get_session_ctx() as db:
+        connector = Connector(user_id=owner_id, provider="google_drive")
+        db.add(connector)
+        await db.commit()
+    await seed(owner_id, connector.id, 0, args.chunks)
+
+    readers = []
+    for i in range(args.users):
+        share = 0.005 * 100 ** (i / max(args.users - 1, 1))
+        user_id = await _make_user(str(i))
+        users.append(user_id)
+        readers.append((share, user_id))
+    async with get_session_ctx() as db:
+        for share, user_id in readers:
+            await db.execute(
+                text(
+                    "INSERT INTO document_access (user_id, document_id) "
+                    "SELECT :user_id, id FROM documents WHERE user_id = :owner_id "
+                    "AND random() < :share"
+                ),
+                {"user_id": user_id, "owner_id": owner_id, "share": share},
+            )
+        document_ids = (await db.execute(
+            text("SELECT id FROM documents WHERE user_id = :owner_id"), {"owner_id": owner_id}
+        )).scalars().all()
+        await db.commit()
+    # One pass, so each chunk is rewritten once
+    await visibility.sync(document_ids)
+    async with get_session_ctx() as db:
+        for table in ("chunks", "document_access"):
+            await db.execute(text(f"ANALYZE {table}"))
+        await db.commit()
+    return readers
+
+
+async def explain(user_id, query: str) -> None:
+    embedding = await embed_query(query)
+    for label, make_filter in (("join", join_filter), ("visible_to", retriever._visible_to)):
+        visible = make_filter(user_id)
+        for leg, stmt in (
+            ("vector", retriever._vector_leg(visible, embedding, 40, exact=False)),
+            ("fts", retriever._fts_leg(visible, query, 40)),
+        ):
+            async with get_session_ctx() as db:
+                plan = (await db.execute(Explain(stmt))).scalars().all()
+            print(f"\n-- {label}, {leg} leg")
+            # The query vector makes some lines very long
+            print("\n".join(line if len(line) < 120 else line[:117] + "..." for line in plan))
+
+
+async def run(args) -> None:
+    settings.openai_api_key = settings.openai_api_key or "fake"
+    app = create_app(base_latency=0, dimensions=settings.embedding_dimensions)
+    base_url, server = serve(app, args.port)
+    settings.openai_base_url = base_url
+    openai_client._client = None
+    shutdown_embedding_backend()
+
+    queries = make_queries(args.queries)
+    users: list[uuid.UUID] = []
+    try:
+        readers = await build_fixture(args, users)
+        for query in queries:
+            await embed_query(query)
+
+        visible_to = retriever._visible_to
+        print(f"{args.chunks} chunks, {args.users} users, mode {settings.hybrid_search_mode}")
+        print(f"{'access':<9} {'filter':<11} {'p50':>9} {'p95':>9}")
+        for low, high in BANDS:
+            band = [user_id for share, user_id in readers if low <= share < high]
+            if not band:
+                continue
+            for label, make_filter in (("join", join_filter), ("visible_to", visible_to)):
+                retriever._visible_to = make_filter
+                latencies = []
+                for user_id in band:
+                    for query in queries:
+                        start = time.perf_counter()
+                        async with get_session_ctx() as db:
+                            await retriever.hybrid_search(db, user_id, query, rerank=False)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                print(f"{f'{low:.0%}-{high:.0%}':<9} {label:<11} "
+                      f"{_p(latencies, 50):>7.1f}ms {_p(latencies, 95):>7.1f}ms")
+        retriever._visible_to = visible_to
+
+        if args.explain:
+            share, user_id = readers[len(readers) // 2]
+            print(f"\nplans for a user with {share:.1%} access")
+            await explain(user_id, queries[0])
+    finally:
+        server.should_exit = True
+        async with get_session_ctx() as db:
+            await db.execute(sa.delete(User).where(User.id.in_(users)))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--explain", action="store_true")
+    parser.add_argument("--port", type=int, default=8776)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
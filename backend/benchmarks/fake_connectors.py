@@ -0,0 +1,179 @@
+"""Synthetic Slack, GitHub and Google Drive connectors, for benchmarks.
+
+Each one yields pages of documents shaped like the real connector's output
+(external_id scheme, title, content_type, metadata), sized like the source:
+short Slack messages in pages of 200, issues/PRs/commits in pages of 100,
+and long Drive files in pages of 20. Every page takes ``page_latency``
+seconds to "arrive". Content is random text from a fixed seed, and IDs
+include a ``namespace``: the same connector yields the same documents every
+time (a second sync is an incremental one with nothing new, and several
+users syncing it share its documents), while a new namespace gives a
+source nobody has synced yet.
+"""
+import asyncio
+import datetime
+import random
+from collections.abc import AsyncIterator
+from typing import Any
+
+from app.connectors.base import BaseConnector
+
+WORDS = (
+    "sync connector document chunk overlap embedding retriever token session "
+    "index query issue pull request review channel thread deploy migration "
+    "schema latency budget rollout customer incident postmortem roadmap "
+    "quarter planning design spec draft owner team platform search billing "
+    "onboarding dashboard alert metric cache queue worker retry timeout"
+).split()
+
+# provider: (page size, min words, max words)
+SHAPES = {
+    "slack": (200, 5, 80),
+    "github": (100, 40, 800),
+    "google_drive": (20, 800, 12_000),
+}
+
+# Connector config _run_ingestion requires before it syncs
+CONFIGS = {
+    "slack": {},
+    "github": {"repos": ["acme/bench"]},
+    "google_drive": {"folders": [{"id": "bench-folder", "name": "Bench"}]},
+}
+
+
+def _text(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    # Sentences of 8-20 words, a paragraph break after about one in five
+    out, i = [], 0
+    while i < len(words):
+        n = rng.randint(8, 20)
+        out.append(" ".join(words[i : i + n]).capitalize() + ".")
+        i += n
+        if rng.random() < 0.2:
+            out.append("\n\n")
+    return " ".join(out).replace(" \n\n ", "\n\n")
+
+
+def _slack(ns: str, i: int, rng: random.Random, when: datetime.datetime, text: str) -> dict:
+    channel = f"C{ns}{i % 8}"
+    ts = f"{when.timestamp():.6f}"
+    return {
+        "external_id": f"slack:{channel}:{ts}",
+        "title": f"#bench-{i % 8}",
+        "url": f"https://slack.com/archives/{channel}/p{ts.replace('.', '')}",
+        "author_name": f"User {rng.randint(1, 50)}",
+        "content_type": "message",
+        "raw_content": text,
+        "metadata": {
+            "channel_id": channel,
+            "channel_name": f"bench-{i % 8}",
+            "thread_ts": None,
+            "reply_count": rng.randint(0, 5),
+        },
+        "source_created_at": when.isoformat(),
+    }
+
+
+def _github(ns: str, i: int, rng: random.Random, when: datetime.datetime, text: str) -> dict:
+    repo = f"acme/bench-{ns}"
+    kind = ("issue", "pr", "commit")[i % 3]
+    if kind == "commit":
+        sha = f"{rng.getrandbits(160):040x}"
+        return {
+            "external_id": f"github:commit:{repo}:{sha}",
+            "title": f"{repo}@{sha[:7]}: {text[:60]}",
+            "url": f"https://github.com/{repo}/commit/{sha}",
+            "author_name": f"dev{rng.randint(1, 30)}",
+            "content_type": "commit",
+            "raw_content": text[:2000],
+            "metadata": {"repo": repo, "sha": sha},
+            "source_created_at": when.isoformat(),
+        }
+    title = text[:70]
+    return {
+        "external_id": f"github:{kind}:{repo}:{i}",
+        "title": f"{repo}#{i}: {title}",
+        "url": f"https://github.com/{repo}/{'issues' if kind == 'issue' else 'pull'}/{i}",
+        "author_name": f"dev{rng.randint(1, 30)}",
+        "content_type": kind,
+        "raw_content": f"{title}\n\n{text}",
+        "metadata": {"repo": repo, "number": i, "state": "open", "labels": []},
+        "source_created_at": when.isoformat(),
+    }
+
+
+def _google_drive(
+    ns: str, i: int, rng: random.Random, when: datetime.datetime, text: str
+) -> dict:
+    file_id = f"{ns}{rng.getrandbits(128):032x}"
+    return {
+        "external_id": f"gdrive:{file_id}",
+        "title": f"Design doc {i}",
+        "url": f"https://docs.google.com/document/d/{file_id}/edit",
+        "author_name": f"Author {rng.randint(1, 30)}",
+        "author_email": f"author{rng.randint(1, 30)}@example.com",
+        "content_type": "file",
+        "raw_content": text,
+        "metadata": {"mime_type": "application/vnd.google-apps.document", "drive_id": file_id},
+        "source_created_at": when.isoformat(),
+    }
+
+
+BUILDERS = {"slack": _slack, "github": _github, "google_drive": _google_drive}
+
+
+class FakeConnector(BaseConnector):
+    """``documents`` synthetic documents of ``provider``'s shape."""
+
+    def __init__(
+        self,
+        provider: str,
+        documents: int,
+        page_latency: float = 0.0,
+        seed: int = 0,
+        namespace: str = "bench",
+    ):
+        self.provider = provider
+        self.documents = documents
+        self.page_latency = page_latency
+        self.seed = seed
+        self.namespace = namespace
+
+    def get_oauth_url(self, user_id: str) -> str:
+        raise NotImplementedError
+
+    async def exchange_code(self, code: str) -> dict[str, Any]:
+        raise NotImplementedError
+
+    async def validate_token(self, access_token: str) -> bool:
+        return True
+
+    async def refresh_access_token(self, refresh_token: str) -> dict[str, Any]:
+        raise NotImplementedError
+
+    async def iter_documents(
+        self,
+        access_token: str,
+        config: dict,
+        since: datetime.datetime,
+        cursor: dict | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        page_size, min_words, max_words = SHAPES[self.provider]
+        build = BUILDERS[self.provider]
+        rng = random.Random(f"{self.provider}-{self.seed}")
+        # Spread over the 60 days before today, newest first like the real
+        # APIs; anchored at midnight so IDs are stable within a day
+        anchor = datetime.datetime.now(datetime.UTC).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        step = datetime.timedelta(days=60) / max(self.documents, 1)
+        for offset in range(0, self.documents, page_size):
+            await asyncio.sleep(self.page_latency)
+            yield [
+                build(
+                    self.namespace, i, rng,
+                    anchor - step * (i + 1),
+                    _text(rng, min_words, max_words),
+                )
+                for i in range(offset, min(offset + page_size, self.documents))
+            ]
@@ -0,0 +1,153 @@
+"""Local stand-in for the OpenAI embeddings and chat APIs, for benchmarks.
+
+Responds to ``POST /v1/embeddings`` after a simulated latency of
+``base_latency`` plus ``per_token_latency`` per input token (approximated as
+4 characters), and enforces a requests-per-second limit with 429 responses
+carrying ``retry-after-ms``, like the real API. Vectors are deterministic per
+input text. ``POST /v1/chat/completions`` answers the overlap confirmation
+prompt with a fixed JSON verdict after ``chat_latency``, under the same
+rate limit.
+
+Point the app at it with ``CONNECTIVE_OPENAI_BASE_URL=<base_url>/v1``, or
+start it in-process with ``serve()``.
+
+Usage (from backend/):
+    python -m benchmarks.fake_openai --port 8765
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def fake_embedding(text: str, dimensions: int) -> list[float]:
+    """Deterministic vector seeded by the text's hash. Components are
+    independent, so unrelated texts are close to orthogonal, as with real
+    embeddings, and overlap detection doesn't flag every pair."""
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    return [rng.uniform(-1, 1) for _ in range(dimensions)]
+
+
+def create_app(
+    base_latency: float = 0.15,
+    per_token_latency: float = 2e-6,
+    requests_per_second: float = 0,
+    dimensions: int = 1536,
+    chat_latency: float = 0.5,
+) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.inputs = 0
+    app.state.chat_requests = 0
+    app.state.rate_limited = 0
+    window = {"start": time.monotonic(), "count": 0}
+
+    def rate_limited() -> JSONResponse | None:
+        if not requests_per_second:
+            return None
+        now = time.monotonic()
+        if now - window["start"] >= 1:
+            window["start"], window["count"] = now, 0
+        if window["count"] >= requests_per_second:
+            app.state.rate_limited += 1
+            wait_ms = int((1 - (now - window["start"])) * 1000) + 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status_code=429,
+                headers={"retry-after-ms": str(wait_ms)},
+            )
+        window["count"] += 1
+        return None
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        if limited := rate_limited():
+            return limited
+
+        app.state.requests += 1
+        app.state.inputs += len(inputs)
+        tokens = sum(len(t) for t in inputs) // 4
+        await asyncio.sleep(base_latency + tokens * per_token_latency)
+
+        dims = body.get("dimensions") or dimensions
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(t, dims)}
+                for i, t in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if limited := rate_limited():
+            return limited
+
+        app.state.chat_requests += 1
+        await asyncio.sleep(chat_latency)
+        content = json.dumps({"confidence": 0.5, "summary": "Both cover the same work."})
+        tokens = sum(len(m.get("content") or "") for m in body["messages"]) // 4
+        return {
+            "id": f"chatcmpl-{app.state.chat_requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": tokens, "completion_tokens": 20,
+                      "total_tokens": tokens + 20},
+        }
+
+    return app
+
+
+def serve(app: FastAPI, port: int = 8765) -> tuple[str, uvicorn.Server]:
+    """Run ``app`` on a background thread; returns (base_url, server).
+    Set ``server.should_exit = True`` to stop it."""
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1", server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--rps", type=float, default=0, help="0 = unlimited")
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(
+            base_latency=args.latency,
+            requests_per_second=args.rps,
+            chat_latency=args.chat_latency,
+        ),
+        host="127.0.0.1",
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()